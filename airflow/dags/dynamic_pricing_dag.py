@@ -1,27 +1,110 @@
 # src/airflow/dags/dynamic_pricing_dag.py
 from airflow.decorators import dag, task
+from airflow.exceptions import AirflowSkipException
 from airflow.utils.dates import days_ago
-from datetime import timedelta
+from datetime import date, timedelta
+import os
 import subprocess
 
+# Project checkout the pipeline modules are run from (python -m src....)
+PROJECT_DIR = os.environ.get("DYNAMIC_PRICING_HOME", "/opt/airflow/dags")
+
+# src.incremental exits with this code when a partition's input hash is unchanged
+SKIPPED_EXIT_CODE = 99
+
+# Partition tasks read daily aggregates straight from Postgres
+PIPELINE_ENV = {**os.environ, "DAILY_SALES_SOURCE": "postgres"}
+
 default_args = {"retries":1, "retry_delay": timedelta(minutes=5)}
 
+
+def run_module(*args):
+    result = subprocess.run(["python", "-m", *args], cwd=PROJECT_DIR, env=PIPELINE_ENV)
+    if result.returncode == SKIPPED_EXIT_CODE:
+        raise AirflowSkipException("Input partition unchanged")
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, args)
+
+
+def run_partition(stage, date):
+    run_module("src.incremental", stage, "--date", date)
+
+
+# Downstream partition tasks still run after an upstream skip: they check their own input hash
+@task(trigger_rule="none_failed")
+def daily_sales(date):
+    # Aggregates only this day's transactions into its daily_product_sales partition
+    run_partition("daily_sales", date)
+
+@task(trigger_rule="none_failed")
+def features(date):
+    # Previous day's rolling-feature snapshot + this day's rows
+    run_partition("features", date)
+
+@task(trigger_rule="none_failed")
+def recommend(date):
+    run_partition("recommend", date)
+
+
 @dag(dag_id="dynamic_pricing_pipeline", schedule_interval="@daily", start_date=days_ago(1), default_args=default_args, catchup=False)
 def pipeline():
     @task()
     def etl_load():
-        subprocess.run(["python","/opt/airflow/dags/scripts/load_online_retail_to_postgres.py"], check=True)
+        # Incremental: only rows past the stored watermark are copied, so reruns are no-ops
+        run_module("src.etl.load_online_retail_to_postgres")
+
+    @task(trigger_rule="none_failed")
+    def update_elasticity():
+        # Folds only the recommendation days not yet in its statistics (rebuilds if one was rewritten)
+        run_module("src.price_elasticity")
+
+    # One partition per run, keyed on the logical date
+    date = "{{ ds }}"
+    etl_load() >> daily_sales(date) >> features(date) >> recommend(date) >> update_elasticity()
+
+dag = pipeline()
+
+
+@dag(dag_id="dynamic_pricing_backfill", schedule_interval=None, start_date=days_ago(1), default_args=default_args,
+     catchup=False, params={"start": "2024-01-01", "end": "2024-01-31"})
+def backfill():
+    @task()
+    def partition_dates(params=None):
+        # Plain datetime: pendulum renamed period() to interval() between the versions Airflow ships
+        start = date.fromisoformat(params["start"])
+        end = date.fromisoformat(params["end"])
+        return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+    @task(trigger_rule="none_failed")
+    def features_in_order(dates):
+        # Each day's features start from the previous day's state, so this step walks the range in order
+        for date in dates:
+            try:
+                run_partition("features", date)
+            except AirflowSkipException:
+                continue
+
+    dates = partition_dates()
+    # Partitions are independent for aggregation and scoring: fan out with dynamic task mapping
+    sales = daily_sales.expand(date=dates)
+    feats = features_in_order(dates)
+    sales >> feats >> recommend.expand(date=dates)
+
+backfill_dag = backfill()
+
+
+@dag(dag_id="dynamic_pricing_training", schedule_interval="@weekly", start_date=days_ago(7), default_args=default_args, catchup=False)
+def training():
     @task()
     def refresh_mv():
-        # run psql command to REFRESH MATERIALIZED VIEW
-        subprocess.run(["psql","-U","postgres","-d","dynamic_pricing","-c","REFRESH MATERIALIZED VIEW CONCURRENTLY mv_agg_sales_daily;"], check=True)
+        # creates mv_agg_sales_daily (and its unique index) on first run, then refreshes it concurrently
+        run_module("src.etl.materialized_views")
+
     @task()
     def train_model():
-        subprocess.run(["python","/opt/airflow/dags/scripts/train_model.py"], check=True)
+        # Full-history fit, streamed so memory stays bounded; partition runs score with the result
+        run_module("src.models.train_model", "--out-of-core")
 
-    etl = etl_load()
-    mv = refresh_mv()
-    tr = train_model()
-    etl >> mv >> tr
+    refresh_mv() >> train_model()
 
-dag = pipeline()
+training_dag = training()
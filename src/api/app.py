@@ -1,51 +1,256 @@
-import pandas as pd
-import joblib
-from fastapi import FastAPI
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Union
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-# Load pre-trained model
-model = joblib.load("models/xgb_demand_model.joblib")
+from ..features import FEATURES, OutOfOrderSalesError
+from ..models.tree_inference import COMPILED_MAX_ROWS, compile_model, predict_routed
+from . import metrics, profiler
+from .batcher import MicroBatcher
+from .feature_store import OnlineFeatureStore
+from .model_registry import ModelRegistry
+from .prediction_cache import PredictionCache, SqlitePredictionStore
+from .response_cache import ArtifactResponseCache, etag_matches
+
+MODEL_PATH = "models/xgb_demand_model.joblib"
+
+PRICE_UPLIFT = 0.05  # مثال: زيادة 5%
+STREAM_CHUNK_ROWS = 5000
+
+# Seconds between checks of the model artifact for a retrained version (0 disables)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "30"))
+WARMUP_ROWS = 256
+# Concurrent /predict_price calls are scored together: a batch is flushed at this many rows
+# (by default as many as one compiled-forest call scores)...
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", str(COMPILED_MAX_ROWS)))
+# ...or this long after its first row arrived (a max size of 1 disables batching)
+MICRO_BATCH_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", "2"))
+
+# Repeated inputs reuse the model's earlier output: at most this many entries (0 disables the cache)...
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+# ...each kept for this many seconds
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "300"))
+# SQLite file shared by all uvicorn workers (unset: each worker keeps its own cache only)
+PREDICTION_CACHE_DB = os.environ.get("PREDICTION_CACHE_DB")
+# Bigger batches skip the cache: row-by-row lookups would cost more than the predict they save
+PREDICTION_CACHE_MAX_ROWS = 1000
+
+# Expose /debug/profile (sampling profiler, folded stacks for flame graphs)
+ENABLE_PROFILER = os.environ.get("ENABLE_PROFILER", "0") == "1"
+
+# Pre-trained model, loaded and warmed up at startup and hot-swapped on change
+registry = ModelRegistry(MODEL_PATH, warmup_rows=np.zeros((WARMUP_ROWS, len(FEATURES)), dtype=np.float32),
+                         compile=compile_model)
+
+# top_products changes once a day; keep it parsed and serialized between polls
+top_products_cache = ArtifactResponseCache('top_products')
+
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL,
+    shared=SqlitePredictionStore(PREDICTION_CACHE_DB, PREDICTION_CACHE_SIZE) if PREDICTION_CACHE_DB else None)
+
+# Rolling features per stock_code, filled from the sales history at startup
+feature_store = OnlineFeatureStore()
 
-app = FastAPI(title="Dynamic Pricing API")
+
+@asynccontextmanager
+async def lifespan(app):
+    global feature_store
+    feature_store = OnlineFeatureStore.from_history()
+    registry.reload()
+    watcher = asyncio.create_task(registry.watch(MODEL_WATCH_INTERVAL)) if MODEL_WATCH_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+
+
+app = FastAPI(title="Dynamic Pricing API", lifespan=lifespan)
+
+metrics.registry.register(metrics.Gauge(
+    "pricing_api_model_info", "Model version currently served (value is always 1).", ("version", "loaded_at"),
+    callback=lambda: {(registry.current.version, registry.current.loaded_at): 1} if registry.current else {}))
+metrics.registry.register(metrics.Gauge(
+    "pricing_api_prediction_cache_entries", "Entries in this worker's prediction cache.",
+    callback=lambda: {(): len(prediction_cache)}))
+metrics.registry.register(metrics.Gauge(
+    "pricing_api_feature_store_products", "Products held in the online feature store.",
+    callback=lambda: {(): len(feature_store)}))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, path)
+        metrics.REQUESTS.inc(path, request.method, str(status))
+        if status >= 500:
+            metrics.ERRORS.inc(path)
 
 # Input schema
 class PredictionInput(BaseModel):
+    stock_code: Union[int, str]
+    event_date: date  # "YYYY-MM-DD"; anything else is a 422
+    avg_price: float
+
+class BatchPredictionInput(BaseModel):
+    items: List[PredictionInput]
+
+class SalesRecord(BaseModel):
+    stock_code: Union[int, str]
+    event_date: date  # "YYYY-MM-DD"; anything else is a 422
+    daily_quantity: float
     avg_price: float
-    daily_quantity: int
-    event_date: str  # "YYYY-MM-DD"
+
+def predict_rows(stock_codes, event_dates, prices):
+    """Predicted quantity and recommended price for many rows with one predict call."""
+    with metrics.stage("parse"):
+        days = np.array(event_dates, dtype='datetime64[D]').astype(np.int64)
+        prices = np.asarray(prices, dtype=float)
+    with metrics.stage("features"):
+        X = feature_store.feature_matrix(stock_codes, days, prices)
+    current = registry.current
+    if PREDICTION_CACHE_SIZE <= 0 or len(X) > PREDICTION_CACHE_MAX_ROWS:
+        return predict_features(current, X), prices * (1 + PRICE_UPLIFT)
+
+    with metrics.stage("cache"):
+        predicted_quantity, missing = prediction_cache.lookup(current.version, X)
+    if missing.any():
+        predicted_quantity[missing] = predict_features(current, X[missing])
+        prediction_cache.store(current.version, X[missing], predicted_quantity[missing])
+    return predicted_quantity, prices * (1 + PRICE_UPLIFT)
+
+def predict_features(current, X):
+    metrics.BATCH_SIZE.observe(len(X))
+    with metrics.stage("predict"):
+        return predict_routed(current.model, current.compiled, X)
+
+def predict_items(items):
+    """[(stock_code, event_date, avg_price), ...] -> [(predicted_quantity, recommended_price), ...]"""
+    stock_codes, event_dates, prices = zip(*items)
+    predicted_quantity, recommended_price = predict_rows(list(stock_codes), list(event_dates), list(prices))
+    return list(zip(predicted_quantity.tolist(), recommended_price.tolist()))
+
+batcher = MicroBatcher(predict_items, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_WAIT_MS)
 
 @app.post("/predict_price")
-def predict_price(data: PredictionInput):
-    # Convert input to DataFrame
-    df = pd.DataFrame([data.dict()])
-    df['event_date'] = pd.to_datetime(df['event_date'])
-    
-    # Feature engineering (as used in training)
-    df['day_of_week'] = df['event_date'].dt.dayofweek
-    df['month'] = df['event_date'].dt.month
-    df['quarter'] = df['event_date'].dt.quarter
-    df['qty_lag_1'] = df['daily_quantity']      # تبسيط
-    df['qty_7d_ma'] = df['daily_quantity']      # تبسيط
-    df['qty_30d_ma'] = df['daily_quantity']     # تبسيط
-    df['price_lag_1'] = df['avg_price']         # تبسيط
-
-    features = [
-        'qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1',
-        'day_of_week', 'month', 'quarter', 'avg_price'
-    ]
-
-    # Prediction
-    predicted_quantity = model.predict(df[features])[0]
-    recommended_price = df['avg_price'][0] * (1 + 0.05)  # مثال: زيادة 5%
+async def predict_price(data: PredictionInput):
+    # Lag / moving-average features come from the online store, as in the batch pipeline
+    item = (data.stock_code, data.event_date, data.avg_price)
+    if MICRO_BATCH_MAX_SIZE > 1:
+        predicted_quantity, recommended_price = await batcher.submit(item)
+    else:
+        predicted_quantity, recommended_price = await asyncio.to_thread(lambda: predict_items([item])[0])
 
     return {
-        "predicted_quantity": float(predicted_quantity),
-        "recommended_price": float(recommended_price)
+        "predicted_quantity": predicted_quantity,
+        "recommended_price": recommended_price
     }
 
+@app.post("/predict_price/batch")
+def predict_price_batch(data: BatchPredictionInput, stream: bool = False):
+    # Columnar results: {"stock_code": [...], "predicted_quantity": [...], "recommended_price": [...]}
+    stock_codes = [item.stock_code for item in data.items]
+    predicted_quantity, recommended_price = predict_rows(
+        stock_codes, [item.event_date for item in data.items], [item.avg_price for item in data.items])
+
+    if not stream:
+        with metrics.stage("serialize"):
+            return JSONResponse({
+                "stock_code": stock_codes,
+                "predicted_quantity": predicted_quantity.tolist(),
+                "recommended_price": recommended_price.tolist(),
+            })
+
+    # One JSON object per line, generated in chunks so huge batches start flowing immediately
+    def ndjson_lines():
+        for start in range(0, len(stock_codes), STREAM_CHUNK_ROWS):
+            stop = start + STREAM_CHUNK_ROWS
+            rows = zip(stock_codes[start:stop],
+                       predicted_quantity[start:stop].tolist(),
+                       recommended_price[start:stop].tolist())
+            yield "".join(
+                json.dumps({"stock_code": code, "predicted_quantity": qty, "recommended_price": price}) + "\n"
+                for code, qty, price in rows)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/ingest_sales")
+def ingest_sales(records: List[SalesRecord]):
+    # Append a new day (or days) of sales to the online feature store
+    records = sorted(records, key=lambda r: r.event_date)
+    try:
+        feature_store.ingest([r.stock_code for r in records],
+                             [r.event_date for r in records],
+                             [r.daily_quantity for r in records],
+                             [r.avg_price for r in records])
+    except OutOfOrderSalesError as exc:
+        # Nothing was ingested; name the rows that would rewind their product's history
+        to_date = lambda day: str(np.datetime64(int(day), 'D'))
+        rejected = [{"stock_code": code, "event_date": to_date(day), "last_ingested_date": to_date(last_day)}
+                    for code, day, last_day in zip(exc.keys, exc.days, exc.last_days)]
+        return JSONResponse({"detail": str(exc), "rejected": rejected}, status_code=422)
+    return {"ingested": len(records), "products": len(feature_store)}
+
+@app.post("/admin/reload_model")
+def reload_model():
+    # Load and warm up the artifact currently on disk, then swap it in
+    registry.reload()
+    return registry.status()
+
+@app.get("/status")
+def status():
+    return {**registry.status(), "products_in_feature_store": len(feature_store),
+            "prediction_cache_entries": len(prediction_cache)}
+
 @app.get("/top_products")
-def top_products(limit: int = 10):
-    # تحميل ملف top products
-    top_products_path = "data/recommendations/top_products.csv"
-    df = pd.read_csv(top_products_path)
-    return df.head(limit).to_dict(orient="records")
+def top_products(request: Request, limit: int = 10):
+    etag, body = top_products_cache.get(limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 5.0, interval: float = profiler.DEFAULT_INTERVAL):
+    # Folded stacks of every thread over `seconds`; feed to flamegraph.pl or speedscope
+    if not ENABLE_PROFILER:
+        return JSONResponse({"detail": "Profiler disabled; set ENABLE_PROFILER=1"}, status_code=404)
+    samples = await asyncio.to_thread(profiler.sample_stacks, seconds, interval)
+    return PlainTextResponse(profiler.folded(samples))
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the pricing API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (set PREDICTION_CACHE_DB to share results)")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development)")
+    args = parser.parse_args(argv)
+    # Import string (not the app object) so --workers / --reload can re-import it; __spec__ also covers `python -m`
+    uvicorn.run(f"{__spec__.name}:app", host=args.host, port=args.port, workers=args.workers, reload=args.reload)
+
+
+if __name__ == "__main__":
+    main()
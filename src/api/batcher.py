@@ -0,0 +1,69 @@
+# src/api/batcher.py
+import asyncio
+import logging
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one batched call.
+
+    `submit` queues a row and awaits its result. The queue is flushed when
+    it reaches `max_batch_size` rows or `max_wait_ms` after its first row
+    arrived, whichever comes first; the flush runs `predict_batch(rows)`
+    (rows -> one result per row) in a worker thread, so the event loop
+    keeps accepting requests for the next batch meanwhile. If a batch
+    raises, its rows are retried one by one so a single bad row only fails
+    its own caller.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=2.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+        # Flushes in flight (the event loop only keeps weak references to tasks)
+        self._tasks = set()
+
+    async def submit(self, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        flushed = time.perf_counter()
+        for _, _, queued in batch:
+            metrics.STAGE_LATENCY.observe(flushed - queued, "queue")
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        rows = [row for row, _, _ in batch]
+        try:
+            results = await asyncio.to_thread(self.predict_batch, rows)
+        except Exception as exc:
+            if len(batch) > 1:
+                logger.warning("Batch of %d rows failed; retrying row by row", len(batch), exc_info=True)
+                await asyncio.gather(*(self._run([item]) for item in batch))
+            elif not batch[0][1].done():
+                batch[0][1].set_exception(exc)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
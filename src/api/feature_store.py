@@ -0,0 +1,53 @@
+# src/api/feature_store.py
+from threading import Lock
+
+import numpy as np
+
+from ..data_sources import read_daily_sales
+from ..features import FEATURES, RollingFeatureState, time_features_from_days, to_day_numbers
+
+
+class OnlineFeatureStore:
+    """Latest rolling-feature state per stock_code, shared by the API handlers.
+
+    Seeded from the daily sales history at startup and kept current through
+    `ingest`, so a prediction only needs (stock_code, date, price) and its
+    lag / moving-average features are looked up instead of recomputed.
+    """
+
+    def __init__(self, state=None):
+        self.state = state if state is not None else RollingFeatureState()
+        self._lock = Lock()
+
+    @classmethod
+    def from_history(cls, source=None):
+        """Seed the store from the full daily sales history (only the columns it needs)."""
+        history = read_daily_sales(source, columns=['event_date', 'stock_code', 'daily_quantity', 'avg_price'])
+        history['stock_code'] = history['stock_code'].astype(str)
+        return cls(RollingFeatureState.from_frame(history))
+
+    def __len__(self):
+        return len(self.state)
+
+    def ingest(self, stock_codes, event_dates, quantities, prices):
+        """Fold new daily sales into the store.
+
+        Raises features.OutOfOrderSalesError, leaving the store unchanged, if a
+        row is older than its product's latest ingested day; re-ingesting that
+        day replaces it.
+        """
+        days = to_day_numbers(event_dates)
+        with self._lock:
+            self.state.update([str(code) for code in stock_codes], days, quantities, prices)
+
+    def feature_matrix(self, stock_codes, days, prices):
+        """float32 matrix of the model FEATURES, one row per (stock_code, day, price)."""
+        days = np.asarray(days, dtype=np.int64)
+        with self._lock:
+            columns = self.state.features_at([str(code) for code in stock_codes], days)
+        columns.update(time_features_from_days(days))
+        columns['avg_price'] = np.asarray(prices, dtype=float)
+        matrix = np.empty((len(days), len(FEATURES)), dtype=np.float32)
+        for i, name in enumerate(FEATURES):
+            matrix[:, i] = columns[name]
+        return matrix
@@ -0,0 +1,168 @@
+# src/api/metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 50000)
+
+
+class _Sharded:
+    """Base for metrics whose hot path only touches the calling thread's shard.
+
+    Each thread lazily registers its own dict of label values -> cells; only
+    that thread ever writes to it, so recording takes no lock. A scrape sums
+    the shards of every thread (the only place a lock is taken, and only to
+    copy the shard list).
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        return shards
+
+    def _labels(self, values, extra=()):
+        return _format_labels(self.labelnames, values, extra)
+
+
+class Counter(_Sharded):
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self):
+        totals = {}
+        for shard in self._snapshot():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{self._labels(labels)} {value}")
+        return lines
+
+
+class Histogram(_Sharded):
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # [per-bucket counts..., +Inf count, sum]
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self):
+        totals = {}
+        for shard in self._snapshot():
+            for labels, cell in list(shard.items()):
+                total = totals.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, value in enumerate(cell):
+                    total[i] += value
+        return totals
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, cell in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cell[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(float(bound))
+                lines.append(f"{self.name}_bucket{self._labels(labels, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {cell[-1]}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read at scrape time from `callback`, which returns {label values: value}."""
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted((self.callback() or {}).items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter(
+    "pricing_api_requests_total", "HTTP requests by route, method and status code.",
+    ("route", "method", "status")))
+ERRORS = registry.register(Counter(
+    "pricing_api_errors_total", "Requests that raised or returned a 5xx, by route.", ("route",)))
+REQUEST_LATENCY = registry.register(Histogram(
+    "pricing_api_request_seconds", "End-to-end request latency by route.", ("route",)))
+STAGE_LATENCY = registry.register(Histogram(
+    "pricing_api_stage_seconds", "Latency of prediction hot-path stages.", ("stage",)))
+BATCH_SIZE = registry.register(Histogram(
+    "pricing_api_batch_rows", "Rows scored per model.predict call.", buckets=BATCH_SIZE_BUCKETS))
+PREDICTION_CACHE = registry.register(Counter(
+    "pricing_api_prediction_cache_total", "Prediction cache lookups by result (hit, shared_hit, miss).", ("result",)))
+
+
+@contextmanager
+def stage(name):
+    """Record the wall time of the enclosed block under stage=`name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, name)
@@ -0,0 +1,127 @@
+# src/api/model_registry.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: object
+    version: str
+    loaded_at: str
+    load_seconds: float
+    mtime_ns: int
+    size: int
+    # Fast-path copy of `model` for small inputs (None when the model can't be compiled)
+    compiled: object = None
+
+
+def _file_version(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """Holds the serving model and swaps in new versions without downtime.
+
+    A reload loads the artifact and runs warmup predictions off to the side,
+    then replaces `current` in a single assignment. Handlers read `current`
+    once per request, so in-flight requests finish on the model they started
+    with. A failed load or warmup keeps the old model serving.
+    """
+
+    def __init__(self, path, warmup_rows=None, compile=None):
+        self.path = path
+        self.warmup_rows = warmup_rows
+        self.compile = compile
+        self.current = None
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def changed(self):
+        """True when the artifact on disk differs from the one being served."""
+        try:
+            stat = self._stat()
+        except FileNotFoundError:
+            return False
+        return self.current is None or stat != (self.current.mtime_ns, self.current.size)
+
+    def _warmup(self, model):
+        if self.warmup_rows is None:
+            return
+        rows = np.asarray(self.warmup_rows, dtype=np.float32)
+        # Single-row and full-batch calls, so both code paths are initialized
+        model.predict(rows[:1])
+        model.predict(rows)
+
+    def reload(self):
+        """Load, warm up and swap in the artifact at `path`; returns the served model."""
+        with self._reload_lock:
+            start = time.perf_counter()
+            try:
+                mtime_ns, size = self._stat()
+                version = _file_version(self.path)
+                if self.current is not None and version == self.current.version:
+                    # Same bytes (e.g. touched or re-copied): just record the new stat
+                    self.current = replace(self.current, mtime_ns=mtime_ns, size=size)
+                    return self.current
+                import joblib
+
+                model = joblib.load(self.path)
+                self._warmup(model)
+                compiled = self.compile(model) if self.compile else None
+                if compiled is not None:
+                    self._warmup(compiled)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Model reload from %s failed; keeping current model", self.path)
+                if self.current is None:
+                    raise
+                return self.current
+
+            self.current = LoadedModel(
+                model=model,
+                version=version,
+                loaded_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                load_seconds=round(time.perf_counter() - start, 4),
+                mtime_ns=mtime_ns,
+                size=size,
+                compiled=compiled,
+            )
+            self.last_error = None
+            logger.info("Serving model %s (loaded in %.3fs)", version, self.current.load_seconds)
+            return self.current
+
+    async def watch(self, interval):
+        """Poll the artifact every `interval` seconds and reload it in a worker thread when it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            if self.changed():
+                await asyncio.to_thread(self.reload)
+
+    def status(self):
+        current = self.current
+        return {
+            "model_path": self.path,
+            "model_version": current.version if current else None,
+            "loaded_at": current.loaded_at if current else None,
+            "load_seconds": current.load_seconds if current else None,
+            "compiled": current.compiled is not None if current else None,
+            "last_reload_error": self.last_error,
+        }
@@ -0,0 +1,175 @@
+# src/api/prediction_cache.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rows the shared store is queried for per statement (SQLite caps bound parameters)
+SQLITE_CHUNK_ROWS = 500
+# Expired / other-version rows are purged from the shared store every this many writes
+PRUNE_EVERY_WRITES = 200
+
+
+def row_keys(X):
+    """One key per row: the bytes of its float32 feature vector (-0.0 folded into 0.0)."""
+    X = np.ascontiguousarray(X, dtype=np.float32) + np.float32(0)
+    return [row.tobytes() for row in X]
+
+
+class SqlitePredictionStore:
+    """Predictions shared between worker processes through one SQLite file.
+
+    Runs in WAL mode so readers never block the writer; each thread keeps
+    its own connection. The store is best effort: a locked or broken
+    database is logged and treated as a miss, never as a failed request.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=0.5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions ("
+                         "key BLOB PRIMARY KEY, version TEXT NOT NULL, value REAL NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_expires ON predictions (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, version, keys, now):
+        """{key: (expires_at, value)} for the live entries of `version` among `keys`."""
+        found = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), SQLITE_CHUNK_ROWS):
+                chunk = keys[start:start + SQLITE_CHUNK_ROWS]
+                rows = conn.execute(
+                    f"SELECT key, expires_at, value FROM predictions WHERE version = ? AND expires_at > ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})", [version, now, *chunk])
+                found.update((key, (expires_at, value)) for key, expires_at, value in rows)
+        except sqlite3.Error:
+            logger.warning("Shared prediction cache %s unavailable for reads", self.path, exc_info=True)
+        return found
+
+    def put_many(self, version, entries, now):
+        """Write [(key, expires_at, value), ...]; every few writes drop dead rows and trim to max_entries."""
+        try:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO predictions (key, version, expires_at, value) VALUES (?, ?, ?, ?)",
+                             [(key, version, expires_at, value) for key, expires_at, value in entries])
+            self._writes += 1
+            if self._writes % PRUNE_EVERY_WRITES == 0:
+                conn.execute("DELETE FROM predictions WHERE version != ? OR expires_at <= ?", (version, now))
+                conn.execute("DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+                             "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        except sqlite3.Error:
+            logger.warning("Shared prediction cache %s unavailable for writes", self.path, exc_info=True)
+
+
+class PredictionCache:
+    """Model outputs keyed on (model version, feature vector), with LRU eviction and a TTL.
+
+    Entries live for `ttl` seconds and at most `max_entries` are kept, the
+    least recently used going first. Looking up with a new model version
+    drops every entry, so a reloaded model never serves its predecessor's
+    results. With a `shared` store, local misses are looked up there and new
+    results written through to it, so other worker processes reuse them.
+    """
+
+    def __init__(self, max_entries=10_000, ttl=300.0, shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, version):
+        # Caller holds the lock
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, version, X):
+        """(predictions, missing): cached outputs for the rows of X, NaN where `missing` is True."""
+        keys = row_keys(X)
+        values = np.full(len(keys), np.nan)
+        now = time.time()
+        missed = []
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    values[i] = entry[1]
+                else:
+                    missed.append(i)
+        hits = len(keys) - len(missed)
+
+        shared_hits = 0
+        if missed and self.shared is not None:
+            found = self.shared.get_many(version, [keys[i] for i in missed], now)
+            if found:
+                with self._lock:
+                    self._check_version(version)
+                    for i in missed:
+                        entry = found.get(keys[i])
+                        if entry is not None:
+                            values[i] = entry[1]
+                            self._insert(keys[i], entry)
+                shared_hits = len(found)
+                missed = [i for i in missed if keys[i] not in found]
+
+        metrics.PREDICTION_CACHE.inc("hit", amount=hits)
+        metrics.PREDICTION_CACHE.inc("shared_hit", amount=shared_hits)
+        metrics.PREDICTION_CACHE.inc("miss", amount=len(missed))
+        missing = np.zeros(len(keys), dtype=bool)
+        missing[missed] = True
+        return values, missing
+
+    def store(self, version, X, predictions):
+        """Cache the model's `predictions` for the rows of X."""
+        now = time.time()
+        expires_at = now + self.ttl
+        entries = [(key, expires_at, float(value)) for key, value in zip(row_keys(X), predictions)]
+        with self._lock:
+            if self._version is None:
+                self._version = version
+            elif version != self._version:
+                # Computed by a model that has since been replaced
+                return
+            for key, expires_at, value in entries:
+                self._insert(key, (expires_at, value))
+        if self.shared is not None:
+            self.shared.put_many(version, entries, now)
+
+    def _insert(self, key, entry):
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
@@ -0,0 +1,42 @@
+# src/api/profiler.py
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 60.0
+DEFAULT_INTERVAL = 0.005
+
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL):
+    """Sample every thread's Python stack for `seconds`; returns Counter(folded stack -> samples).
+
+    Pure-Python wall-clock sampler built on sys._current_frames(): nothing is
+    installed on the request path, the cost is paid only while a profile is
+    being taken. The profiling thread itself is left out.
+    """
+    seconds = min(float(seconds), MAX_PROFILE_SECONDS)
+    own_id = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    samples = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_id:
+                samples[f"{names.get(thread_id, thread_id)};{_stack(frame)}"] += 1
+        time.sleep(interval)
+    return samples
+
+
+def folded(samples):
+    """Brendan Gregg's folded format (`stack;frames count` per line), the input of flamegraph.pl / speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
@@ -0,0 +1,64 @@
+# src/api/response_cache.py
+import json
+import os
+from threading import Lock
+
+from ..storage import artifact_path, load_artifact
+
+MAX_CACHED_BODIES = 64
+
+
+class _Entry:
+    def __init__(self, stat, records):
+        self.stat = stat
+        self.records = records
+        self.bodies = {}
+
+
+class ArtifactResponseCache:
+    """Parsed artifact records and their JSON bytes, reused until the file changes.
+
+    The cache key is the backing file's (mtime_ns, size), so a rewrite of the
+    artifact (Parquet or legacy CSV) is picked up on the next request without
+    any explicit invalidation. The same key feeds the ETag, which lets polling
+    clients revalidate with a 304.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._entry = None
+        self._lock = Lock()
+
+    def _current(self):
+        st = os.stat(artifact_path(self.name))
+        stat = (st.st_mtime_ns, st.st_size)
+        entry = self._entry
+        if entry is None or entry.stat != stat:
+            with self._lock:
+                entry = self._entry
+                if entry is None or entry.stat != stat:
+                    entry = _Entry(stat, load_artifact(self.name).to_dict(orient="records"))
+                    self._entry = entry
+        return entry
+
+    def get(self, limit):
+        """(etag, JSON body) for the first `limit` records (head() semantics)."""
+        entry = self._current()
+        body = entry.bodies.get(limit)
+        if body is None:
+            body = json.dumps(entry.records[:limit]).encode()
+            if len(entry.bodies) < MAX_CACHED_BODIES:
+                entry.bodies[limit] = body
+        mtime_ns, size = entry.stat
+        return f'"{mtime_ns:x}-{size:x}-{limit}"', body
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
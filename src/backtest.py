@@ -0,0 +1,247 @@
+# src/backtest.py
+import argparse
+import importlib
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .features import FEATURES, add_rolling_features, add_time_features
+from .models.tree_inference import compile_model, predict_routed
+from .pricing_engine import PRICE_FEATURE, candidate_multipliers, recommend_prices
+
+MODEL_PATH = "models/xgb_demand_model.joblib"
+HISTORY_COLUMNS = ['event_date', 'stock_code', 'product_name', 'daily_quantity', 'avg_price']
+
+# Elasticity for products with no estimate of their own or of their category;
+# estimates are clipped to this range so a noisy positive slope never rewards price hikes
+DEFAULT_ELASTICITY = -1.0
+MIN_ELASTICITY = -5.0
+MAX_ELASTICITY = 0.0
+
+# Price increase of the flat-uplift policy (the API's PRICE_UPLIFT)
+UPLIFT = 0.05
+
+
+class DemandScorer:
+    """The demand model behind a plain-array predict.
+
+    A replay scores thousands of small daily batches, where building a
+    DataFrame and the native predict's per-call overhead cost more than the
+    trees: inputs become float32 arrays and small ones go to the compiled
+    forest when the model can be compiled, routed like the API's.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.compiled = compile_model(model)
+
+    def predict(self, X):
+        return predict_routed(self.model, self.compiled, np.asarray(X, dtype=np.float32))
+
+
+def historical_policy(day, model):
+    """The price actually charged: the baseline every other policy is compared with."""
+    return day[PRICE_FEATURE].to_numpy(dtype=float)
+
+
+def uplift_policy(day, model):
+    return day[PRICE_FEATURE].to_numpy(dtype=float) * (1 + UPLIFT)
+
+
+def recommendation_policy(day, model):
+    """The revenue-maximizing candidate of dynamic_pricing_recommendation."""
+    from .dynamic_pricing_recommendation import MAX_PRICE_CHANGE, MIN_PRICE_CHANGE, PRICE_STEPS
+
+    multipliers = candidate_multipliers(MIN_PRICE_CHANGE, MAX_PRICE_CHANGE, PRICE_STEPS)
+    return recommend_prices(model, day[FEATURES], multipliers)['recommended_price'].to_numpy()
+
+
+# A policy maps one day of a shard (FEATURES plus stock_code, product_name,
+# event_date, daily_quantity and previous_price, the policy's own last price for
+# the product) and the demand model to one price per row. Other policies are
+# given as "package.module:function".
+POLICIES = {
+    'historical': historical_policy,
+    'uplift': uplift_policy,
+    'recommendation': recommendation_policy,
+}
+DEFAULT_POLICIES = ['historical', 'uplift', 'recommendation']
+
+
+def resolve_policy(spec):
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise ValueError(f"Unknown policy {spec!r}: use one of {sorted(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def load_elasticities():
+    """product_name -> price elasticity: the product's estimate, else its category's, else the default."""
+    from .data_sources import read_product_categories
+    from .storage import artifact_exists, load_artifact
+
+    elasticity = pd.Series(dtype=float)
+    if artifact_exists('price_elasticity'):
+        products = load_artifact('price_elasticity', columns=['product_name', 'price_elasticity'])
+        elasticity = products.set_index(products['product_name'].astype(str))['price_elasticity']
+    if artifact_exists('category_elasticity'):
+        categories = load_artifact('category_elasticity').set_index('category_name')['price_elasticity']
+        by_category = read_product_categories().map(categories).dropna()
+        elasticity = elasticity.combine_first(by_category)
+    return elasticity.clip(MIN_ELASTICITY, MAX_ELASTICITY)
+
+
+def replay_shard(history, policy_specs, model_path, elasticity, default_price, start_date=None, threads=1):
+    """Replay one shard of products day by day under every policy.
+
+    Features are built once for the whole shard from the actual sales (the
+    policies' prices never feed back into them); each day then costs one
+    policy call and one batched predict per policy, over all the shard's
+    products sold that day. Returns one row of totals per (policy, day).
+    """
+    import joblib
+
+    model = joblib.load(model_path)
+    if hasattr(model, 'set_params'):
+        model.set_params(n_jobs=threads)
+    model = DemandScorer(model)
+    # Arrays carry no column names; scikit-learn models fitted on a DataFrame would warn on every call
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    policies = {spec: resolve_policy(spec) for spec in policy_specs}
+
+    df = add_rolling_features(add_time_features(history), default_price=default_price)
+    df = df.sort_values('event_date', kind='stable').reset_index(drop=True)
+    if start_date is not None:
+        df = df[df['event_date'] >= start_date].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame()
+
+    product_codes, product_index = np.unique(df['stock_code'].astype(str), return_inverse=True)
+    product_elasticity = elasticity.reindex(df['product_name'].astype(str)).fillna(DEFAULT_ELASTICITY).to_numpy()
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+    price_column = FEATURES.index(PRICE_FEATURE)
+    last_price = {spec: np.full(len(product_codes), np.nan) for spec in policies}
+
+    dates = df['event_date'].to_numpy()
+    boundaries = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+    rows = []
+    for day_rows in np.split(np.arange(len(df)), boundaries):
+        day = df.iloc[day_rows]
+        products = product_index[day_rows]
+        historical_price = day[PRICE_FEATURE].to_numpy(dtype=float)
+        actual_qty = day['daily_quantity'].to_numpy(dtype=float)
+        baseline_qty = np.clip(model.predict(X[day_rows]), 0, None)
+        for spec, policy in policies.items():
+            prices = np.asarray(policy(day.assign(previous_price=last_price[spec][products]), model), dtype=float)
+            last_price[spec][products] = prices
+            grid = X[day_rows].copy()
+            grid[:, price_column] = prices
+            model_qty = np.clip(model.predict(grid), 0, None)
+            elasticity_qty = actual_qty * (prices / historical_price) ** product_elasticity[day_rows]
+            rows.append({
+                'policy': spec,
+                'event_date': dates[day_rows[0]],
+                'products': len(day_rows),
+                'actual_revenue': float(actual_qty @ historical_price),
+                'model_baseline_revenue': float(baseline_qty @ historical_price),
+                'model_revenue': float(model_qty @ prices),
+                'elasticity_revenue': float(elasticity_qty @ prices),
+                'model_units': float(model_qty.sum()),
+                'elasticity_units': float(elasticity_qty.sum()),
+                'price_change_sum': float((prices / historical_price - 1).sum()),
+            })
+    return pd.DataFrame(rows)
+
+
+def shard_of(stock_codes, n_shards):
+    """Stable shard number per stock code (same product, same shard, on every run)."""
+    hashes = pd.util.hash_array(np.asarray(stock_codes, dtype=str).astype(object))
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def summarize(daily):
+    """Per-policy totals and uplifts over the replayed period."""
+    totals = daily.groupby('policy', sort=False).agg(
+        days=('event_date', 'nunique'), rows=('products', 'sum'),
+        actual_revenue=('actual_revenue', 'sum'), model_baseline_revenue=('model_baseline_revenue', 'sum'),
+        model_revenue=('model_revenue', 'sum'), elasticity_revenue=('elasticity_revenue', 'sum'),
+        model_units=('model_units', 'sum'), elasticity_units=('elasticity_units', 'sum'),
+        price_change_sum=('price_change_sum', 'sum'))
+    # Model revenue is compared with the model's own revenue at historical prices, so model bias cancels
+    totals['model_uplift'] = totals['model_revenue'] / totals['model_baseline_revenue'] - 1
+    totals['elasticity_uplift'] = totals['elasticity_revenue'] / totals['actual_revenue'] - 1
+    totals['mean_price_change'] = totals.pop('price_change_sum') / totals['rows']
+    wins = (daily['model_revenue'] > daily['model_baseline_revenue']).groupby(daily['policy'], sort=False).mean()
+    totals['model_win_days'] = wins
+    return totals.reset_index()
+
+
+def run_backtest(policies=DEFAULT_POLICIES, start_date=None, end_date=None, workers=None,
+                 model_path=MODEL_PATH, history=None):
+    """(daily revenue curves, summary) for `policies` over [start_date, end_date].
+
+    Products are split into shards by a hash of their stock code, one per
+    worker process; all of a product's history stays in its shard so its
+    rolling features are exact. History before `start_date` is read too,
+    to warm up the features, but is not scored.
+    """
+    from .data_sources import read_daily_sales
+
+    for spec in policies:
+        # Fail here rather than in every worker
+        resolve_policy(spec)
+    if history is None:
+        history = read_daily_sales(end_date=end_date, columns=HISTORY_COLUMNS)
+    start_date = pd.Timestamp(start_date) if start_date is not None else None
+    elasticity = load_elasticities()
+    # Shared fallback for price_lag_1, so sharding doesn't change any feature
+    default_price = float(history['avg_price'].mean())
+
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    shards = shard_of(history['stock_code'], workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(replay_shard, history[shards == shard], list(policies), model_path,
+                               elasticity, default_price, start_date, threads)
+                   for shard in range(workers) if (shards == shard).any()]
+        parts = [future.result() for future in futures]
+    if all(part.empty for part in parts):
+        raise ValueError("No daily sales to replay in the requested window")
+
+    daily = pd.concat(parts, ignore_index=True)
+    daily = daily.groupby(['policy', 'event_date'], sort=False).sum().reset_index()
+    daily = daily.sort_values(['policy', 'event_date'], kind='stable').reset_index(drop=True)
+    return daily, summarize(daily)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the sales history under pricing policies and compare revenue")
+    parser.add_argument("--policy", action="append", dest="policies",
+                        help=f"policy to replay, repeatable: {', '.join(POLICIES)} or module:function "
+                             f"(default: {', '.join(DEFAULT_POLICIES)})")
+    parser.add_argument("--start", help="first day scored (earlier history only warms up the features)")
+    parser.add_argument("--end", help="last day replayed")
+    parser.add_argument("--workers", type=int, help="worker processes, one product shard each (default: all cores)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    from .storage import save_artifact
+
+    start = time.perf_counter()
+    daily, summary = run_backtest(args.policies or DEFAULT_POLICIES, args.start, args.end, args.workers, args.model)
+    save_artifact(daily, 'backtest_daily')
+    save_artifact(summary, 'backtest_summary')
+    print(f"✅ Replayed {daily['event_date'].nunique()} days under {len(summary)} policies "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(summary[['policy', 'days', 'rows', 'model_uplift', 'elasticity_uplift', 'mean_price_change',
+                   'model_win_days']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
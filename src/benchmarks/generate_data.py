@@ -0,0 +1,141 @@
+# src/benchmarks/generate_data.py
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_PATH = "data/online_retail.csv"
+
+CATEGORIES = {
+    (10, 'Electronics'): ['Smartphone', 'Tablet', 'Smartwatch', 'Laptop', 'Headphones'],
+    (20, 'Fashion'): ['Skirt', 'Shirt', 'Dress', 'Pants', 'T-shirt'],
+    (30, 'Home & Living'): ['Pillow', 'Blanket', 'Carpet', 'Vase', 'Painting'],
+    (40, 'Books & Stationery'): ['Story Book', 'Notebook', 'Pen', 'Novel', 'Eraser'],
+    (50, 'Sports & Outdoors'): ['Soccer Ball', 'Tent', 'Yoga Mat', 'Running Shoes', 'Basketball'],
+}
+# Median list price per category
+CATEGORY_PRICES = {10: 380.0, 20: 60.0, 30: 120.0, 40: 15.0, 50: 90.0}
+PAYMENT_METHODS = ['Cash on Delivery', 'Bank Transfer', 'Credit Card']
+CITIES = [f"City {i}" for i in range(200)]
+
+COLUMNS = ['customer_id', 'order_date', 'product_id', 'category_id', 'category_name', 'product_name',
+           'quantity', 'price', 'payment_method', 'city', 'review_score', 'gender', 'age']
+
+CHUNK_ROWS = 1_000_000
+MAX_QUANTITY = 20
+
+
+def make_catalog(n_skus, rng):
+    """SKU table: category, product name, list price, price elasticity and popularity."""
+    keys = list(CATEGORIES)
+    category = rng.integers(0, len(keys), n_skus)
+    category_id = np.array([keys[c][0] for c in category])
+    names = [CATEGORIES[keys[c]][i] for c, i in zip(category, rng.integers(0, 5, n_skus))]
+    list_price = np.array([CATEGORY_PRICES[c] for c in category_id]) * rng.lognormal(0.0, 0.4, n_skus)
+    popularity = 1.0 / np.arange(1, n_skus + 1) ** 0.8   # Zipf-like: a few best sellers, long tail
+    rng.shuffle(popularity)
+    return pd.DataFrame({
+        'product_id': np.arange(100, 100 + n_skus),
+        'category_id': category_id,
+        'category_name': [keys[c][1] for c in category],
+        'product_name': names,
+        'list_price': np.round(list_price, 2),
+        'elasticity': rng.uniform(-2.5, -0.3, n_skus),
+        'popularity': popularity / popularity.sum(),
+    })
+
+
+def day_weights(dates, weekly=0.15, yearly=0.30):
+    """Relative order volume per day: weekend bump plus a yearly peak in December."""
+    weekend = np.where(dates.dayofweek >= 5, 1 + weekly, 1 - weekly * 2 / 5)
+    season = 1 + yearly * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 350) / 365.25)
+    weights = weekend * season
+    return weights / weights.sum()
+
+
+def generate_chunk(n_rows, catalog, dates, weights, promo_rate, rng):
+    sku = rng.choice(len(catalog), n_rows, p=catalog['popularity'].to_numpy())
+    day = rng.choice(len(dates), n_rows, p=weights)
+
+    # Price moves around list price; promotions cut it by 10-40% on some SKU-days
+    list_price = catalog['list_price'].to_numpy()[sku]
+    promo_hash = (sku * 1_000_003 + day * 7919) % 1000
+    on_promo = promo_hash < promo_rate * 1000
+    discount = np.where(on_promo, 0.6 + 0.3 * (promo_hash % 97) / 96, 1.0)
+    price = np.round(list_price * discount * rng.normal(1.0, 0.03, n_rows), 2).clip(0.5)
+
+    # Quantity follows a constant-elasticity demand curve around list price
+    demand = 2.0 * (price / list_price) ** catalog['elasticity'].to_numpy()[sku]
+    quantity = np.clip(1 + rng.poisson(demand), 1, MAX_QUANTITY)
+
+    review = rng.integers(1, 6, n_rows).astype(float)
+    review[rng.random(n_rows) < 0.2] = np.nan
+    gender = rng.choice(np.array(['M', 'F', None], dtype=object), n_rows, p=[0.46, 0.44, 0.10])
+
+    chunk = pd.DataFrame({
+        'customer_id': rng.integers(10_000, 100_000, n_rows),
+        'order_date': dates[day].strftime('%Y-%m-%d'),
+        'product_id': catalog['product_id'].to_numpy()[sku],
+        'category_id': catalog['category_id'].to_numpy()[sku],
+        'category_name': catalog['category_name'].to_numpy()[sku],
+        'product_name': catalog['product_name'].to_numpy()[sku],
+        'quantity': quantity,
+        'price': price,
+        'payment_method': rng.choice(PAYMENT_METHODS, n_rows),
+        'city': rng.choice(CITIES, n_rows),
+        'review_score': review,
+        'gender': gender,
+        'age': rng.integers(18, 76, n_rows),
+    }, columns=COLUMNS)
+    # A sliver of dirty rows so the cleaning step has work to do
+    chunk.loc[rng.random(n_rows) < 0.001, 'price'] = -1.0
+    return chunk
+
+
+def generate(rows, skus=600, start_date="2024-03-19", days=365, weekly=0.15, yearly=0.30,
+             promo_rate=0.1, seed=42, output=OUTPUT_PATH, chunk_rows=CHUNK_ROWS):
+    """Write `rows` synthetic order lines shaped like data/online_retail.csv.
+
+    Rows are generated and appended one chunk at a time, so memory stays flat
+    from 10k to tens of millions of rows. Same arguments, same file.
+    """
+    rng = np.random.default_rng(seed)
+    catalog = make_catalog(skus, rng)
+    dates = pd.date_range(start_date, periods=days, freq='D')
+    weights = day_weights(dates, weekly, yearly)
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    written = 0
+    with open(output, "w", newline="") as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            chunk = generate_chunk(n, catalog, dates, weights, promo_rate, rng)
+            chunk.to_csv(f, index=False, header=(written == 0))
+            written += n
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic online_retail.csv data")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--skus", type=int, default=600)
+    parser.add_argument("--start-date", default="2024-03-19")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--weekly", type=float, default=0.15, help="weekend uplift (0 disables weekly seasonality)")
+    parser.add_argument("--yearly", type=float, default=0.30, help="amplitude of the December peak")
+    parser.add_argument("--promo-rate", type=float, default=0.1, help="share of SKU-days on promotion")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = generate(args.rows, args.skus, args.start_date, args.days, args.weekly, args.yearly,
+                    args.promo_rate, args.seed, args.output)
+    print(f"✅ Wrote {args.rows} rows to {path} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# src/benchmarks/run_benchmarks.py
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from .generate_data import generate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKSPACE = "benchmarks/workspace"
+REPORT_PATH = "benchmarks/report.json"
+
+# `src` in a checkout, `dynamic_pricing` when installed
+PACKAGE = __package__.rsplit('.', 1)[0]
+
+# Pipeline stages in run order: name -> module argv (run with `python -m`)
+STAGES = {
+    'preprocess': [f'{PACKAGE}.data_preprocessing'],
+    'feature_engineering': [f'{PACKAGE}.feature_engineering'],
+    'train_model': [f'{PACKAGE}.models.train_model'],
+    'recommendation': [f'{PACKAGE}.dynamic_pricing_recommendation'],
+    'elasticity': [f'{PACKAGE}.price_elasticity', '--full'],
+    'dashboard_callbacks': [f'{PACKAGE}.benchmarks.dashboard_callbacks'],
+}
+
+# Relative slow-down (time or peak memory) that counts as a regression
+REGRESSION_THRESHOLD = 0.10
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.5
+MIN_RSS_DELTA_MB = 32
+
+
+def run_stage(argv, workspace, log):
+    """Run one stage in `workspace`; returns (seconds, peak RSS in MiB, exit code)."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', *argv], cwd=workspace, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    # wait4 gives this child's own rusage, not the max over every child so far
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return seconds, usage.ru_maxrss / 1024, process.returncode
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows, skus, days, stages, workspace=WORKSPACE, seed=42):
+    """Generate data, run `stages` in order and return the report dict."""
+    os.makedirs(os.path.join(workspace, 'data'), exist_ok=True)
+    start = time.perf_counter()
+    generate(rows, skus=skus, days=days, seed=seed, output=os.path.join(workspace, 'data', 'online_retail.csv'))
+    report = {
+        'meta': {
+            'rows': rows, 'skus': skus, 'days': days, 'seed': seed,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'generate_seconds': round(time.perf_counter() - start, 3),
+        },
+        'stages': {},
+    }
+
+    with open(os.path.join(workspace, 'benchmark.log'), 'w') as log:
+        for name in stages:
+            log.write(f"\n===== {name} =====\n")
+            log.flush()
+            seconds, peak_rss_mb, code = run_stage(STAGES[name], workspace, log)
+            report['stages'][name] = {
+                'seconds': round(seconds, 3),
+                'peak_rss_mb': round(peak_rss_mb, 1),
+                'rows_per_second': round(rows / seconds, 1) if seconds else None,
+                'exit_code': code,
+            }
+            status = "✅" if code == 0 else "❌"
+            print(f"{status} {name}: {seconds:.2f}s, peak RSS {peak_rss_mb:.0f} MiB, {rows / seconds:,.0f} rows/s")
+            if code != 0:
+                print(f"Stage {name} failed, see {os.path.join(workspace, 'benchmark.log')}")
+                break
+    return report
+
+
+def compare(baseline, candidate, threshold=REGRESSION_THRESHOLD):
+    """Stage-by-stage comparison; returns a list of (stage, metric, base, new, change) regressions."""
+    regressions = []
+    for name, new in candidate['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            print(f"  {name}: no baseline")
+            continue
+        for metric, min_delta in (('seconds', MIN_SECONDS_DELTA), ('peak_rss_mb', MIN_RSS_DELTA_MB)):
+            change = (new[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+            regressed = change > threshold and new[metric] - base[metric] > min_delta
+            flag = "REGRESSION" if regressed else ("faster" if change < -threshold else "ok")
+            print(f"  {name:20s} {metric:12s} {base[metric]:>10.2f} -> {new[metric]:>10.2f} ({change:+.1%}) {flag}")
+            if regressed:
+                regressions.append((name, metric, base[metric], new[metric], change))
+    if baseline['meta'].get('rows') != candidate['meta'].get('rows'):
+        print("⚠️ Reports were run at different row counts; comparison is only indicative")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline end to end on synthetic data")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skus", type=int, default=600)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--workspace", default=WORKSPACE)
+    parser.add_argument("--output", default=REPORT_PATH)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="compare two reports instead of running; exits 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            candidate = json.load(f)
+        regressions = compare(baseline, candidate, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
+        return
+
+    report = run(args.rows, args.skus, args.days, args.stages, os.path.abspath(args.workspace), args.seed)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {args.output}")
+    failed = [name for name, stage in report['stages'].items() if stage['exit_code'] != 0]
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
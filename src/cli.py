@@ -0,0 +1,55 @@
+# src/cli.py
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module relative to this package, help). Modules are imported only
+# when their command runs, so `--help` never pays for xgboost, sklearn or dash.
+COMMANDS = {
+    'preprocess': ('.data_preprocessing', "Clean the raw export and build daily product sales"),
+    'features': ('.feature_engineering', "Build the train/test feature sets from the cleaned data"),
+    'train': ('.models.train_model', "Train the XGBoost demand model (global, per segment or out of core)"),
+    'train-rf': ('.dynamic_pricing_model', "Train the RandomForest baseline on train_data"),
+    'compile-model': ('.models.tree_inference', "Compile a tree model to flat NumPy arrays"),
+    'recommend': ('.dynamic_pricing_recommendation', "Recommend prices and build the dashboard data"),
+    'top-products': ('.top_products_analysis', "Print the top products by recommended-price revenue"),
+    'optimize': ('.models.price_optimizer', "Search the revenue-maximizing price of every product"),
+    'optimize-constrained': ('.models.constrained_pricing', "Catalog-wide prices under business rules and category targets"),
+    'backtest': ('.backtest', "Replay the sales history under pricing policies"),
+    'elasticity': ('.price_elasticity', "Update per-product and per-category price elasticities"),
+    'partition': ('.incremental', "Process one date partition (or a range) of the pipeline"),
+    'etl-load': ('.etl.load_online_retail_to_postgres', "Copy new rows of the online retail export into Postgres"),
+    'refresh-views': ('.etl.materialized_views', "Create and refresh the daily sales materialized view"),
+    'serve': ('.api.app', "Serve the pricing API"),
+    'dashboard': ('.dashboard.dashboard_app_v', "Run the Dash dashboard"),
+    'generate-data': ('.benchmarks.generate_data', "Generate a synthetic online_retail.csv"),
+    'benchmark': ('.benchmarks.run_benchmarks', "Run the pipeline benchmarks"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="dynamic-pricing",
+        description="Dynamic pricing pipeline. Run `dynamic-pricing <command> --help` for a command's options.")
+    commands = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # Options are parsed by the command's own main(), so -h/--help is forwarded too
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def run(command, argv=()):
+    module_name, _ = COMMANDS[command]
+    module = importlib.import_module(module_name, __package__)
+    # Commands' own parsers take their usage line from argv[0]
+    sys.argv[0] = f"dynamic-pricing {command}"
+    module.main(list(argv))
+
+
+def main(argv=None):
+    args, rest = build_parser().parse_known_args(argv)
+    run(args.command, rest)
+
+
+if __name__ == "__main__":
+    main()
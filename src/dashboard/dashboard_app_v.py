@@ -1,285 +1,318 @@
 # src/dashboard/dashboard_app.py
+import argparse
+
 import pandas as pd
 import numpy as np
-from datetime import timedelta
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
 
-# -------------------------
-# Load data
-# -------------------------
-RECS = "data/recommendations/daily_price_recommendation.csv"
-TOP = "data/recommendations/top_products.csv"
+from ..storage import load_artifact
+from .rollups import GRAIN_LABELS, build_rollups, downsample_series, period_start, pick_grain
 
-df = pd.read_csv(RECS, parse_dates=['event_date'])
-top_products = pd.read_csv(TOP)
+# only the columns the rollups need are read from the recommendation artifact
+RECS_COLUMNS = ['event_date', 'product_name', 'predicted_quantity', 'recommended_price', 'avg_price']
 
-# ensure numeric types
-df['predicted_quantity'] = pd.to_numeric(df['predicted_quantity'], errors='coerce').fillna(0)
-df['recommended_price'] = pd.to_numeric(df.get('recommended_price', df.get('rec_price', 'avg_price')), errors='coerce')
-df['avg_price'] = pd.to_numeric(df['avg_price'], errors='coerce')
+# Color palette (fancy & elegant)
+PALETTE = ["#FFD369", "#6C5B7B", "#355C7D", "#2A9D8F", "#F08A5D", "#7FB069", "#9B59B6", "#E76F51", "#4D9078"]
 
-# derived revenue (using recommended price if present, otherwise avg_price)
-df['revenue'] = df['predicted_quantity'] * df['recommended_price'].fillna(df['avg_price'])
 
-# default products (top by revenue)
-default_products = list(top_products['product_name'].head(6).values) if not top_products.empty else list(df['product_name'].unique()[:6])
+def product_totals(d):
+    # per-product sums over the selected day cells
+    return d.groupby('product_name', observed=True).agg(
+        revenue=('revenue', 'sum'),
+        predicted_quantity=('predicted_quantity', 'sum'),
+        avg_price_sum=('avg_price_sum', 'sum'),
+        avg_price_count=('avg_price_count', 'sum'),
+        rows=('rows', 'sum'),
+        count_days=('event_date', 'size')).reset_index()
 
-# Color palette (fancy & elegant)
-PALETTE = ["#FFD369", "#6C5B7B", "#355C7D", "#2A9D8F", "#F08A5D", "#7FB069", "#9B59B6", "#E76F51", "#4D9078"]
 
-# -------------------------
-# Initialize app
-# -------------------------
-app = dash.Dash(__name__)
-app.title = "Dynamic Pricing Dashboard"
+class Dashboard:
+    """Rollups behind the dashboard and the callbacks that read them.
 
-# -------------------------
-# Layout
-# -------------------------
-app.layout = html.Div([
-    html.Div([
-        html.H1("📊 Dynamic Pricing Dashboard",
-                style={'textAlign': 'center', 'color': '#FFD369', 'marginBottom': '6px'}),
-        html.Div("Interactive visual analysis — filter by product & date range", style={'textAlign': 'center', 'color': '#cfd7c7', 'marginBottom': '20px'})
-    ]),
-
-    # Controls row
-    html.Div([
-        html.Div([
-            html.Label("Select products", style={'color': '#cfd7c7'}),
-            dcc.Dropdown(
-                id='product-dropdown',
-                options=[{'label': p, 'value': p} for p in df['product_name'].sort_values().unique()],
-                value=default_products,
-                multi=True,
-                placeholder="Choose products...",
-                style={'minWidth': '280px'}
-            )
-        ], style={'flex': '1', 'minWidth': '280px', 'marginRight': '12px'}),
+    Nothing is read at import: `load()` reads the artifacts, and
+    `create_app()` wires the callbacks of one instance into a Dash app.
+    """
 
-        html.Div([
-            html.Label("Date range", style={'color': '#cfd7c7'}),
-            dcc.DatePickerRange(
-                id='date-range',
-                min_date_allowed=df['event_date'].min(),
-                max_date_allowed=df['event_date'].max(),
-                start_date=(df['event_date'].max() - pd.Timedelta(days=60)).date(),
-                end_date=df['event_date'].max().date(),
-                display_format='YYYY-MM-DD',
-                minimum_nights=0,
-                style={'color': '#000'}
-            )
-        ], style={'marginRight': '12px'}),
+    def __init__(self, df, top_products):
+        # ensure numeric types
+        df['predicted_quantity'] = pd.to_numeric(df['predicted_quantity'], errors='coerce').fillna(0)
+        df['recommended_price'] = pd.to_numeric(df['recommended_price'], errors='coerce')
+        df['avg_price'] = pd.to_numeric(df['avg_price'], errors='coerce')
 
-        html.Div([
-            html.Label("Top N (pie/bar)", style={'color': '#cfd7c7'}),
-            dcc.Slider(id='top-n', min=3, max=15, step=1, value=6,
-                       marks={3: '3', 6: '6', 10: '10', 15: '15'})
-        ], style={'flex': '1', 'minWidth': '220px', 'paddingTop': '6px'})
-    ], style={'display': 'flex', 'gap': '12px', 'marginBottom': '18px', 'alignItems': 'center'}),
-
-    # KPI cards
-    html.Div([
-        html.Div([
-            html.Div("Total Revenue", style={'color': '#cfd7c7'}),
-            html.H2(id='kpi-revenue', style={'color': '#ffffff', 'marginTop': '6px'})
-        ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center', 'marginRight': '12px'}),
+        # derived revenue (using recommended price if present, otherwise avg_price)
+        df['revenue'] = df['predicted_quantity'] * df['recommended_price'].fillna(df['avg_price'])
 
-        html.Div([
-            html.Div("Total Predicted Qty", style={'color': '#cfd7c7'}),
-            html.H2(id='kpi-qty', style={'color': '#ffffff', 'marginTop': '6px'})
-        ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center', 'marginRight': '12px'}),
+        # Per-product revenue / quantity / price cubes at day, week and month grain;
+        # callbacks select from these instead of grouping raw SKU-day rows
+        self.rollups = build_rollups(df)
+        self.store = self.rollups['day']
 
-        html.Div([
-            html.Div("Avg Recommended Price", style={'color': '#cfd7c7'}),
-            html.H2(id='kpi-price', style={'color': '#ffffff', 'marginTop': '6px'})
-        ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center'})
-    ], style={'display': 'flex', 'marginBottom': '20px'}),
-
-    # Tabs for charts
-    dcc.Tabs([
-        dcc.Tab(label='Line (Revenue)', children=[
-            dcc.Graph(id='line-chart', config={'displayModeBar': True})
-        ]),
-        dcc.Tab(label='Dot (Predicted Qty)', children=[
-            dcc.Graph(id='dot-chart')
-        ]),
-        dcc.Tab(label='Bar (Top Products)', children=[
-            dcc.Graph(id='bar-chart')
-        ]),
-        dcc.Tab(label='Pie / Donut', children=[
-            dcc.Graph(id='pie-chart')
-        ]),
-        dcc.Tab(label='Scatter (Price vs Qty)', children=[
-            dcc.Graph(id='scatter-chart')
-        ])
-    ], style={'fontSize': '15px'}, colors={'border': '#222831', 'primary': '#FFD369', 'background': '#393E46'}),
+        # default products (top by revenue)
+        self.default_products = list(top_products['product_name'].head(6).values) if not top_products.empty else list(self.store.products[:6])
 
-    html.Div(style={'height': '30px'})  # spacer
-], style={'backgroundColor': '#222831', 'padding': '18px', 'fontFamily': 'Arial, sans-serif'})
+    @classmethod
+    def load(cls):
+        return cls(load_artifact('daily_price_recommendation', columns=RECS_COLUMNS),
+                   load_artifact('top_products', columns=['product_name']))
 
-# -------------------------
-# Helper: filter df
-# -------------------------
-def filter_df(products, start_date, end_date):
-    d = df.copy()
-    if products:
-        d = d[d['product_name'].isin(products)]
-    if start_date:
-        d = d[d['event_date'] >= pd.to_datetime(start_date)]
-    if end_date:
-        d = d[d['event_date'] <= pd.to_datetime(end_date)]
-    return d
+    def filter_df(self, products, start_date, end_date, grain='day'):
+        # memoized slice of a rollup cube; treat as read-only
+        return self.rollups[grain].select(products, start_date, end_date)
 
-# -------------------------
-# Callbacks
-# -------------------------
-@app.callback(
-    Output('kpi-revenue', 'children'),
-    Output('kpi-qty', 'children'),
-    Output('kpi-price', 'children'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date')
-)
-def update_kpis(products, start_date, end_date):
-    d = filter_df(products, start_date, end_date)
-    total_rev = d['revenue'].sum()
-    total_qty = d['predicted_quantity'].sum()
-    avg_price = d['recommended_price'].mean() if 'recommended_price' in d.columns else d['avg_price'].mean()
-    return f"${total_rev:,.2f}", f"{total_qty:,.0f}", f"${(avg_price if not np.isnan(avg_price) else 0):.2f}"
-
-@app.callback(
-    Output('line-chart', 'figure'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date')
-)
-def update_line_chart(products, start_date, end_date):
-    d = filter_df(products, start_date, end_date)
-    if d.empty:
-        fig = px.line(title="No data for selection")
-        fig.update_layout(template='plotly_dark')
+    def update_kpis(self, products, start_date, end_date):
+        d = self.filter_df(products, start_date, end_date)
+        total_rev = d['revenue'].sum()
+        total_qty = d['predicted_quantity'].sum()
+        price_count = d['rec_price_count'].sum()
+        avg_price = d['rec_price_sum'].sum() / price_count if price_count else np.nan
+        return f"${total_rev:,.2f}", f"{total_qty:,.0f}", f"${(avg_price if not np.isnan(avg_price) else 0):.2f}"
+
+    def update_line_chart(self, products, start_date, end_date):
+        # grain follows the selected span; edge periods are kept whole
+        grain = pick_grain(start_date or self.store.min_date, end_date or self.store.max_date)
+        d = self.filter_df(products, period_start(start_date, grain), end_date, grain)
+        if d.empty:
+            fig = px.line(title="No data for selection")
+            fig.update_layout(template='plotly_dark')
+            return fig
+
+        # one line per product, LTTB-downsampled so the figure payload stays bounded
+        agg = downsample_series(d, 'product_name', 'event_date', 'revenue')
+        fig = px.line(agg, x='event_date', y='revenue', color='product_name',
+                      markers=True, line_shape='spline', template='plotly_dark',
+                      color_discrete_sequence=PALETTE)
+        fig.update_layout(title=f"{GRAIN_LABELS[grain]} Revenue (selected products)",
+                          xaxis_title="Date", yaxis_title="Revenue ($)",
+                          hovermode='x unified')
+        fig.update_yaxes(tickprefix="$", separatethousands=True)
+        fig.update_xaxes(rangeslider_visible=True)
         return fig
 
-    # aggregate daily revenue by date and product (so multiple products are separate lines)
-    agg = d.groupby(['event_date', 'product_name'])['revenue'].sum().reset_index()
-    agg = agg.sort_values('event_date')
-    fig = px.line(agg, x='event_date', y='revenue', color='product_name',
-                  markers=True, line_shape='spline', template='plotly_dark',
-                  color_discrete_sequence=PALETTE)
-    fig.update_layout(title="Daily Revenue (selected products)",
-                      xaxis_title="Date", yaxis_title="Revenue ($)",
-                      hovermode='x unified')
-    fig.update_yaxes(tickprefix="$", separatethousands=True)
-    fig.update_xaxes(rangeslider_visible=True)
-    return fig
-
-@app.callback(
-    Output('dot-chart', 'figure'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date')
-)
-def update_dot_chart(products, start_date, end_date):
-    d = filter_df(products, start_date, end_date)
-    if d.empty:
-        fig = px.scatter(title="No data for selection")
-        fig.update_layout(template='plotly_dark')
+    def update_dot_chart(self, products, start_date, end_date):
+        d = self.filter_df(products, start_date, end_date)
+        if d.empty:
+            fig = px.scatter(title="No data for selection")
+            fig.update_layout(template='plotly_dark')
+            return fig
+
+        # show predicted quantity distribution (aggregate by product, show latest day for clarity)
+        latest_date = d['event_date'].max()
+        latest = d.loc[d['event_date'] == latest_date, ['product_name', 'event_date', 'predicted_quantity']]
+        latest = latest.sort_values('predicted_quantity', ascending=False)
+        fig = px.scatter(latest, x='product_name', y='predicted_quantity', size='predicted_quantity',
+                         hover_data=['event_date'], template='plotly_dark', color_discrete_sequence=PALETTE)
+        fig.update_layout(title=f"Predicted Quantity per Product (latest date: {latest_date.date()})",
+                          xaxis_tickangle=-45)
         return fig
 
-    # show predicted quantity distribution (aggregate by product, show latest day for clarity)
-    latest = d.groupby(['product_name', 'event_date'])['predicted_quantity'].sum().reset_index()
-    latest_date = latest['event_date'].max()
-    latest = latest[latest['event_date'] == latest_date]
-    latest = latest.sort_values('predicted_quantity', ascending=False)
-    fig = px.scatter(latest, x='product_name', y='predicted_quantity', size='predicted_quantity',
-                     hover_data=['event_date'], template='plotly_dark', color_discrete_sequence=PALETTE)
-    fig.update_layout(title=f"Predicted Quantity per Product (latest date: {latest_date.date()})",
-                      xaxis_tickangle=-45)
-    return fig
-
-@app.callback(
-    Output('bar-chart', 'figure'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date'),
-    Input('top-n', 'value')
-)
-def update_bar_chart(products, start_date, end_date, top_n):
-    d = filter_df(products, start_date, end_date)
-    if d.empty:
-        fig = px.bar(title="No data for selection")
-        fig.update_layout(template='plotly_dark')
+    def update_bar_chart(self, products, start_date, end_date, top_n):
+        d = self.filter_df(products, start_date, end_date)
+        if d.empty:
+            fig = px.bar(title="No data for selection")
+            fig.update_layout(template='plotly_dark')
+            return fig
+
+        agg = product_totals(d).sort_values('revenue', ascending=False)
+        top = agg.head(top_n)
+        fig = px.bar(top, x='product_name', y='revenue', template='plotly_dark',
+                     color='product_name', color_discrete_sequence=PALETTE)
+        fig.update_layout(title=f"Top {top_n} Products by Revenue", xaxis_tickangle=-45)
+        fig.update_yaxes(tickprefix="$", separatethousands=True)
         return fig
 
-    agg = d.groupby('product_name')['revenue'].sum().reset_index().sort_values('revenue', ascending=False)
-    top = agg.head(top_n)
-    fig = px.bar(top, x='product_name', y='revenue', template='plotly_dark',
-                 color='product_name', color_discrete_sequence=PALETTE)
-    fig.update_layout(title=f"Top {top_n} Products by Revenue", xaxis_tickangle=-45)
-    fig.update_yaxes(tickprefix="$", separatethousands=True)
-    return fig
-
-@app.callback(
-    Output('pie-chart', 'figure'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date'),
-    Input('top-n', 'value')
-)
-def update_pie_chart(products, start_date, end_date, top_n):
-    d = filter_df(products, start_date, end_date)
-    if d.empty:
-        fig = px.pie(title="No data for selection")
-        fig.update_layout(template='plotly_dark')
+    def update_pie_chart(self, products, start_date, end_date, top_n):
+        d = self.filter_df(products, start_date, end_date)
+        if d.empty:
+            fig = px.pie(title="No data for selection")
+            fig.update_layout(template='plotly_dark')
+            return fig
+
+        agg = product_totals(d)[['product_name', 'revenue']].sort_values('revenue', ascending=False)
+        agg['product_name'] = agg['product_name'].astype(str)
+        if len(agg) > top_n:
+            top = agg.head(top_n)
+            other_sum = agg['revenue'].iloc[top_n:].sum()
+            top = pd.concat([top, pd.DataFrame([{'product_name': 'Other', 'revenue': other_sum}])], ignore_index=True)
+        else:
+            top = agg
+        fig = px.pie(top, names='product_name', values='revenue', hole=0.45, template='plotly_dark',
+                     color_discrete_sequence=PALETTE)
+        fig.update_traces(textposition='inside', textinfo='percent+label')
+        fig.update_layout(title=f"Revenue share (Top {top_n})")
         return fig
 
-    agg = d.groupby('product_name')['revenue'].sum().reset_index().sort_values('revenue', ascending=False)
-    if len(agg) > top_n:
-        top = agg.head(top_n).copy()
-        other_sum = agg['revenue'].iloc[top_n:].sum()
-        top = top.append({'product_name': 'Other', 'revenue': other_sum}, ignore_index=True)
-    else:
-        top = agg
-    fig = px.pie(top, names='product_name', values='revenue', hole=0.45, template='plotly_dark',
-                 color_discrete_sequence=PALETTE)
-    fig.update_traces(textposition='inside', textinfo='percent+label')
-    fig.update_layout(title=f"Revenue share (Top {top_n})")
-    return fig
-
-@app.callback(
-    Output('scatter-chart', 'figure'),
-    Input('product-dropdown', 'value'),
-    Input('date-range', 'start_date'),
-    Input('date-range', 'end_date')
-)
-def update_scatter(products, start_date, end_date):
-    d = filter_df(products, start_date, end_date)
-    if d.empty:
-        fig = px.scatter(title="No data for selection")
-        fig.update_layout(template='plotly_dark')
+    def update_scatter(self, products, start_date, end_date):
+        d = self.filter_df(products, start_date, end_date)
+        if d.empty:
+            fig = px.scatter(title="No data for selection")
+            fig.update_layout(template='plotly_dark')
+            return fig
+
+        # aggregate per product to keep scatter readable
+        totals = product_totals(d)
+        agg = pd.DataFrame({'product_name': totals['product_name'],
+                            'avg_price': totals['avg_price_sum'] / totals['avg_price_count'],
+                            'avg_pred_qty': totals['predicted_quantity'] / totals['rows'],
+                            'total_revenue': totals['revenue'],
+                            'count_days': totals['count_days']})
+        fig = px.scatter(agg, x='avg_price', y='avg_pred_qty',
+                         size='total_revenue', color='product_name',
+                         hover_data=['product_name', 'total_revenue', 'count_days'],
+                         template='plotly_dark', color_discrete_sequence=PALETTE)
+        fig.update_layout(title="Avg Price vs Avg Predicted Quantity (per product)",
+                          xaxis_title="Avg Price ($)", yaxis_title="Avg Predicted Qty")
+        fig.update_xaxes(tickprefix="$")
         return fig
 
-    # aggregate per product to keep scatter readable
-    agg = d.groupby('product_name').agg(avg_price=('avg_price', 'mean'),
-                                        avg_pred_qty=('predicted_quantity', 'mean'),
-                                        total_revenue=('revenue', 'sum'),
-                                        count_days=('event_date', 'nunique')).reset_index()
-    fig = px.scatter(agg, x='avg_price', y='avg_pred_qty',
-                     size='total_revenue', color='product_name',
-                     hover_data=['product_name', 'total_revenue', 'count_days'],
-                     template='plotly_dark', color_discrete_sequence=PALETTE)
-    fig.update_layout(title="Avg Price vs Avg Predicted Quantity (per product)",
-                      xaxis_title="Avg Price ($)", yaxis_title="Avg Predicted Qty")
-    fig.update_xaxes(tickprefix="$")
-    return fig
 
 # -------------------------
-# Run server
+# Layout
+# -------------------------
+def build_layout(dashboard):
+    return html.Div([
+        html.Div([
+            html.H1("📊 Dynamic Pricing Dashboard",
+                    style={'textAlign': 'center', 'color': '#FFD369', 'marginBottom': '6px'}),
+            html.Div("Interactive visual analysis — filter by product & date range", style={'textAlign': 'center', 'color': '#cfd7c7', 'marginBottom': '20px'})
+        ]),
+
+        # Controls row
+        html.Div([
+            html.Div([
+                html.Label("Select products", style={'color': '#cfd7c7'}),
+                dcc.Dropdown(
+                    id='product-dropdown',
+                    options=[{'label': p, 'value': p} for p in dashboard.store.products],
+                    value=dashboard.default_products,
+                    multi=True,
+                    placeholder="Choose products...",
+                    style={'minWidth': '280px'}
+                )
+            ], style={'flex': '1', 'minWidth': '280px', 'marginRight': '12px'}),
+
+            html.Div([
+                html.Label("Date range", style={'color': '#cfd7c7'}),
+                dcc.DatePickerRange(
+                    id='date-range',
+                    min_date_allowed=dashboard.store.min_date,
+                    max_date_allowed=dashboard.store.max_date,
+                    start_date=(dashboard.store.max_date - pd.Timedelta(days=60)).date(),
+                    end_date=dashboard.store.max_date.date(),
+                    display_format='YYYY-MM-DD',
+                    minimum_nights=0,
+                    style={'color': '#000'}
+                )
+            ], style={'marginRight': '12px'}),
+
+            html.Div([
+                html.Label("Top N (pie/bar)", style={'color': '#cfd7c7'}),
+                dcc.Slider(id='top-n', min=3, max=15, step=1, value=6,
+                           marks={3: '3', 6: '6', 10: '10', 15: '15'})
+            ], style={'flex': '1', 'minWidth': '220px', 'paddingTop': '6px'})
+        ], style={'display': 'flex', 'gap': '12px', 'marginBottom': '18px', 'alignItems': 'center'}),
+
+        # KPI cards
+        html.Div([
+            html.Div([
+                html.Div("Total Revenue", style={'color': '#cfd7c7'}),
+                html.H2(id='kpi-revenue', style={'color': '#ffffff', 'marginTop': '6px'})
+            ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center', 'marginRight': '12px'}),
+
+            html.Div([
+                html.Div("Total Predicted Qty", style={'color': '#cfd7c7'}),
+                html.H2(id='kpi-qty', style={'color': '#ffffff', 'marginTop': '6px'})
+            ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center', 'marginRight': '12px'}),
+
+            html.Div([
+                html.Div("Avg Recommended Price", style={'color': '#cfd7c7'}),
+                html.H2(id='kpi-price', style={'color': '#ffffff', 'marginTop': '6px'})
+            ], style={'backgroundColor': '#2b3a2f', 'padding': '12px', 'borderRadius': '8px', 'flex': '1', 'textAlign': 'center'})
+        ], style={'display': 'flex', 'marginBottom': '20px'}),
+
+        # Tabs for charts
+        dcc.Tabs([
+            dcc.Tab(label='Line (Revenue)', children=[
+                dcc.Graph(id='line-chart', config={'displayModeBar': True})
+            ]),
+            dcc.Tab(label='Dot (Predicted Qty)', children=[
+                dcc.Graph(id='dot-chart')
+            ]),
+            dcc.Tab(label='Bar (Top Products)', children=[
+                dcc.Graph(id='bar-chart')
+            ]),
+            dcc.Tab(label='Pie / Donut', children=[
+                dcc.Graph(id='pie-chart')
+            ]),
+            dcc.Tab(label='Scatter (Price vs Qty)', children=[
+                dcc.Graph(id='scatter-chart')
+            ])
+        ], style={'fontSize': '15px'}, colors={'border': '#222831', 'primary': '#FFD369', 'background': '#393E46'}),
+
+        html.Div(style={'height': '30px'})  # spacer
+    ], style={'backgroundColor': '#222831', 'padding': '18px', 'fontFamily': 'Arial, sans-serif'})
+
+
+# -------------------------
+# App
 # -------------------------
+def create_app(dashboard=None):
+    """Dash app over `dashboard` (the artifacts on disk when None)."""
+    dashboard = dashboard or Dashboard.load()
+    app = dash.Dash(__name__)
+    app.title = "Dynamic Pricing Dashboard"
+    app.layout = build_layout(dashboard)
+    app.callback(
+        Output('kpi-revenue', 'children'),
+        Output('kpi-qty', 'children'),
+        Output('kpi-price', 'children'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date')
+    )(dashboard.update_kpis)
+    app.callback(
+        Output('line-chart', 'figure'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date')
+    )(dashboard.update_line_chart)
+    app.callback(
+        Output('dot-chart', 'figure'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date')
+    )(dashboard.update_dot_chart)
+    app.callback(
+        Output('bar-chart', 'figure'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date'),
+        Input('top-n', 'value')
+    )(dashboard.update_bar_chart)
+    app.callback(
+        Output('pie-chart', 'figure'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date'),
+        Input('top-n', 'value')
+    )(dashboard.update_pie_chart)
+    app.callback(
+        Output('scatter-chart', 'figure'),
+        Input('product-dropdown', 'value'),
+        Input('date-range', 'start_date'),
+        Input('date-range', 'end_date')
+    )(dashboard.update_scatter)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Dash dashboard")
+    parser.add_argument("--debug", action="store_true", help="Dash debug mode (reloader, error overlay)")
+    args = parser.parse_args(argv)
+    create_app().run(debug=args.debug)
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    main()
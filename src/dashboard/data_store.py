@@ -0,0 +1,90 @@
+# src/dashboard/data_store.py
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+SELECTION_CACHE_SIZE = 32
+
+
+class IndexedFrame:
+    """Read-only frame indexed by (product, date) for dashboard selections.
+
+    Rows are sorted once by product and date and products are stored as
+    categorical codes, so a (products, start, end) selection is a set of
+    binary searches over one int64 position array instead of boolean masks
+    over every row. A single contiguous range comes back as a slice; several
+    products are gathered with one `take`. Results are memoized in a small
+    LRU keyed on the selection, so every callback reacting to the same
+    control change shares one filtered view. Callers must not mutate it.
+    """
+
+    def __init__(self, df, key='product_name', date_col='event_date', cache_size=SELECTION_CACHE_SIZE):
+        df = df.sort_values([key, date_col], kind='stable').reset_index(drop=True)
+        df[key] = df[key].astype('category')
+        self.df = df
+        self.key = key
+        self.date_col = date_col
+        self.products = df[key].cat.categories
+
+        codes = df[key].cat.codes.to_numpy().astype(np.int64)
+        seconds = df[date_col].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        self._origin = seconds.min() if len(seconds) else 0
+        self._stride = (seconds.max() - self._origin + 2) if len(seconds) else 1
+        # Monotonic (product, date) position of every row
+        self._position = codes * self._stride + (seconds - self._origin)
+        self._select = lru_cache(maxsize=cache_size)(self._select_uncached)
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def min_date(self):
+        return self.df[self.date_col].min()
+
+    @property
+    def max_date(self):
+        return self.df[self.date_col].max()
+
+    def _offset(self, date, default):
+        if not date:
+            return default
+        seconds = pd.Timestamp(date).to_datetime64().astype('datetime64[s]').astype(np.int64)
+        return int(np.clip(seconds - self._origin, -1, self._stride - 1))
+
+    def select(self, products=None, start_date=None, end_date=None):
+        """Rows for `products` (all when empty) with start_date <= date <= end_date."""
+        products = tuple(sorted(set(products))) if products else ()
+        start = self._offset(start_date, 0)
+        end = self._offset(end_date, self._stride - 1)
+        return self._select(products, start, end)
+
+    def _select_uncached(self, products, start, end):
+        if products:
+            codes = self.products.get_indexer(list(products))
+            codes = codes[codes >= 0]
+        else:
+            codes = np.arange(len(self.products))
+        if len(codes) == 0 or start > end:
+            return self.df.iloc[0:0]
+
+        base = codes.astype(np.int64) * self._stride
+        lo = np.searchsorted(self._position, base + start, side='left')
+        hi = np.searchsorted(self._position, base + end, side='right')
+        keep = hi > lo
+        lo, hi = lo[keep], hi[keep]
+        if len(lo) == 0:
+            return self.df.iloc[0:0]
+        if len(lo) == 1 or (lo[1:] == hi[:-1]).all():
+            return self.df.iloc[lo[0]:hi[-1]]
+
+        # Concatenate the per-product ranges without a Python loop
+        lengths = hi - lo
+        steps = np.ones(lengths.sum(), dtype=np.int64)
+        boundaries = np.cumsum(lengths)[:-1]
+        steps[0] = lo[0]
+        steps[boundaries] = lo[1:] - hi[:-1] + 1
+        return self.df.take(np.cumsum(steps))
+
+    def clear_cache(self):
+        self._select.cache_clear()
@@ -0,0 +1,100 @@
+# src/dashboard/rollups.py
+import numpy as np
+import pandas as pd
+
+from .data_store import IndexedFrame
+
+# Period each grain aggregates to (pandas period alias)
+GRAINS = {'day': 'D', 'week': 'W', 'month': 'M'}
+GRAIN_LABELS = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}
+
+# Longest date span (in days) drawn at each grain before moving to a coarser one
+MAX_DAYS_PER_GRAIN = {'day': 120, 'week': 730}
+
+# Total points the line chart may send to the browser across all traces
+MAX_LINE_POINTS = 2000
+MIN_POINTS_PER_TRACE = 10
+
+
+def build_rollups(df, key='product_name', date_col='event_date'):
+    """Pre-aggregate SKU-day rows into per-product cubes at day / week / month grain.
+
+    Each cube keeps additive measures only (sums and counts), so totals and
+    means over any selection of its rows stay exact. Returns grain -> IndexedFrame.
+    """
+    base = pd.DataFrame({
+        key: df[key].to_numpy(),
+        'revenue': df['revenue'].to_numpy(dtype=float),
+        'predicted_quantity': df['predicted_quantity'].to_numpy(dtype=float),
+        'rec_price_sum': df['recommended_price'].fillna(0).to_numpy(dtype=float),
+        'rec_price_count': df['recommended_price'].notna().to_numpy(dtype=np.int64),
+        'avg_price_sum': df['avg_price'].fillna(0).to_numpy(dtype=float),
+        'avg_price_count': df['avg_price'].notna().to_numpy(dtype=np.int64),
+        'rows': np.ones(len(df), dtype=np.int64),
+    })
+    rollups = {}
+    for grain, freq in GRAINS.items():
+        periods = df[date_col].dt.to_period(freq).dt.start_time
+        cube = base.assign(**{date_col: periods.to_numpy()}) \
+                   .groupby([key, date_col], sort=False).sum().reset_index()
+        rollups[grain] = IndexedFrame(cube, key=key, date_col=date_col)
+    return rollups
+
+
+def pick_grain(start_date, end_date):
+    """Finest grain whose point count stays reasonable for the selected span."""
+    span = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days
+    for grain, max_days in MAX_DAYS_PER_GRAIN.items():
+        if span <= max_days:
+            return grain
+    return 'month'
+
+
+def period_start(date, grain):
+    """Start of the `grain` period containing `date`, so edge periods are kept whole."""
+    if not date:
+        return date
+    return pd.Timestamp(date).to_period(GRAINS[grain]).start_time
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling; returns indices of the kept points.
+
+    `x` must be increasing. Keeps the first and last points and, for every
+    bucket in between, the point forming the largest triangle with the point
+    kept before it and the mean of the next bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        next_hi = max(next_hi, next_lo + 1)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_series(d, group_col, x_col, y_col, max_points=MAX_LINE_POINTS):
+    """Apply LTTB per group so the combined series stays under `max_points`."""
+    groups = d.groupby(group_col, observed=True, sort=False).indices
+    if not groups:
+        return d
+    per_trace = max(MIN_POINTS_PER_TRACE, max_points // len(groups))
+    if all(len(rows) <= per_trace for rows in groups.values()):
+        return d
+    x = d[x_col].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    y = d[y_col].to_numpy(dtype=float)
+    keep = [rows[lttb(x[rows], y[rows], per_trace)] for rows in groups.values()]
+    return d.take(np.concatenate(keep))
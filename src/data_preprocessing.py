@@ -1,43 +1,201 @@
+import argparse
+
+import numpy as np
 import pandas as pd
-import os
+
+from .storage import ArtifactWriter, save_artifact
+
+INPUT_PATH = "data/online_retail.csv"
+
+# Compact dtypes for the streaming path: repeated strings as categoricals, narrow
+# integers (nullable, so missing ids survive until the dropna). Prices stay
+# float64 so the daily averages match the in-memory path bit for bit.
+RAW_DTYPES = {
+    'customer_id': 'Int32',
+    'product_id': 'Int32',
+    'category_id': 'Int16',
+    'category_name': 'category',
+    'product_name': 'category',
+    'quantity': 'Int32',
+    'price': 'float64',
+    'payment_method': 'category',
+    'city': 'category',
+    'review_score': 'float32',
+    'gender': 'category',
+    'age': 'float32',
+}
+DAILY_KEYS = ['order_date', 'product_id', 'product_name']
+
+def aggregate_daily_sales(df):
+    """Cleaned order lines -> one row per (day, product)."""
+    daily_sales = df.groupby(DAILY_KEYS, observed=True) \
+                    .agg(daily_quantity=('quantity', 'sum'),
+                         daily_revenue=('total_price', 'sum'),
+                         avg_price=('price', 'mean')) \
+                    .reset_index()
+
+    # Rename order_date to event_date for consistency with dashboard
+    return daily_sales.rename(columns={'order_date': 'event_date', 'product_id': 'stock_code'})
+
+def clean(df):
+    df = df.dropna(subset=['customer_id', 'product_id', 'quantity', 'price'])
+    df = df[(df['quantity'] > 0) & (df['price'] > 0)].copy()
+    if isinstance(df['quantity'].dtype, pd.Int32Dtype):
+        # No missing values left: back to a plain numpy int so totals stay float64
+        df['quantity'] = df['quantity'].to_numpy(dtype=np.int32)
+
+    df['day_of_week'] = df['order_date'].dt.dayofweek
+    df['month'] = df['order_date'].dt.month
+    df['quarter'] = df['order_date'].dt.quarter
+    df['total_price'] = df['quantity'] * df['price']
+    return df
 
 def preprocess_data():
-    input_path = "data/online_retail.csv"
-    output_cleaned = "data/processed/cleaned_retail.csv"
-    output_daily = "data/processed/daily_product_sales.csv"
+    input_path = INPUT_PATH
 
     print("Loading dataset...")
     df = pd.read_csv(input_path, parse_dates=['order_date'])
 
     print("Cleaning dataset...")
     df.drop_duplicates(inplace=True)
-    df.dropna(subset=['customer_id', 'product_id', 'quantity', 'price'], inplace=True)
-    df = df[(df['quantity'] > 0) & (df['price'] > 0)]
-
     print("Adding time features...")
-    df['day_of_week'] = df['order_date'].dt.dayofweek
-    df['month'] = df['order_date'].dt.month
-    df['quarter'] = df['order_date'].dt.quarter
-    df['total_price'] = df['quantity'] * df['price']
+    df = clean(df)
 
     # Save cleaned retail
-    os.makedirs(os.path.dirname(output_cleaned), exist_ok=True)
-    df.to_csv(output_cleaned, index=False)
+    output_cleaned = save_artifact(df, 'cleaned_retail')
     print(f"✅ Cleaned dataset saved to {output_cleaned}")
 
     print("Aggregating daily sales...")
-    daily_sales = df.groupby(['order_date', 'product_id', 'product_name']) \
-                    .agg(daily_quantity=('quantity', 'sum'),
-                         daily_revenue=('total_price', 'sum'),
-                         avg_price=('price', 'mean')) \
-                    .reset_index()
+    daily_sales = aggregate_daily_sales(df)
+
+    output_daily = save_artifact(daily_sales, 'daily_product_sales')
+    print(f"✅ Daily product sales saved to {output_daily}")
+
+
+class RowDeduplicator:
+    """Drops rows already seen in earlier chunks, like one drop_duplicates over the whole file.
+
+    Keeps a sorted array of 64-bit row hashes instead of the rows
+    themselves. That array is the one part of the streaming path that grows
+    with the input (8 bytes per distinct row, 80 MB per 10M rows). Each chunk's
+    new hashes are merged into it in one linear pass, so the full array is
+    never sorted again.
+    """
+
+    def __init__(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def __call__(self, df):
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        pos = np.searchsorted(self.seen, hashes)
+        known = self.seen[np.minimum(pos, len(self.seen) - 1)] == hashes if len(self.seen) else np.zeros(len(df), bool)
+        keep = first & ~known
+        new = np.sort(hashes[keep])
+        self.seen = np.insert(self.seen, np.searchsorted(self.seen, new), new)
+        return df[keep]
 
-    # Rename order_date to event_date for consistency with dashboard
-    daily_sales.rename(columns={'order_date': 'event_date', 'product_id': 'stock_code'}, inplace=True)
 
-    os.makedirs(os.path.dirname(output_daily), exist_ok=True)
-    daily_sales.to_csv(output_daily, index=False)
+class DailyTotals:
+    """Running per-(day, product) totals, merged chunk by chunk.
+
+    pandas sums (and averages) float groups with Kahan compensation in row
+    order. Carrying each group's running sum and compensation from chunk to
+    chunk and applying the same update continues that exact sequence, so the
+    result equals one groupby over the whole file bit for bit.
+    """
+
+    def __init__(self):
+        self.index = pd.MultiIndex.from_arrays([[], [], []], names=DAILY_KEYS)
+        self.quantity = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        # Columns: total_price (-> daily_revenue), price (-> avg_price)
+        self.sums = np.zeros((0, 2))
+        self.compensation = np.zeros((0, 2))
+
+    def _group_index(self, df):
+        keys = pd.MultiIndex.from_arrays([
+            df['order_date'].to_numpy(),
+            df['product_id'].to_numpy(dtype=np.int64),
+            df['product_name'].astype(str).to_numpy(),
+        ], names=DAILY_KEYS)
+        idx = self.index.get_indexer(keys)
+        if (idx < 0).any():
+            new_keys = keys[idx < 0].unique()
+            n = len(new_keys)
+            self.index = self.index.append(new_keys)
+            self.quantity = np.concatenate([self.quantity, np.zeros(n, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(n, dtype=np.int64)])
+            self.sums = np.vstack([self.sums, np.zeros((n, 2))])
+            self.compensation = np.vstack([self.compensation, np.zeros((n, 2))])
+            idx = self.index.get_indexer(keys)
+        return idx
+
+    def add(self, df):
+        idx = self._group_index(df)
+        np.add.at(self.quantity, idx, df['quantity'].to_numpy(dtype=np.int64))
+        np.add.at(self.count, idx, 1)
+
+        # Kahan updates in row order: step k applies every group's k-th row of this chunk at once
+        values = np.column_stack([df['total_price'].to_numpy(dtype=float), df['price'].to_numpy(dtype=float)])
+        occurrence = pd.Series(idx).groupby(idx).cumcount().to_numpy()
+        order = np.argsort(occurrence, kind='stable')
+        bounds = np.cumsum(np.bincount(occurrence))
+        for lo, hi in zip(np.concatenate([[0], bounds[:-1]]), bounds):
+            rows = order[lo:hi]
+            groups = idx[rows]
+            y = values[rows] - self.compensation[groups]
+            t = self.sums[groups] + y
+            compensation = t - self.sums[groups] - y
+            # An infinite value makes the compensation NaN; pandas resets it to 0
+            compensation[np.isnan(compensation)] = 0.0
+            self.compensation[groups] = compensation
+            self.sums[groups] = t
+
+    def to_frame(self):
+        daily_sales = pd.DataFrame({
+            'daily_quantity': self.quantity,
+            'daily_revenue': self.sums[:, 0],
+            'avg_price': self.sums[:, 1] / self.count,
+        }, index=self.index).sort_index().reset_index()
+        return daily_sales.rename(columns={'order_date': 'event_date', 'product_id': 'stock_code'})
+
+
+def preprocess_data_streaming(chunk_rows=500_000, input_path=INPUT_PATH):
+    """Chunked preprocessing with memory bounded by the chunk, the daily output and the row hashes.
+
+    Each chunk is parsed with compact dtypes, de-duplicated against all
+    earlier rows (by hash, see RowDeduplicator), cleaned and appended to cleaned_retail; the daily
+    aggregates are kept as running per-(day, product) totals. The resulting
+    daily_product_sales matches `preprocess_data` exactly.
+    """
+    dedupe = RowDeduplicator()
+    totals = DailyTotals()
+    rows_in = rows_out = 0
+    reader = pd.read_csv(input_path, parse_dates=['order_date'], dtype=RAW_DTYPES, chunksize=chunk_rows)
+    with ArtifactWriter('cleaned_retail') as cleaned_writer:
+        for chunk in reader:
+            rows_in += len(chunk)
+            chunk = clean(dedupe(chunk))
+            rows_out += len(chunk)
+            if chunk.empty:
+                continue
+            cleaned_writer.write(chunk)
+            totals.add(chunk)
+            print(f"Processed {rows_in} rows ({rows_out} kept)...")
+    print(f"✅ Cleaned dataset saved ({rows_out} of {rows_in} rows kept)")
+
+    output_daily = save_artifact(totals.to_frame(), 'daily_product_sales')
     print(f"✅ Daily product sales saved to {output_daily}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw export and build daily product sales")
+    parser.add_argument("--chunk-rows", type=int, help="stream the export in chunks of this many rows")
+    args = parser.parse_args(argv)
+    if args.chunk_rows:
+        preprocess_data_streaming(args.chunk_rows)
+    else:
+        preprocess_data()
+
 if __name__ == "__main__":
-    preprocess_data()
+    main()
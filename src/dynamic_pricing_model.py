@@ -1,35 +1,51 @@
-import pandas as pd
+import argparse
+import os
 
-train_df = pd.read_csv(r"data/train_data.csv")
-test_df = pd.read_csv(r"data/test_data.csv")
+from .features import FEATURES
+from .storage import load_artifact
 
-features = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1', 'day_of_week', 'month', 'quarter', 'avg_price']
-target = 'target'
+MODEL_PATH = "models/dynamic_pricing_model.pkl"
+TARGET = 'target'
 
-X_train = train_df[features]
-y_train = train_df[target]
 
-X_test = test_df[features]
-y_test = test_df[target]
+def train_random_forest(model_path=MODEL_PATH):
+    """Fit the 100-tree RandomForest on train_data, report test metrics and save it."""
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error, r2_score
 
-print("Train Features head:\n", X_train.head())
-print("Train Target head:\n", y_train.head())
+    train_df = load_artifact('train_data', columns=FEATURES + [TARGET])
+    test_df = load_artifact('test_data', columns=FEATURES + [TARGET])
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-import joblib
-import os
+    X_train = train_df[FEATURES]
+    y_train = train_df[TARGET]
+
+    X_test = test_df[FEATURES]
+    y_test = test_df[TARGET]
+
+    print("Train Features head:\n", X_train.head())
+    print("Train Target head:\n", y_train.head())
+
+    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    print(f"Mean Squared Error: {mse:.2f}")
+    print(f"R2 Score: {r2:.2f}")
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    joblib.dump(model, model_path)
+    return model
 
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
 
-y_pred = model.predict(X_test)
+def main(argv=None):
+    argparse.ArgumentParser(description="Train the RandomForest baseline on train_data").parse_args(argv)
+    train_random_forest()
+    print("Model saved successfully!")
 
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-print(f"Mean Squared Error: {mse:.2f}")
-print(f"R2 Score: {r2:.2f}")
 
-os.makedirs('models', exist_ok=True)
-joblib.dump(model, r"models/dynamic_pricing_model.pkl")
-print("Model saved successfully!")
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,109 @@
 # dynamic_pricing_dashboard.py
-import pandas as pd
-import joblib
+import argparse
 import os
 
+import joblib
+import pandas as pd
+
+from .data_sources import read_daily_sales
+from .features import FEATURES, add_rolling_features, add_time_features
+from .models.model_bundle import BUNDLE_PATH, ModelBundle, bundle_exists, bundle_trained_at
+from .pricing_engine import candidate_multipliers, recommend_prices
+from .storage import save_artifact
+
 # Paths
-CSV_PATH = "data/processed/daily_product_sales.csv"
 MODEL_PATH = "models/xgb_demand_model.joblib"
-RECOMMENDATION_PATH = "data/recommendations/daily_price_recommendation.csv"
-TOP_PRODUCTS_PATH = "data/recommendations/top_products.csv"
-
-# Load dataset
-df = pd.read_csv(CSV_PATH, parse_dates=['event_date'])
-print("✅ Dataset loaded. Columns:", df.columns.tolist())
-
-# Load trained model
-model = joblib.load(MODEL_PATH)
-
-# --- Feature Engineering ---
-df['day_of_week'] = df['event_date'].dt.dayofweek
-df['month'] = df['event_date'].dt.month
-df['quarter'] = df['event_date'].dt.quarter
-
-df = df.sort_values(['stock_code', 'event_date'])
-df['qty_7d_ma'] = df.groupby('stock_code')['daily_quantity'].transform(lambda x: x.rolling(7, min_periods=1).mean())
-df['qty_30d_ma'] = df.groupby('stock_code')['daily_quantity'].transform(lambda x: x.rolling(30, min_periods=1).mean())
-df['qty_lag_1'] = df.groupby('stock_code')['daily_quantity'].shift(1).fillna(0)
-df['price_lag_1'] = df.groupby('stock_code')['avg_price'].shift(1).fillna(df['avg_price'].mean())
-
-features = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1', 'day_of_week', 'month', 'quarter', 'avg_price']
-X = df[features]
-
-# --- Predict Quantity ---
-df['predicted_quantity'] = model.predict(X)
-
-# --- Price Recommendation Logic ---
-price_adjustments = [0.9, 1.0, 1.1]  # -10%, 0%, +10%
-best_prices = []
-for _, row in df.iterrows():
-    best_rev = 0
-    best_price = row['avg_price']
-    for adj in price_adjustments:
-        temp_price = row['avg_price'] * adj
-        temp_revenue = temp_price * row['predicted_quantity']
-        if temp_revenue > best_rev:
-            best_rev = temp_revenue
-            best_price = temp_price
-    best_prices.append(best_price)
-df['recommended_price'] = best_prices
-
-# Save recommendations
-os.makedirs(os.path.dirname(RECOMMENDATION_PATH), exist_ok=True)
-df.to_csv(RECOMMENDATION_PATH, index=False)
-print("✅ Dynamic pricing recommendations saved successfully!")
-
-# --- Top Products Analysis ---
-df['revenue'] = df['recommended_price'] * df['predicted_quantity']
-top_products = df.groupby('product_name')['revenue'].sum().sort_values(ascending=False).head(10).reset_index()
-top_products.rename(columns={'revenue': 'total_revenue'}, inplace=True)
-
-os.makedirs(os.path.dirname(TOP_PRODUCTS_PATH), exist_ok=True)
-top_products.to_csv(TOP_PRODUCTS_PATH, index=False)
-print("✅ Top products by revenue saved successfully!")
-print(top_products)
-
-# --- Data ready for Dashboard Charts ---
-# Line chart (daily revenue per product)
-line_chart_data = df.groupby(['event_date', 'product_name'])['revenue'].sum().reset_index()
-line_chart_data.to_csv("data/recommendations/line_chart_data.csv", index=False)
-
-# Dot chart (predicted quantity)
-dot_chart_data = df[['event_date', 'product_name', 'predicted_quantity']]
-dot_chart_data.to_csv("data/recommendations/dot_chart_data.csv", index=False)
-
-# Pie/Donut chart (total revenue share)
-pie_chart_data = top_products.copy()
-pie_chart_data.to_csv("data/recommendations/pie_chart_data.csv", index=False)
-
-# Bar chart (top products)
-bar_chart_data = top_products.copy()
-bar_chart_data.to_csv("data/recommendations/bar_chart_data.csv", index=False)
-
-# Scatter chart (price vs predicted quantity)
-scatter_chart_data = df[['avg_price', 'predicted_quantity', 'product_name']]
-scatter_chart_data.to_csv("data/recommendations/scatter_chart_data.csv", index=False)
-
-print("✅ All chart data prepared for dashboard!")
+
+# Candidate price grid: PRICE_STEPS evenly spaced changes between the bounds
+MIN_PRICE_CHANGE = -0.20
+MAX_PRICE_CHANGE = 0.20
+PRICE_STEPS = 21
+
+TOP_PRODUCTS = 10
+
+# Which demand model scores the recommendations: the per-segment bundle, the
+# global model, or ("auto") whichever of the two was trained last
+MODEL_SOURCES = ('auto', 'segments', 'global')
+
+
+def use_segment_models(models='auto', model_path=MODEL_PATH, bundle_path=BUNDLE_PATH):
+    """Whether `models` (one of MODEL_SOURCES) resolves to the segment bundle."""
+    if models not in MODEL_SOURCES:
+        raise ValueError(f"models must be one of {MODEL_SOURCES}, not {models!r}")
+    if models == 'global' or (models == 'auto' and not bundle_exists(bundle_path)):
+        return False
+    if models == 'segments':
+        if not bundle_exists(bundle_path):
+            raise FileNotFoundError(f"No segment model bundle at {bundle_path}; train with --segment-by")
+        return True
+    # A bundle left over from an earlier run must not override a newer global model
+    return not os.path.exists(model_path) or bundle_trained_at(bundle_path) > os.path.getmtime(model_path)
+
+
+def score_recommendations(df, model_path=MODEL_PATH, models='auto'):
+    """Add predicted_quantity and recommended_price to daily sales rows.
+
+    Scores with the per-segment bundle or the global model as chosen by
+    `models` (see MODEL_SOURCES). Every row is re-scored at every candidate
+    price in one batched predict, so demand reacts to the price being tried.
+    """
+    df = add_rolling_features(add_time_features(df))
+    X = df[FEATURES]
+    multipliers = candidate_multipliers(MIN_PRICE_CHANGE, MAX_PRICE_CHANGE, PRICE_STEPS)
+    if use_segment_models(models, model_path):
+        bundle = ModelBundle()
+        # Each segment is scored by its own model, loaded only if the segment occurs
+        recommendations = pd.concat([recommend_prices(segment_model, X.iloc[rows], multipliers)
+                                     for segment_model, rows in bundle.groups(df)])
+        print(f"✅ Scored with segment models: {bundle.loaded_segments}")
+    else:
+        recommendations = recommend_prices(joblib.load(model_path), X, multipliers)
+        print(f"✅ Scored with the global model {model_path}")
+    df['predicted_quantity'] = recommendations['predicted_quantity']
+    df['recommended_price'] = recommendations['recommended_price']
+    return df
+
+
+def save_dashboard_data(df):
+    """Top products and the per-chart datasets read by the dashboard."""
+    df['revenue'] = df['recommended_price'] * df['predicted_quantity']
+    top_products = df.groupby('product_name', observed=True)['revenue'].sum().sort_values(ascending=False).head(TOP_PRODUCTS).reset_index()
+    top_products.rename(columns={'revenue': 'total_revenue'}, inplace=True)
+
+    save_artifact(top_products, 'top_products')
+    print("✅ Top products by revenue saved successfully!")
+    print(top_products)
+
+    # Line chart (daily revenue per product)
+    line_chart_data = df.groupby(['event_date', 'product_name'], observed=True)['revenue'].sum().reset_index()
+    save_artifact(line_chart_data, 'line_chart_data')
+
+    # Dot chart (predicted quantity)
+    save_artifact(df[['event_date', 'product_name', 'predicted_quantity']], 'dot_chart_data')
+
+    # Pie/Donut chart (total revenue share) and bar chart (top products)
+    save_artifact(top_products.copy(), 'pie_chart_data')
+    save_artifact(top_products.copy(), 'bar_chart_data')
+
+    # Scatter chart (price vs predicted quantity)
+    save_artifact(df[['avg_price', 'predicted_quantity', 'product_name']], 'scatter_chart_data')
+    print("✅ All chart data prepared for dashboard!")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend prices for every daily sales row and build the dashboard data")
+    parser.add_argument("--models", choices=MODEL_SOURCES, default='auto',
+                        help="segment bundle, global model, or whichever was trained last (default)")
+    args = parser.parse_args(argv)
+    df = read_daily_sales()
+    print("✅ Dataset loaded. Columns:", df.columns.tolist())
+
+    df = score_recommendations(df, models=args.models)
+    save_artifact(df, 'daily_price_recommendation')
+    print("✅ Dynamic pricing recommendations saved successfully!")
+
+    save_dashboard_data(df)
+
+
+if __name__ == "__main__":
+    main()
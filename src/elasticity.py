@@ -0,0 +1,90 @@
+# src/elasticity.py
+import numpy as np
+import pandas as pd
+
+# Per-group sufficient statistics of the log-log regression log(qty) ~ log(price)
+STAT_COLUMNS = ['n', 'sum_x', 'sum_y', 'sum_xy', 'sum_xx']
+
+# Groups whose log prices barely vary have no identifiable slope
+MIN_PRICE_VARIANCE = 1e-12
+
+
+def sufficient_stats(df, key='product_name', price_col='recommended_price',
+                     qty_col='predicted_quantity', date_col='event_date'):
+    """(n, Σx, Σy, Σxy, Σx²) per `key` over rows with positive price and quantity.
+
+    x = log(price), y = log(quantity). Also keeps the latest `date_col` per
+    key so the caller knows which rows have already been folded in.
+    """
+    valid = (df[price_col] > 0) & (df[qty_col] > 0)
+    x = np.log(df.loc[valid, price_col].to_numpy(dtype=float))
+    y = np.log(df.loc[valid, qty_col].to_numpy(dtype=float))
+    terms = pd.DataFrame({
+        key: df.loc[valid, key].to_numpy(),
+        'n': np.ones(len(x)),
+        'sum_x': x,
+        'sum_y': y,
+        'sum_xy': x * y,
+        'sum_xx': x * x,
+    })
+    if date_col in df.columns:
+        terms[date_col] = df.loc[valid, date_col].to_numpy()
+    aggregations = {col: 'sum' for col in STAT_COLUMNS}
+    if date_col in terms.columns:
+        aggregations[date_col] = 'max'
+    return terms.groupby(key, observed=True, sort=True).agg(aggregations)
+
+
+def merge_stats(stats, new_stats):
+    """Combine two statistics tables; sums add up, the latest date wins."""
+    if stats is None or stats.empty:
+        return new_stats
+    if new_stats.empty:
+        return stats
+    merged = stats[STAT_COLUMNS].add(new_stats[STAT_COLUMNS], fill_value=0)
+    for col in stats.columns.difference(STAT_COLUMNS):
+        merged[col] = pd.concat([stats[col], new_stats[col]], axis=1).max(axis=1)
+    return merged
+
+
+def _centered(stats):
+    n = stats['n']
+    sxx = stats['sum_xx'] - stats['sum_x'] ** 2 / n
+    sxy = stats['sum_xy'] - stats['sum_x'] * stats['sum_y'] / n
+    return sxx, sxy
+
+
+def elasticities(stats):
+    """Closed-form OLS slope (elasticity) and intercept per group."""
+    n = stats['n']
+    sxx, sxy = _centered(stats)
+    identified = (n >= 2) & (sxx > MIN_PRICE_VARIANCE * n)
+    slope = (sxy / sxx).where(identified)
+    intercept = (stats['sum_y'] - slope * stats['sum_x']) / n
+    return pd.DataFrame({
+        'price_elasticity': slope,
+        'intercept': intercept,
+        'n_obs': n.astype(np.int64),
+    }, index=stats.index)
+
+
+def group_elasticities(stats, groups):
+    """Pooled within-group elasticity, e.g. per category from product statistics.
+
+    `groups` maps each index entry of `stats` to its group. Every product
+    keeps its own intercept (prices and quantities are centered per product
+    before pooling), so differences in price level between products don't
+    leak into the group slope.
+    """
+    sxx, sxy = _centered(stats)
+    identified = (stats['n'] >= 2) & (sxx > MIN_PRICE_VARIANCE * stats['n'])
+    parts = pd.DataFrame({
+        'group': pd.Series(groups).reindex(stats.index).to_numpy(),
+        'sxx': sxx.where(identified, 0.0),
+        'sxy': sxy.where(identified, 0.0),
+        'n_obs': stats['n'].astype(np.int64),
+        'n_products': identified.astype(np.int64),
+    }).dropna(subset=['group'])
+    pooled = parts.groupby('group', observed=True, sort=True).sum()
+    pooled['price_elasticity'] = (pooled['sxy'] / pooled['sxx']).where(pooled['n_products'] > 0)
+    return pooled[['price_elasticity', 'n_obs', 'n_products']]
@@ -1,45 +1,61 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
+import argparse
 
-# ===== Load cleaned daily data =====
-csv_path = r"data/processed/cleaned_retail.csv"
-df = pd.read_csv(csv_path, parse_dates=['order_date'])
+from .features import FEATURES, add_rolling_features, add_time_features
+from .storage import load_artifact, save_artifact
 
-# ===== Basic info =====
-print(df.head())
-print(df.info())
+TARGET = 'quantity'
+TEST_SIZE = 0.2
 
-# ===== Time features =====
-df['day_of_week'] = df['order_date'].dt.dayofweek  # 0 = Monday
-df['month'] = df['order_date'].dt.month
-df['quarter'] = df['order_date'].dt.quarter
 
-# ===== Sort & rolling features =====
-df = df.sort_values(['product_id', 'order_date'])
+def build_features(df):
+    """Model FEATURES for cleaned order lines, rolling windows per product."""
+    # ===== Time features =====
+    df = add_time_features(df, date_col='order_date')
 
-df['qty_7d_ma'] = df.groupby('product_id')['quantity'].transform(lambda x: x.rolling(7, min_periods=1).mean())
-df['qty_30d_ma'] = df.groupby('product_id')['quantity'].transform(lambda x: x.rolling(30, min_periods=1).mean())
+    # ===== Sort & rolling features =====
+    # Windows are calendar days per product; price_lag_1 falls back to the product's avg price
+    df = add_rolling_features(df, key='product_id', date_col='order_date',
+                              qty_col='quantity', price_col='price', default_price=float('nan'))
 
-df['qty_lag_1'] = df.groupby('product_id')['quantity'].shift(1).fillna(0)
+    # ===== Price lag and avg price =====
+    df['avg_price'] = df.groupby('product_id')['price'].transform('mean')
+    df['price_lag_1'] = df['price_lag_1'].fillna(df['avg_price'])
+    return df
 
-# ===== Price lag and avg price =====
-df['avg_price'] = df.groupby('product_id')['price'].transform('mean')
-df['price_lag_1'] = df.groupby('product_id')['price'].shift(1).fillna(df['avg_price'])
 
-# ===== Features & Target =====
-features = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1', 'day_of_week', 'month', 'quarter', 'avg_price']
-target = 'quantity'
+def build_train_test(test_size=TEST_SIZE):
+    """Chronological train/test split of the cleaned data, saved as train_data / test_data."""
+    from sklearn.model_selection import train_test_split
 
-X = df[features]
-y = df[target]
+    # ===== Load cleaned daily data =====
+    df = load_artifact('cleaned_retail')
 
-# ===== Train/Test Split =====
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+    # ===== Basic info =====
+    print(df.head())
+    print(df.info())
 
-# ===== Save CSVs =====
-X_train.assign(target=y_train).to_csv(r"data/train_data.csv", index=False)
-X_test.assign(target=y_test).to_csv(r"data/test_data.csv", index=False)
+    df = build_features(df)
 
-print("✅ Train/Test CSV saved successfully!")
-print("Train shape:", X_train.shape)
-print("Test shape:", X_test.shape)
+    # ===== Features & Target =====
+    X = df[FEATURES]
+    y = df[TARGET]
+
+    # ===== Train/Test Split =====
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, shuffle=False)
+
+    # ===== Save train / test sets =====
+    save_artifact(X_train.assign(target=y_train), 'train_data')
+    save_artifact(X_test.assign(target=y_test), 'test_data')
+    return X_train, X_test
+
+
+def main(argv=None):
+    argparse.ArgumentParser(description="Build the train/test feature sets from the cleaned data").parse_args(argv)
+    X_train, X_test = build_train_test()
+    print("✅ Train/Test data saved successfully!")
+    print("Train shape:", X_train.shape)
+    print("Test shape:", X_test.shape)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# src/features.py
+import numpy as np
+import pandas as pd
+
+FEATURES = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1', 'day_of_week', 'month', 'quarter', 'avg_price']
+ROLLING_FEATURES = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1']
+
+# Calendar windows (in days) behind the moving-average features
+WINDOWS = {'qty_7d_ma': 7, 'qty_30d_ma': 30}
+HISTORY_DAYS = max(WINDOWS.values())
+
+_NO_DAY = np.iinfo(np.int64).min
+
+
+class OutOfOrderSalesError(ValueError):
+    """Sales rows dated before a day already recorded for their key.
+
+    `keys`, `days` and `last_days` describe the offending rows: the key, the
+    row's day number and the latest day the state already holds for it.
+    """
+
+    def __init__(self, keys, days, last_days):
+        self.keys = list(keys)
+        self.days = np.asarray(days, dtype=np.int64)
+        self.last_days = np.asarray(last_days, dtype=np.int64)
+        super().__init__(f"{len(self.keys)} sales rows are older than the latest day recorded for their key")
+
+
+def to_day_numbers(dates):
+    """Dates as int64 day numbers (days since 1970-01-01)."""
+    values = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+    return values.astype('datetime64[D]').astype(np.int64)
+
+
+def add_time_features(df, date_col='event_date'):
+    dates = df[date_col].dt
+    df['day_of_week'] = dates.dayofweek  # 0 = Monday
+    df['month'] = dates.month
+    df['quarter'] = dates.quarter
+    return df
+
+
+def add_rolling_features(df, key='stock_code', date_col='event_date',
+                         qty_col='daily_quantity', price_col='avg_price', default_price=None):
+    """Add the lag / moving-average features with calendar-day windows.
+
+    Windows cover the days strictly before each row's date, and days without
+    sales count as zero, so `qty_7d_ma` is the mean daily quantity over the
+    previous 7 calendar days (clipped to the product's first sale). `price_lag_1`
+    is the last price observed on an earlier day, falling back to
+    `default_price` (the mean of `price_col` when not given).
+
+    Everything is computed with cumulative sums and binary searches over the
+    (key, date)-sorted frame, with no per-group Python calls. Returns a new
+    frame sorted by key and date.
+    """
+    df = df.sort_values([key, date_col], kind='stable').reset_index(drop=True)
+    if default_price is None:
+        default_price = df[price_col].mean()
+
+    codes = pd.factorize(df[key], sort=True)[0].astype(np.int64)
+    days = to_day_numbers(df[date_col])
+    qty = df[qty_col].fillna(0).to_numpy(dtype=float)
+    prices = df[price_col].to_numpy(dtype=float)
+    if len(df) == 0:
+        for name in ROLLING_FEATURES:
+            df[name] = pd.Series(dtype=float)
+        return df
+
+    # One monotonic composite position per row; the stride keeps windows from
+    # reaching into the previous key's days.
+    offset = days - days.min()
+    stride = offset.max() + HISTORY_DAYS + 1
+    position = codes * stride + offset
+    cumulative = np.concatenate([[0.0], np.cumsum(qty)])
+
+    day_start = np.searchsorted(position, position, side='left')
+    key_start = np.searchsorted(codes, codes, side='left')
+    days_of_history = days - days[key_start]
+
+    for name, window in WINDOWS.items():
+        window_start = np.searchsorted(position, position - window, side='left')
+        total = cumulative[day_start] - cumulative[window_start]
+        span = np.minimum(days_of_history, window)
+        df[name] = np.divide(total, span, out=np.zeros_like(total), where=span > 0)
+
+    yesterday = np.searchsorted(position, position - 1, side='left')
+    df['qty_lag_1'] = cumulative[day_start] - cumulative[yesterday]
+
+    previous_row = day_start - 1
+    has_previous = previous_row >= key_start
+    df['price_lag_1'] = np.where(has_previous, prices[np.maximum(previous_row, 0)], default_price)
+    return df
+
+
+class RollingFeatureState:
+    """Compact per-key rolling window state for incremental feature updates.
+
+    Holds a HISTORY_DAYS ring buffer of daily quantities per key plus the last
+    two observed prices, which is all the rolling features need. Appending a
+    day of sales costs O(new rows) and yields the same values as
+    `add_rolling_features` over the full history, as long as rows arrive in
+    date order. Rows older than a key's latest day are rejected; a repeat of
+    that day replaces it.
+    """
+
+    def __init__(self):
+        self.keys = pd.Index([])
+        self.quantities = np.zeros((0, HISTORY_DAYS))
+        self.slot_days = np.full((0, HISTORY_DAYS), _NO_DAY, dtype=np.int64)
+        self.first_day = np.zeros(0, dtype=np.int64)
+        self.last_day = np.zeros(0, dtype=np.int64)
+        self.last_price = np.zeros(0)
+        self.prev_price = np.zeros(0)
+        self.price_sum = 0.0
+        self.price_count = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def default_price(self):
+        """Mean of all prices seen so far, used when a key has no earlier price."""
+        return self.price_sum / self.price_count if self.price_count else 0.0
+
+    def _grow(self, new_keys):
+        n = len(new_keys)
+        self.keys = self.keys.append(pd.Index(new_keys))
+        self.quantities = np.vstack([self.quantities, np.zeros((n, HISTORY_DAYS))])
+        self.slot_days = np.vstack([self.slot_days, np.full((n, HISTORY_DAYS), _NO_DAY, dtype=np.int64)])
+        self.first_day = np.concatenate([self.first_day, np.full(n, np.iinfo(np.int64).max)])
+        self.last_day = np.concatenate([self.last_day, np.full(n, _NO_DAY)])
+        self.last_price = np.concatenate([self.last_price, np.full(n, np.nan)])
+        self.prev_price = np.concatenate([self.prev_price, np.full(n, np.nan)])
+
+    def index_of(self, keys, add=False):
+        """Row index of every key in the state (-1 for unknown keys unless `add`)."""
+        keys = pd.Index(keys)
+        idx = self.keys.get_indexer(keys)
+        if add and (idx < 0).any():
+            self._grow(keys[idx < 0].unique())
+            idx = self.keys.get_indexer(keys)
+        return idx
+
+    def lookup(self, idx, days):
+        """Rolling features for state rows `idx` as of `days` (day numbers).
+
+        Unknown keys (idx == -1) get zero quantities and the default price.
+        Returns a dict of feature name -> array.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        known = idx >= 0
+        safe = np.where(known, idx, 0)
+        if len(self.keys) == 0:
+            known = np.zeros(len(idx), dtype=bool)
+            quantities = np.zeros((len(idx), HISTORY_DAYS))
+            slot_days = np.full((len(idx), HISTORY_DAYS), _NO_DAY, dtype=np.int64)
+            first_day = last_day = np.zeros(len(idx), dtype=np.int64)
+            last_price = prev_price = np.full(len(idx), np.nan)
+        else:
+            quantities = self.quantities[safe]
+            slot_days = self.slot_days[safe]
+            first_day, last_day = self.first_day[safe], self.last_day[safe]
+            last_price, prev_price = self.last_price[safe], self.prev_price[safe]
+
+        day = days[:, None]
+        features = {}
+        days_of_history = np.where(known, days - first_day, 0)
+        for name, window in WINDOWS.items():
+            in_window = (slot_days >= day - window) & (slot_days < day)
+            total = (quantities * in_window).sum(axis=1)
+            span = np.clip(days_of_history, 0, window)
+            features[name] = np.divide(total, span, out=np.zeros_like(total), where=span > 0)
+        features['qty_lag_1'] = np.where(known, (quantities * (slot_days == day - 1)).sum(axis=1), 0.0)
+
+        price = np.where(last_day < days, last_price, prev_price)
+        features['price_lag_1'] = np.where(known & ~np.isnan(price), price, self.default_price)
+        return features
+
+    def features_at(self, keys, days):
+        """Rolling features for `keys` as of `days`, without changing the state."""
+        return self.lookup(self.index_of(keys), days)
+
+    def update(self, keys, days, quantities, prices):
+        """Record daily sales.
+
+        Raises OutOfOrderSalesError, before changing anything, if a row is
+        older than its key's latest day. Rows for the latest day itself
+        replace what was recorded for it.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        quantities = np.nan_to_num(np.asarray(quantities, dtype=float))
+        prices = np.asarray(prices, dtype=float)
+        self.check_order(keys, days)
+        self._count_prices(prices)
+        idx = self.index_of(keys, add=True)
+        for day in np.unique(days):
+            rows = days == day
+            self._write_day(idx[rows], day, quantities[rows], prices[rows])
+
+    def check_order(self, keys, days):
+        """Raise OutOfOrderSalesError for rows dated before their key's latest recorded day."""
+        keys = pd.Index(keys)
+        days = np.asarray(days, dtype=np.int64)
+        idx = self.index_of(keys)
+        last_days = np.full(len(idx), _NO_DAY)
+        last_days[idx >= 0] = self.last_day[idx[idx >= 0]]
+        older = days < last_days
+        if older.any():
+            raise OutOfOrderSalesError(keys[older], days[older], last_days[older])
+
+    def _count_prices(self, prices):
+        valid = prices[~np.isnan(prices)]
+        self.price_sum += float(valid.sum())
+        self.price_count += len(valid)
+
+    def _write_day(self, idx, day, quantities, prices):
+        # The rows replace whatever the slot held, including an earlier write of this same day;
+        # rows of one key within the batch add up
+        slot = day % HISTORY_DAYS
+        self.quantities[idx, slot] = 0.0
+        self.slot_days[idx, slot] = day
+        np.add.at(self.quantities, (idx, slot), quantities)
+
+        new_day = self.last_day[idx] < day
+        self.prev_price[idx[new_day]] = self.last_price[idx[new_day]]
+        self.last_price[idx] = prices
+        self.last_day[idx] = day
+        self.first_day[idx] = np.minimum(self.first_day[idx], day)
+
+    def append(self, df, key='stock_code', date_col='event_date',
+               qty_col='daily_quantity', price_col='avg_price'):
+        """Add rolling features to new rows of `df` and fold them into the state.
+
+        Each row's features use only days before its own date, matching
+        `add_rolling_features` over the full history.
+        """
+        df = df.sort_values([key, date_col], kind='stable').reset_index(drop=True)
+        prices = df[price_col].to_numpy(dtype=float)
+        days = to_day_numbers(df[date_col])
+        self.check_order(df[key], days)
+        self._count_prices(prices)
+
+        idx = self.index_of(df[key], add=True)
+        quantities = np.nan_to_num(df[qty_col].to_numpy(dtype=float))
+        columns = {name: np.empty(len(df)) for name in ROLLING_FEATURES}
+        for day in np.unique(days):
+            rows = np.flatnonzero(days == day)
+            for name, values in self.lookup(idx[rows], days[rows]).items():
+                columns[name][rows] = values
+            self._write_day(idx[rows], day, quantities[rows], prices[rows])
+        for name, values in columns.items():
+            df[name] = values
+        return df
+
+    @classmethod
+    def from_frame(cls, df, key='stock_code', date_col='event_date',
+                   qty_col='daily_quantity', price_col='avg_price'):
+        """Build the state from a full sales history in one vectorized pass."""
+        state = cls()
+        prices = df[price_col].to_numpy(dtype=float)
+        state._count_prices(prices)
+        if df.empty:
+            return state
+
+        daily = pd.DataFrame({
+            'key': df[key].to_numpy(),
+            'day': to_day_numbers(df[date_col]),
+            'qty': df[qty_col].fillna(0).to_numpy(dtype=float),
+            'price': prices,
+        }).groupby(['key', 'day'], sort=True).agg(qty=('qty', 'sum'), price=('price', 'last')).reset_index()
+
+        codes, uniques = pd.factorize(daily['key'], sort=True)
+        state._grow(uniques)
+        days = daily['day'].to_numpy()
+        n_keys = len(uniques)
+        first_row = np.searchsorted(codes, np.arange(n_keys), side='left')
+        last_row = np.searchsorted(codes, np.arange(n_keys), side='right') - 1
+        price = daily['price'].to_numpy()
+
+        state.first_day = days[first_row]
+        state.last_day = days[last_row]
+        state.last_price = price[last_row]
+        has_prev = last_row > first_row
+        state.prev_price = np.where(has_prev, price[np.maximum(last_row - 1, 0)], np.nan)
+
+        recent = days > state.last_day[codes] - HISTORY_DAYS
+        slots = days[recent] % HISTORY_DAYS
+        state.quantities[codes[recent], slots] = daily['qty'].to_numpy()[recent]
+        state.slot_days[codes[recent], slots] = days[recent]
+        return state
+
+    def save(self, path):
+        keys = np.asarray(self.keys)
+        if keys.dtype == object:
+            keys = keys.astype(str)
+        np.savez_compressed(path, keys=keys, quantities=self.quantities, slot_days=self.slot_days,
+                            first_day=self.first_day, last_day=self.last_day,
+                            last_price=self.last_price, prev_price=self.prev_price,
+                            price_totals=np.array([self.price_sum, self.price_count]))
+
+    @classmethod
+    def load(cls, path):
+        state = cls()
+        with np.load(path) as data:
+            state.keys = pd.Index(data['keys'])
+            state.quantities = data['quantities']
+            state.slot_days = data['slot_days']
+            state.first_day = data['first_day']
+            state.last_day = data['last_day']
+            state.last_price = data['last_price']
+            state.prev_price = data['prev_price']
+            state.price_sum, count = data['price_totals']
+            state.price_count = int(count)
+        return state
+
+
+def time_features_from_days(days):
+    """day_of_week / month / quarter straight from int day numbers (no pandas)."""
+    days = np.asarray(days, dtype=np.int64)
+    day_of_week = (days + 3) % 7  # 1970-01-01 was a Thursday
+    month = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) % 12 + 1
+    quarter = (month - 1) // 3 + 1
+    return {'day_of_week': day_of_week, 'month': month, 'quarter': quarter}
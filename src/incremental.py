@@ -0,0 +1,233 @@
+# src/incremental.py
+import argparse
+import hashlib
+import os
+import sys
+
+import joblib
+import pandas as pd
+
+from .data_preprocessing import aggregate_daily_sales
+from .data_sources import DAILY_SALES_COLUMNS, DAILY_SALES_SOURCE, DB_URL, NUMERIC_COLUMNS
+from .features import FEATURES, RollingFeatureState, add_time_features
+from .pricing_engine import candidate_multipliers, recommend_prices
+from .storage import delete_partition, load_artifact, partition_path, save_artifact
+
+MODEL_PATH = "models/xgb_demand_model.joblib"
+
+# Content hash of each stage's input, per date; a matching hash means the stage can be skipped
+STATE_DIR = "data/partition_state"
+# RollingFeatureState as of the end of each processed day, so the next day only folds in its own rows
+FEATURE_STATE_DIR = "data/feature_state"
+# Snapshots more than this many days older than the day being processed are pruned
+KEEP_FEATURE_STATES = 14
+
+STAGES = ['daily_sales', 'features', 'recommend']
+# Exit code of a single-date run whose input was unchanged (Airflow turns it into a skip)
+SKIPPED_EXIT_CODE = 99
+
+STATE_COLUMNS = ['event_date', 'stock_code', 'daily_quantity', 'avg_price']
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame (columns, order and values)."""
+    digest = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _combine(*parts):
+    return hashlib.sha256("|".join(part or "" for part in parts).encode()).hexdigest()
+
+
+def _marker_path(stage, date):
+    return os.path.join(STATE_DIR, stage, f"{date:%Y-%m-%d}.sha256")
+
+
+def read_marker(stage, date):
+    try:
+        with open(_marker_path(stage, date)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_marker(stage, date, digest):
+    path = _marker_path(stage, date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(digest)
+    os.replace(tmp_path, path)
+
+
+def _partition_exists(name, date):
+    return os.path.isdir(partition_path(name, date))
+
+
+def _replace_partition(df, name, date):
+    """Write `df` as `date`'s partition of `name`; an empty day removes what an earlier run left there."""
+    if df.empty:
+        delete_partition(name, date)
+    else:
+        save_artifact(df, name, mode='partitions')
+
+
+def daily_sales_partition(date, source=None, db_url=DB_URL):
+    """One day of daily product aggregates, computed from that day's transactions only."""
+    source = source or DAILY_SALES_SOURCE
+    if source == 'postgres':
+        from sqlalchemy import create_engine
+
+        from .etl.materialized_views import DAILY_SALES_SELECT
+
+        sql = DAILY_SALES_SELECT.format(where=" AND event_date = %(event_date)s") + " ORDER BY stock_code"
+        engine = create_engine(db_url)
+        try:
+            df = pd.read_sql(sql, engine, params={'event_date': date.date()}, parse_dates=['event_date'])
+        finally:
+            engine.dispose()
+        # NUMERIC columns arrive as Decimal; cast like data_sources so both sources hash and store alike
+        return df[DAILY_SALES_COLUMNS].astype(NUMERIC_COLUMNS)
+    cleaned = load_artifact('cleaned_retail', start_date=date, end_date=date)
+    if cleaned.empty:
+        return pd.DataFrame(columns=DAILY_SALES_COLUMNS)
+    return aggregate_daily_sales(cleaned)[DAILY_SALES_COLUMNS]
+
+
+def run_daily_sales(date, source=None, force=False):
+    """Rewrite the daily_product_sales partition for `date`; False when its input is unchanged."""
+    daily = daily_sales_partition(date, source)
+    digest = frame_hash(daily)
+    if not force and read_marker('daily_sales', date) == digest:
+        return False
+    _replace_partition(daily, 'daily_product_sales', date)
+    write_marker('daily_sales', date, digest)
+    return True
+
+
+def _state_path(date):
+    return os.path.join(FEATURE_STATE_DIR, f"{date:%Y-%m-%d}.npz")
+
+
+def _state_dates():
+    if not os.path.isdir(FEATURE_STATE_DIR):
+        return []
+    return sorted(pd.Timestamp(name[:-len(".npz")]) for name in os.listdir(FEATURE_STATE_DIR)
+                  if name.endswith(".npz") and ".tmp" not in name)
+
+
+def load_state(date):
+    """Rolling-feature state as of the end of the day before `date`.
+
+    Starts from the newest saved snapshot before `date` and folds in the
+    (few) days between it and `date`; only without any snapshot is the
+    history before `date` read in full.
+    """
+    previous_day = date - pd.Timedelta(days=1)
+    snapshots = [day for day in _state_dates() if day <= previous_day]
+    if not snapshots:
+        history = load_artifact('daily_product_sales', columns=STATE_COLUMNS, end_date=previous_day)
+        return RollingFeatureState.from_frame(history)
+
+    state = RollingFeatureState.load(_state_path(snapshots[-1]))
+    gap = load_artifact('daily_product_sales', columns=STATE_COLUMNS,
+                        start_date=snapshots[-1] + pd.Timedelta(days=1), end_date=previous_day)
+    if not gap.empty:
+        gap = gap.sort_values('event_date', kind='stable')
+        state.append(gap)
+    return state
+
+
+def save_state(state, date):
+    os.makedirs(FEATURE_STATE_DIR, exist_ok=True)
+    tmp_path = _state_path(date)[:-len(".npz")] + f".tmp-{os.getpid()}.npz"
+    state.save(tmp_path)
+    os.replace(tmp_path, _state_path(date))
+    # Pruned relative to `date`, never by count: a backfill of old days keeps its own recent
+    # snapshots (each next day starts from the previous one) and never touches newer ones
+    oldest_kept = date - pd.Timedelta(days=KEEP_FEATURE_STATES)
+    for day in _state_dates():
+        if day < oldest_kept:
+            os.remove(_state_path(day))
+
+
+def run_features(date, force=False):
+    """Compute model features for `date` from the previous day's state plus this day's rows.
+
+    The skip hash chains this day's input with the previous day's feature
+    hash, so a changed earlier day also invalidates the days after it.
+    """
+    rows = load_artifact('daily_product_sales', start_date=date, end_date=date)
+    digest = _combine(frame_hash(rows), read_marker('features', date - pd.Timedelta(days=1)))
+    if not force and read_marker('features', date) == digest and (rows.empty or _partition_exists('daily_features', date)):
+        return False
+    state = load_state(date)
+    features = add_time_features(state.append(rows)) if not rows.empty else rows
+    _replace_partition(features, 'daily_features', date)
+    save_state(state, date)
+    write_marker('features', date, digest)
+    return True
+
+
+def run_recommend(date, force=False, model_path=MODEL_PATH):
+    """Score `date`'s features and rewrite its daily_price_recommendation partition."""
+    features = load_artifact('daily_features', start_date=date, end_date=date)
+    digest = _combine(frame_hash(features), file_hash(model_path))
+    if not force and read_marker('recommend', date) == digest:
+        return False
+    if not features.empty:
+        recommendations = recommend_prices(joblib.load(model_path), features[FEATURES], candidate_multipliers())
+        features['predicted_quantity'] = recommendations['predicted_quantity']
+        features['recommended_price'] = recommendations['recommended_price']
+    _replace_partition(features, 'daily_price_recommendation', date)
+    write_marker('recommend', date, digest)
+    return True
+
+
+def run(stage, date, force=False, source=None):
+    if stage == 'daily_sales':
+        return run_daily_sales(date, source, force)
+    if stage == 'features':
+        return run_features(date, force)
+    return run_recommend(date, force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process one date partition (or a range) of the pricing pipeline")
+    parser.add_argument("stage", choices=STAGES + ['all'])
+    parser.add_argument("--date", help="partition to process (YYYY-MM-DD)")
+    parser.add_argument("--start", help="first date of a range, processed day by day")
+    parser.add_argument("--end", help="last date of a range (inclusive)")
+    parser.add_argument("--source", help="daily sales source: files or postgres (default: DAILY_SALES_SOURCE)")
+    parser.add_argument("--force", action="store_true", help="recompute even if the input hash is unchanged")
+    args = parser.parse_args(argv)
+
+    if args.date:
+        dates = [pd.Timestamp(args.date)]
+    elif args.start and args.end:
+        dates = list(pd.date_range(args.start, args.end, freq='D'))
+    else:
+        parser.error("give --date or --start/--end")
+    stages = STAGES if args.stage == 'all' else [args.stage]
+
+    ran = False
+    for date in dates:
+        for stage in stages:
+            changed = run(stage, date, args.force, args.source)
+            ran = ran or changed
+            print(f"{'✅' if changed else '⏭️'} {stage} {date:%Y-%m-%d}: {'processed' if changed else 'unchanged, skipped'}")
+    if not ran:
+        sys.exit(SKIPPED_EXIT_CODE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# src/models/constrained_pricing.py
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..features import FEATURES
+from ..pricing_engine import predict_candidate_demand
+from .price_optimizer import MAX_PRICE_CHANGE, MIN_PRICE_CHANGE, MODEL_PATH, PROFILE_COLUMNS, build_profiles
+
+# Business rules applied unless overridden on the command line
+MAX_DAILY_CHANGE = 0.10     # |price / price_lag_1 - 1|
+MIN_MARGIN = 0.20           # (price - unit_cost) / price, where a unit cost is known
+PRICE_ENDINGS = (0.99,)     # allowed fractional parts
+
+# Candidates per product: a wide reference grid (MIN/MAX_PRICE_CHANGE around the
+# base price, rules ignored) that shows what each rule costs, plus a grid spanning
+# the interval the rules allow, snapped to the allowed price endings.
+REFERENCE_STEPS = 41
+FEASIBLE_STEPS = 21
+
+# Lagrange multiplier search for category targets: doublings, then bisection steps
+MAX_DOUBLINGS = 40
+BISECTION_STEPS = 30
+
+RULES = ['max_increase', 'max_decrease', 'margin', 'ending']
+# For products no candidate satisfies fully, the first of these rule sets whose removal
+# leaves a candidate is dropped; the margin floor is never dropped
+RELAX_SETS = [('ending',), ('max_increase',), ('max_decrease',),
+              ('ending', 'max_increase'), ('ending', 'max_decrease')]
+UNKNOWN_CATEGORY = "Unknown"
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    max_daily_change: Optional[float] = MAX_DAILY_CHANGE    # None: no limit
+    min_margin: Optional[float] = MIN_MARGIN                # None: no floor
+    price_endings: Tuple[float, ...] = PRICE_ENDINGS        # (): any price
+
+
+def snap_to_endings(prices, endings, lo, hi):
+    """Nearest price within [lo, hi] whose fractional part is one of `endings`.
+
+    Returns (snapped, ok); where no such price exists the input is kept and
+    ok is False. `lo` / `hi` broadcast against `prices`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if not endings:
+        return prices, np.ones(prices.shape, dtype=bool)
+    lo = np.broadcast_to(lo, prices.shape)[..., None]
+    hi = np.broadcast_to(hi, prices.shape)[..., None]
+    endings = np.asarray(endings, dtype=float)
+    below = np.floor(prices[..., None] - endings) + endings
+    options = np.concatenate([below, below + 1.0], axis=-1)
+    options = np.round(options, 2)
+    distance = np.where((options >= lo - 1e-9) & (options <= hi + 1e-9), np.abs(options - prices[..., None]), np.inf)
+    best = np.argmin(distance, axis=-1)
+    ok = np.isfinite(np.take_along_axis(distance, best[..., None], axis=-1)[..., 0])
+    snapped = np.take_along_axis(options, best[..., None], axis=-1)[..., 0]
+    return np.where(ok, snapped, prices), ok
+
+
+def rule_masks(prices, anchor, unit_cost, rules):
+    """Boolean (products x candidates) mask per rule: True where a candidate complies."""
+    anchor = anchor[:, None]
+    everywhere = np.ones(prices.shape, dtype=bool)
+    masks = dict.fromkeys(RULES, everywhere)
+    if rules.max_daily_change is not None:
+        masks['max_increase'] = prices <= anchor * (1 + rules.max_daily_change) + 1e-9
+        masks['max_decrease'] = prices >= anchor * (1 - rules.max_daily_change) - 1e-9
+    if rules.min_margin is not None:
+        # Products without a known cost have no floor
+        floor = unit_cost[:, None] / (1 - rules.min_margin)
+        masks['margin'] = np.isnan(floor) | (prices >= floor - 1e-9)
+    if rules.price_endings:
+        offsets = prices[..., None] - np.asarray(rules.price_endings, dtype=float)
+        masks['ending'] = (np.abs(offsets - np.round(offsets)) < 1e-6).any(axis=-1)
+    return masks
+
+
+def _choose(score, allowed):
+    """Best allowed candidate per product (argmax of score over the allowed mask)."""
+    return np.argmax(np.where(allowed, score, -np.inf), axis=1)
+
+
+def _category_totals(values, choice, categories, n_categories):
+    rows = np.arange(len(choice))
+    return np.bincount(categories, weights=values[rows, choice], minlength=n_categories)
+
+
+def solve_category_targets(objective, revenue, quantity, allowed, categories, min_revenue, min_volume):
+    """Per-product choices that maximize the objective subject to category minimums.
+
+    Lagrangian relaxation of the coupling constraints: each category c gets
+    multipliers (a_c, b_c) and every product independently picks the
+    candidate maximizing objective + a_c * revenue + b_c * quantity. The
+    category totals grow monotonically with the multipliers, so each one is
+    found by doubling and bisection, for all categories at once; every step
+    is a single vectorized argmax over the whole catalog. Returns
+    (choice, revenue multipliers, volume multipliers, feasible per category).
+    """
+    n_categories = len(min_revenue)
+    weights = {'revenue': np.zeros(n_categories), 'volume': np.zeros(n_categories)}
+    values = {'revenue': revenue, 'volume': quantity}
+    targets = {'revenue': min_revenue, 'volume': min_volume}
+    feasible = np.ones(n_categories, dtype=bool)
+
+    def choice_for(weights):
+        score = objective + weights['revenue'][categories][:, None] * revenue \
+                          + weights['volume'][categories][:, None] * quantity
+        return _choose(score, allowed)
+
+    def shortfall(kind, weights):
+        totals = _category_totals(values[kind], choice_for(weights), categories, n_categories)
+        return totals < targets[kind] - 1e-9
+
+    kinds = [kind for kind in ('revenue', 'volume') if np.isfinite(targets[kind]).any()]
+    # With both kinds the second search can undo the first: a couple of sweeps settle them
+    for _ in range(2 if len(kinds) > 1 else 1):
+        for kind in kinds:
+            lo = np.zeros(n_categories)
+            hi = np.where(shortfall(kind, {**weights, kind: lo}), 1.0, 0.0)
+            active = hi > 0
+            for _ in range(MAX_DOUBLINGS):
+                grow = active & shortfall(kind, {**weights, kind: hi})
+                if not grow.any():
+                    break
+                hi[grow] *= 2
+            reachable = active & ~shortfall(kind, {**weights, kind: hi})
+            feasible &= ~(active & ~reachable)
+            for _ in range(BISECTION_STEPS):
+                mid = np.where(reachable, (lo + hi) / 2, hi)
+                short = shortfall(kind, {**weights, kind: mid})
+                lo = np.where(reachable & short, mid, lo)
+                hi = np.where(reachable & ~short, mid, hi)
+            # The upper end always meets the target (or is the best effort for unreachable ones)
+            weights[kind] = hi
+    choice = choice_for(weights)
+    # Unreachable targets: the products simply maximize the target quantity
+    for kind in kinds:
+        weights[kind] = np.where(weights[kind] >= 2.0 ** MAX_DOUBLINGS, np.inf, weights[kind])
+    return choice, weights['revenue'], weights['volume'], feasible
+
+
+class ConstrainedCatalogOptimizer:
+    """Catalog-wide prices under business rules and category targets.
+
+    Every product's candidate grid is scored in one batched prediction;
+    per-product rules (maximum daily change vs price_lag_1, margin floor,
+    price endings) become candidate masks, and category revenue / volume
+    minimums couple the products through Lagrange multipliers. Rules a
+    product cannot satisfy all at once are relaxed as in RELAX_SETS and
+    reported, as is every constraint that changed a product's price.
+    """
+
+    def __init__(self, model, profiles, unit_costs=None, categories=None):
+        self.model = model
+        self.profiles = profiles
+        index = profiles.index
+        self.unit_cost = np.full(len(index), np.nan)
+        if unit_costs is not None:
+            # Matched on the stock code as text, whichever type each side was read with
+            costs = unit_costs.set_axis(unit_costs.index.astype(str))
+            self.unit_cost = costs.reindex(index.astype(str)).to_numpy(dtype=float)
+        if categories is None:
+            categories = pd.Series(UNKNOWN_CATEGORY, index=index)
+        self.category = categories.reindex(index).fillna(UNKNOWN_CATEGORY).astype(str).to_numpy()
+
+    @classmethod
+    def from_history(cls, model_path=MODEL_PATH, history=None, unit_costs=None, target_date=None):
+        import joblib
+
+        from ..data_sources import read_daily_sales, read_product_categories
+
+        if history is None:
+            history = read_daily_sales(columns=PROFILE_COLUMNS)
+        profiles = build_profiles(history, target_date)
+        categories = None
+        if 'product_name' in profiles.columns:
+            categories = profiles['product_name'].astype(str).map(read_product_categories())
+        return cls(joblib.load(model_path), profiles, unit_costs, categories)
+
+    def candidates(self, rules):
+        """(products x candidates) price grid and each product's price_lag_1 anchor."""
+        base = self.profiles['base_price'].to_numpy(dtype=float)
+        anchor = self.profiles['price_lag_1'].to_numpy(dtype=float)
+        anchor = np.where(np.isnan(anchor), base, anchor)
+
+        # Without a change limit the rules-compliant grid spans the reference range
+        lo = base * (1 + MIN_PRICE_CHANGE)
+        hi = base * (1 + MAX_PRICE_CHANGE)
+        if rules.max_daily_change is not None:
+            lo = anchor * (1 - rules.max_daily_change)
+            hi = anchor * (1 + rules.max_daily_change)
+        if rules.min_margin is not None:
+            lo = np.fmax(lo, self.unit_cost / (1 - rules.min_margin))
+        # Floor above the allowed band: search just above the floor (the change rule gets relaxed)
+        above = lo > hi
+        hi[above] = lo[above] + 1.0
+
+        reference = base[:, None] * (1 + np.linspace(MIN_PRICE_CHANGE, MAX_PRICE_CHANGE, REFERENCE_STEPS))
+        feasible = np.linspace(lo, hi, FEASIBLE_STEPS, axis=1)
+        feasible, _ = snap_to_endings(feasible, rules.price_endings, lo[:, None], hi[:, None])
+        return np.concatenate([reference, feasible], axis=1), anchor
+
+    def optimize(self, rules=PricingRules(), category_targets=None, objective='revenue'):
+        """(per-product prices, per-category summary) under `rules` and `category_targets`.
+
+        `category_targets` is indexed by category name with optional
+        min_revenue / min_volume columns (NaN: no target). `objective` is
+        'revenue' or 'profit' (needs unit costs).
+        """
+        if objective not in ('revenue', 'profit'):
+            raise ValueError(f"Unknown objective: {objective!r}")
+        if objective == 'profit' and np.isnan(self.unit_cost).all():
+            raise ValueError("The profit objective needs unit costs")
+
+        prices, anchor = self.candidates(rules)
+        quantity = np.clip(predict_candidate_demand(self.model, self.profiles[FEATURES], prices), 0, None)
+        revenue = prices * quantity
+        score = revenue
+        if objective == 'profit':
+            score = (prices - np.nan_to_num(self.unit_cost)[:, None]) * quantity
+        score = np.nan_to_num(score, nan=-np.inf)
+
+        masks = rule_masks(prices, anchor, self.unit_cost, rules)
+        relaxed = np.zeros((len(prices), len(RULES)), dtype=bool)
+        in_force = lambda rules_: np.logical_and.reduce(
+            [masks[rule] | relaxed[:, [RULES.index(rule)]] for rule in rules_])
+        stuck = ~in_force(RULES).any(axis=1)
+        for dropped in RELAX_SETS:
+            if not stuck.any():
+                break
+            fits = stuck & in_force([rule for rule in RULES if rule not in dropped]).any(axis=1)
+            for rule in dropped:
+                relaxed[fits, RULES.index(rule)] = True
+            stuck &= ~fits
+        # Only the margin floor left (no candidate satisfies the others in any combination)
+        relaxed[np.ix_(stuck, [RULES.index(rule) for rule in RULES if rule != 'margin'])] = True
+        allowed = in_force(RULES)
+        # Relaxed products keep to the grid built around their limits, so the violation stays small
+        allowed[relaxed.any(axis=1), :REFERENCE_STEPS] = False
+
+        category_names, categories = np.unique(self.category, return_inverse=True)
+        targets = (category_targets if category_targets is not None else pd.DataFrame()).reindex(category_names)
+        min_revenue = targets['min_revenue'].to_numpy(dtype=float) if 'min_revenue' in targets else np.full(len(category_names), np.nan)
+        min_volume = targets['min_volume'].to_numpy(dtype=float) if 'min_volume' in targets else np.full(len(category_names), np.nan)
+        choice, revenue_weight, volume_weight, target_feasible = solve_category_targets(
+            score, revenue, quantity, allowed, categories, min_revenue, min_volume)
+
+        # A constraint is binding when dropping it alone would raise the product's objective
+        rows = np.arange(len(choice))
+        rules_only = _choose(score, allowed)
+        binding = {}
+        for rule in RULES:
+            without = _choose(score, in_force([other for other in RULES if other != rule]))
+            binding[rule] = score[rows, without] > score[rows, rules_only] + 1e-9
+        binding['category_target'] = choice != rules_only
+
+        result = pd.DataFrame({
+            'category_name': self.category,
+            'price_lag_1': anchor,
+            'unit_cost': self.unit_cost,
+            'recommended_price': prices[rows, choice],
+            'expected_qty': quantity[rows, choice],
+            'expected_revenue': revenue[rows, choice],
+            'unconstrained_price': prices[rows, np.argmax(score, axis=1)],
+            **{f'binding_{name}': flags for name, flags in binding.items()},
+        }, index=self.profiles.index)
+        result['binding'] = _join_flags(binding)
+        result['relaxed'] = _join_flags({rule: relaxed[:, i] for i, rule in enumerate(RULES)})
+        if 'product_name' in self.profiles.columns:
+            result.insert(0, 'product_name', self.profiles['product_name'].to_numpy())
+
+        n_categories = len(category_names)
+        summary = pd.DataFrame({
+            'category_name': category_names,
+            'products': np.bincount(categories, minlength=n_categories),
+            'min_revenue': min_revenue,
+            'expected_revenue': _category_totals(revenue, choice, categories, n_categories),
+            'min_volume': min_volume,
+            'expected_volume': _category_totals(quantity, choice, categories, n_categories),
+            'revenue_multiplier': revenue_weight,
+            'volume_multiplier': volume_weight,
+        })
+        summary['binding'] = (revenue_weight > 0) | (volume_weight > 0)
+        summary['met'] = target_feasible
+        return result.reset_index(), summary
+
+
+def _join_flags(flags):
+    """{name: bool per product} -> comma-separated names of the True flags, per product."""
+    joined = np.full(len(next(iter(flags.values()))), "", dtype=object)
+    for name, values in flags.items():
+        joined[values] = joined[values] + name + ","
+    return [value.rstrip(",") for value in joined]
+
+
+def _read_costs(path):
+    costs = pd.read_csv(path)
+    return costs.set_index('stock_code')['unit_cost']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catalog-wide prices under business rules and category targets")
+    parser.add_argument("--max-change", type=float, default=MAX_DAILY_CHANGE,
+                        help="maximum relative change vs price_lag_1 (negative: no limit)")
+    parser.add_argument("--min-margin", type=float, default=MIN_MARGIN,
+                        help="minimum (price - cost) / price for products with a unit cost (negative: no floor)")
+    parser.add_argument("--endings", default=",".join(f"{e:.2f}" for e in PRICE_ENDINGS),
+                        help="allowed price endings, comma separated (empty: any)")
+    parser.add_argument("--costs", help="CSV with stock_code, unit_cost")
+    parser.add_argument("--targets", help="CSV with category_name and min_revenue and/or min_volume")
+    parser.add_argument("--objective", choices=['revenue', 'profit'], default='revenue')
+    args = parser.parse_args(argv)
+
+    from ..storage import save_artifact
+
+    rules = PricingRules(
+        max_daily_change=args.max_change if args.max_change >= 0 else None,
+        min_margin=args.min_margin if args.min_margin >= 0 else None,
+        price_endings=tuple(float(e) for e in args.endings.split(",") if e.strip()),
+    )
+    targets = pd.read_csv(args.targets).set_index('category_name') if args.targets else None
+
+    start = time.perf_counter()
+    optimizer = ConstrainedCatalogOptimizer.from_history(unit_costs=_read_costs(args.costs) if args.costs else None)
+    prices, categories = optimizer.optimize(rules, targets, args.objective)
+    save_artifact(prices, 'constrained_prices')
+    save_artifact(categories, 'category_price_targets')
+    print(f"✅ Constrained prices for {len(prices)} products in {time.perf_counter() - start:.2f}s")
+    counts = {name: int(prices[f'binding_{name}'].sum()) for name in RULES + ['category_target']}
+    print(f"   binding constraints (products): {counts}")
+    print(f"   rules relaxed for {int((prices['relaxed'] != '').sum())} products")
+    print(categories.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# src/models/model_bundle.py
+import json
+import os
+import shutil
+import uuid
+from threading import Lock
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BUNDLE_PATH = "models/xgb_demand_bundle"
+MANIFEST_NAME = "manifest.json"
+FALLBACK_SEGMENT = "__all__"
+
+
+def save_bundle(path, models, segment_key, features, route_column=None, route_map=None):
+    """Write segment models plus a manifest describing how rows are routed.
+
+    `models` maps segment -> fitted model; a FALLBACK_SEGMENT entry, when
+    present, scores rows whose segment has no model of its own. Rows are
+    routed by `route_column`, translated through `route_map` when the
+    segment (e.g. category) is derived from another column (e.g. product).
+    The bundle directory is written aside and renamed in, like the single model.
+    """
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_path)
+    files = {}
+    for i, (segment, model) in enumerate(sorted(models.items(), key=lambda item: str(item[0]))):
+        files[str(segment)] = f"segment-{i}.joblib"
+        joblib.dump(model, os.path.join(tmp_path, files[str(segment)]))
+    manifest = {
+        'segment_key': segment_key,
+        'route_column': route_column or segment_key,
+        'route_map': {str(k): str(v) for k, v in (route_map or {}).items()},
+        'features': list(features),
+        'segments': files,
+    }
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = tmp_path + ".old"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+def bundle_exists(path=BUNDLE_PATH):
+    return os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+def bundle_trained_at(path=BUNDLE_PATH):
+    """Modification time of the bundle's manifest, written last by save_bundle."""
+    return os.path.getmtime(os.path.join(path, MANIFEST_NAME))
+
+
+class ModelBundle:
+    """Segment models loaded on first use.
+
+    Opening a bundle only reads its manifest; each segment's model is
+    unpickled the first time a row routes to it, so scoring one category
+    never pays for loading the others.
+    """
+
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        self.segment_key = manifest['segment_key']
+        self.route_column = manifest['route_column']
+        self.route_map = manifest['route_map']
+        self.features = manifest['features']
+        self.files = manifest['segments']
+        self._models = {}
+        self._lock = Lock()
+
+    @property
+    def segments(self):
+        return [segment for segment in self.files if segment != FALLBACK_SEGMENT]
+
+    @property
+    def loaded_segments(self):
+        return list(self._models)
+
+    def model_for(self, segment):
+        """Model for `segment`, falling back to the all-data model (None if neither exists)."""
+        segment = str(segment)
+        if segment not in self.files:
+            segment = FALLBACK_SEGMENT
+            if segment not in self.files:
+                return None
+        with self._lock:
+            if segment not in self._models:
+                self._models[segment] = joblib.load(os.path.join(self.path, self.files[segment]))
+            return self._models[segment]
+
+    def segments_of(self, df):
+        """Segment of every row of `df`, as strings."""
+        values = df[self.route_column].astype(str)
+        if self.route_map:
+            values = values.map(self.route_map).fillna(FALLBACK_SEGMENT)
+        return values.to_numpy()
+
+    def groups(self, df):
+        """(model, row positions) per segment present in `df`; rows without any model are skipped."""
+        segments = self.segments_of(df)
+        for segment in pd.unique(segments):
+            model = self.model_for(segment)
+            if model is not None:
+                yield model, np.flatnonzero(segments == segment)
+
+    def predict(self, df):
+        """Demand for every row of `df` (FEATURES plus the route column), NaN where unroutable."""
+        predictions = np.full(len(df), np.nan)
+        X = df[self.features]
+        for model, rows in self.groups(df):
+            predictions[rows] = model.predict(X.iloc[rows])
+        return predictions
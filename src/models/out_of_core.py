@@ -0,0 +1,146 @@
+# src/models/out_of_core.py
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..data_sources import CHUNK_ROWS, iter_daily_sales
+from ..features import FEATURES, RollingFeatureState, time_features_from_days, to_day_numbers
+
+TRAIN_COLUMNS = ['event_date', 'stock_code', 'daily_quantity', 'avg_price']
+
+# The last VALID_DAYS days of history are held out for early stopping
+VALID_DAYS = 30
+
+XGB_PARAMS = {
+    'objective': 'reg:squarederror',
+    'tree_method': 'hist',
+    'max_bin': 256,
+    'eta': 0.1,
+    'seed': 42,
+}
+MAX_BOOST_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 20
+
+# Where feature chunks are spilled between the feature pass and training
+SPILL_DIR = os.environ.get("TRAIN_SPILL_DIR")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 if os.uname().sysname != 'Darwin' else peak / 1024 ** 2
+
+
+def last_event_date(chunk_rows=CHUNK_ROWS, source=None):
+    """Latest event_date in the history, read one date column chunk at a time."""
+    latest = None
+    for chunk in iter_daily_sales(source, chunk_rows, columns=['event_date']):
+        if not chunk.empty:
+            chunk_max = chunk['event_date'].max()
+            latest = chunk_max if latest is None else max(latest, chunk_max)
+    return latest
+
+
+def feature_chunks(chunk_rows=CHUNK_ROWS, source=None):
+    """Yield (event_date, float32 FEATURES matrix, label) chunks of the history.
+
+    The history is streamed in date order and folded into a
+    RollingFeatureState, so only the state (HISTORY_DAYS per product) and
+    one chunk live in memory at a time.
+    """
+    state = RollingFeatureState()
+    for chunk in iter_daily_sales(source, chunk_rows, columns=TRAIN_COLUMNS):
+        if chunk.empty:
+            continue
+        chunk = state.append(chunk)
+        days = to_day_numbers(chunk['event_date'])
+        columns = time_features_from_days(days)
+        matrix = np.empty((len(chunk), len(FEATURES)), dtype=np.float32)
+        for i, name in enumerate(FEATURES):
+            matrix[:, i] = columns[name] if name in columns else chunk[name].to_numpy(dtype=float)
+        yield chunk['event_date'], matrix, chunk['daily_quantity'].to_numpy(dtype=np.float32)
+
+
+def spilled_chunks(paths):
+    """DataIter replaying feature chunks spilled to .npz files, one file in memory at a time."""
+    import xgboost as xgb
+
+    class SpilledChunks(xgb.DataIter):
+        def __init__(self):
+            self._it = 0
+            super().__init__()
+
+        def next(self, input_data):
+            if self._it == len(paths):
+                return False
+            with np.load(paths[self._it]) as data:
+                input_data(data=data['X'], label=data['y'], feature_names=FEATURES)
+            self._it += 1
+            return True
+
+        def reset(self):
+            self._it = 0
+
+    return SpilledChunks()
+
+
+def spill_features(spill_dir, cutoff, chunk_rows=CHUNK_ROWS, source=None):
+    """Write train / validation feature chunks split at `cutoff` (validation: dates >= cutoff)."""
+    paths = {'train': [], 'valid': []}
+    rows = {'train': 0, 'valid': 0}
+    for i, (dates, X, y) in enumerate(feature_chunks(chunk_rows, source)):
+        is_valid = (dates >= cutoff).to_numpy()
+        for split, mask in (('train', ~is_valid), ('valid', is_valid)):
+            if mask.any():
+                path = os.path.join(spill_dir, f"{split}-{i}.npz")
+                np.savez(path, X=X[mask], y=y[mask])
+                paths[split].append(path)
+                rows[split] += int(mask.sum())
+    return paths, rows
+
+
+def train_out_of_core(chunk_rows=CHUNK_ROWS, valid_days=VALID_DAYS, source=None):
+    """Fit the demand model without materializing the feature frame.
+
+    Features are computed in one streaming pass and spilled to disk; XGBoost
+    then builds a QuantileDMatrix from an iterator over the spilled chunks,
+    so it only keeps the quantized (one byte per value) matrix. Training
+    uses the hist method with early stopping on the last `valid_days` days.
+    Returns an XGBRegressor, so scoring code is unchanged.
+    """
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    latest = last_event_date(chunk_rows, source)
+    if latest is None:
+        raise ValueError("No daily sales history to train on")
+    cutoff = pd.Timestamp(latest) - pd.Timedelta(days=valid_days - 1)
+
+    spill_dir = tempfile.mkdtemp(prefix="train-features-", dir=SPILL_DIR)
+    try:
+        paths, rows = spill_features(spill_dir, cutoff, chunk_rows, source)
+        if not paths['train'] or not paths['valid']:
+            raise ValueError(f"Need rows before and after {cutoff.date()} for the time-based split")
+        print(f"Features: {rows['train']} train / {rows['valid']} validation rows "
+              f"(validation from {cutoff.date()}), peak RSS {peak_rss_mb():.0f} MiB")
+
+        dtrain = xgb.QuantileDMatrix(spilled_chunks(paths['train']), max_bin=XGB_PARAMS['max_bin'])
+        dvalid = xgb.QuantileDMatrix(spilled_chunks(paths['valid']), ref=dtrain)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    booster = xgb.train(XGB_PARAMS, dtrain, num_boost_round=MAX_BOOST_ROUNDS,
+                        evals=[(dvalid, 'valid')], early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                        verbose_eval=False)
+    print(f"✅ Best iteration {booster.best_iteration}, validation RMSE {booster.best_score:.2f}")
+    print(f"✅ Out-of-core training took {time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MiB")
+
+    model = xgb.XGBRegressor()
+    model.load_model(bytearray(booster.save_raw('json')))
+    return model
@@ -1,54 +1,164 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-import xgboost as xgb
 import os
 import numpy as np
 
-DATA_PATH = "data/processed/daily_product_sales.csv"  
+from ..data_sources import CHUNK_ROWS, read_daily_sales, read_product_categories
+from ..features import FEATURES, add_rolling_features, add_time_features
+from .model_bundle import BUNDLE_PATH, FALLBACK_SEGMENT, save_bundle
+from .out_of_core import peak_rss_mb, train_out_of_core
+
 MODEL_PATH = "models/xgb_demand_model.joblib"
 
-def main():
+# Segments with fewer training rows than this are scored by the all-data model
+MIN_SEGMENT_ROWS = 50
+
+
+def fit_model(X_train, y_train, n_jobs=None):
+    # xgboost and sklearn are imported where they are used, so importing this module stays cheap
+    import xgboost as xgb
+
+    model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+    return model
+
+
+def _fit_segment(segment, X_train, y_train, n_jobs):
+    # Runs in a worker process; arguments and result must pickle
+    start = time.perf_counter()
+    model = fit_model(pd.DataFrame(X_train, columns=FEATURES), y_train, n_jobs)
+    return segment, model, time.perf_counter() - start
+
+
+def print_metrics(y_test, y_pred, label="Validation"):
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))  # هنا أخذنا الجذر التربيعي للـ MSE
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    print(f"✅ {label} RMSE: {rmse:.2f}")
+    print(f"✅ {label} MAE: {mae:.2f}")
+    print(f"✅ {label} R²: {r2:.3f}")
+
+
+def segment_routing(df, segment_key):
+    """Column the bundle routes on, plus a value -> segment map when the key is derived."""
+    if segment_key in df.columns:
+        return segment_key, None
+    if segment_key == 'category_name':
+        return 'product_name', read_product_categories().to_dict()
+    raise ValueError(f"Cannot segment by {segment_key!r}: not a daily sales column")
+
+
+def train_segments(df, segment_key, workers=None):
+    """Train one model per segment in parallel and save them as a bundle.
+
+    Segments are fitted in a process pool, each worker running a
+    single-threaded model, so wall time falls with the number of cores.
+    The all-data fallback for small or unseen segments is the largest fit by
+    far, so it runs after the pool with every core rather than on one worker.
+    """
+    from sklearn.model_selection import train_test_split
+
+    route_column, route_map = segment_routing(df, segment_key)
+    segments = df[route_column].astype(str)
+    if route_map:
+        segments = segments.map(route_map).fillna(FALLBACK_SEGMENT)
+    segments = segments.to_numpy()
+
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+    y = df['daily_quantity'].to_numpy(dtype=float)
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+
+    tasks = {}
+    for segment in pd.unique(segments[train_idx]):
+        rows = train_idx[segments[train_idx] == segment]
+        if segment != FALLBACK_SEGMENT and len(rows) >= MIN_SEGMENT_ROWS:
+            tasks[segment] = rows
+
+    workers = workers or os.cpu_count() or 1
+    threads_per_model = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Training {len(tasks)} segment models by {segment_key} on {workers} workers, plus the fallback")
+    start = time.perf_counter()
+    models = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fit_segment, segment, X[rows], y[rows], threads_per_model)
+                   for segment, rows in tasks.items()]
+        for future in futures:
+            segment, model, seconds = future.result()
+            models[segment] = model
+            print(f"  {segment}: {len(tasks[segment])} rows in {seconds:.2f}s")
+
+    _, models[FALLBACK_SEGMENT], seconds = _fit_segment(FALLBACK_SEGMENT, X[train_idx], y[train_idx], None)
+    print(f"  {FALLBACK_SEGMENT}: {len(train_idx)} rows in {seconds:.2f}s (all cores)")
+    print(f"✅ Trained all segments in {time.perf_counter() - start:.2f}s")
+
+    # Evaluate every test row with the model it would be routed to
+    y_pred = np.empty(len(test_idx))
+    test_segments = segments[test_idx]
+    for segment in pd.unique(test_segments):
+        rows = test_segments == segment
+        model = models.get(segment, models[FALLBACK_SEGMENT])
+        y_pred[rows] = model.predict(pd.DataFrame(X[test_idx[rows]], columns=FEATURES))
+    print_metrics(y[test_idx], y_pred)
+
+    save_bundle(BUNDLE_PATH, models, segment_key, FEATURES, route_column, route_map)
+    print(f"✅ Model bundle saved to {BUNDLE_PATH}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the demand model")
+    parser.add_argument("--segment-by", help="train one model per value of this key, e.g. category_name")
+    parser.add_argument("--workers", type=int, help="training processes for --segment-by (default: all cores)")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="stream feature chunks into a QuantileDMatrix instead of one in-memory frame")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per streamed chunk with --out-of-core")
+    args = parser.parse_args(argv)
+    from sklearn.model_selection import train_test_split
+
+    if args.out_of_core:
+        save_model(train_out_of_core(chunk_rows=args.chunk_rows))
+        return
+
+    start = time.perf_counter()
     # Load dataset
-    df = pd.read_csv(DATA_PATH, parse_dates=['event_date'])  
+    df = read_daily_sales()
     print("Columns available:", df.columns.tolist())
 
     # Features
-    df['day_of_week'] = df['event_date'].dt.dayofweek
-    df['month'] = df['event_date'].dt.month
-    df['quarter'] = df['event_date'].dt.quarter
-
-    df = df.sort_values(['stock_code', 'event_date'])
-    df['qty_7d_ma'] = df.groupby('stock_code')['daily_quantity'].transform(lambda x: x.rolling(7, min_periods=1).mean())
-    df['qty_30d_ma'] = df.groupby('stock_code')['daily_quantity'].transform(lambda x: x.rolling(30, min_periods=1).mean())
-    df['qty_lag_1'] = df.groupby('stock_code')['daily_quantity'].shift(1).fillna(0)
-    df['price_lag_1'] = df.groupby('stock_code')['avg_price'].shift(1).fillna(df['avg_price'].mean())
-
-    features = ['qty_7d_ma', 'qty_30d_ma', 'qty_lag_1', 'price_lag_1', 'day_of_week', 'month', 'quarter', 'avg_price']
-    X = df[features]
+    df = add_time_features(df)
+    df = add_rolling_features(df)
+
+    if args.segment_by:
+        train_segments(df, args.segment_by, args.workers)
+        return
+
+    X = df[FEATURES]
     y = df['daily_quantity']
 
     # Split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # Train model
-    model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+    model = fit_model(X_train, y_train)
 
     # Evaluate
-    y_pred = model.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))  # هنا أخذنا الجذر التربيعي للـ MSE
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
+    print_metrics(y_test, model.predict(X_test))
+    print(f"✅ Training took {time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MiB")
+    save_model(model)
 
-    print(f"✅ Validation RMSE: {rmse:.2f}")
-    print(f"✅ Validation MAE: {mae:.2f}")
-    print(f"✅ Validation R²: {r2:.3f}")
 
-    # Save model
+def save_model(model):
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    # Write next to the target and rename, so the API never sees a half-written file
+    tmp_path = MODEL_PATH + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
     print(f"✅ Model saved to {MODEL_PATH}")
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+# src/models/tree_inference.py
+import argparse
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+# Compiled forests are written next to the model they came from
+COMPILED_SUFFIX = ".trees.npz"
+
+# Inputs up to this many rows are scored faster by the compiled forest than by the
+# native predict, whose per-call overhead dominates small inputs (see `main`'s timings)
+COMPILED_MAX_ROWS = 64
+
+
+def compiled_path(model_path):
+    return os.path.splitext(model_path)[0] + COMPILED_SUFFIX
+
+
+def _float32_below(thresholds):
+    """Float32 thresholds `t32` such that `x <= t` equals `x < t32` for every float32 x."""
+    floor = thresholds.astype(np.float32)
+    over = floor.astype(np.float64) > thresholds
+    floor[over] = np.nextafter(floor[over], np.float32(-np.inf))
+    return np.nextafter(floor, np.float32(np.inf))
+
+
+class CompiledForest:
+    """A tree ensemble flattened into NumPy node arrays.
+
+    All trees share one set of arrays; node i sends a row to children[i, 0]
+    when x[feature[i]] < threshold[i], to children[i, 1] otherwise and to
+    missing[i] when the value is NaN. Leaves point at themselves, so a fixed
+    number of steps (the deepest tree's depth) walks every tree to its leaf
+    at once, for every row, with no per-tree Python loop.
+    """
+
+    def __init__(self, feature, threshold, children, missing, value, roots, depth,
+                 base_score=0.0, aggregate='sum', feature_names=()):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.children = np.asarray(children, dtype=np.int32)
+        self.missing = np.asarray(missing, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.base_score = float(base_score)
+        self.aggregate = aggregate
+        self.feature_names = [str(name) for name in feature_names]
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted XGBRegressor / xgboost Booster or a scikit-learn forest or tree."""
+        if hasattr(model, 'get_booster') or type(model).__name__ == 'Booster':
+            return cls._from_xgboost(model)
+        if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+            return cls._from_sklearn(model)
+        raise TypeError(f"Cannot compile a {type(model).__name__}")
+
+    @classmethod
+    def _from_xgboost(cls, model):
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(booster.save_raw('json'))['learner']
+        objective = learner['objective']['name']
+        if objective not in ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror'):
+            raise ValueError(f"Only identity-link regression objectives can be compiled, not {objective}")
+        gbtree = learner['gradient_booster']
+        if gbtree['name'] != 'gbtree':
+            raise ValueError(f"Only gbtree boosters can be compiled, not {gbtree['name']}")
+        trees = gbtree['model']['trees']
+        # Early-stopped models predict with the trees up to their best iteration, like predict() does
+        best_iteration = booster.attr('best_iteration')
+        if best_iteration is not None:
+            trees = trees[:(int(best_iteration) + 1) * int(gbtree['model']['gbtree_model_param']['num_parallel_tree'])]
+
+        parts, offset = [], 0
+        for tree in trees:
+            if tree['categories_nodes']:
+                raise ValueError("Trees with categorical splits cannot be compiled")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            leaf = left == -1
+            node = np.arange(len(left))
+            children = np.where(leaf[:, None], node[:, None], np.column_stack([left, right])) + offset
+            missing = np.where(np.asarray(tree['default_left'], dtype=bool), children[:, 0], children[:, 1])
+            # Leaves keep their output in split_conditions
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            parts.append((np.where(leaf, 0, tree['split_indices']), np.where(leaf, 0, conditions),
+                          children, missing, np.where(leaf, conditions, 0.0), _depth(left, right)))
+            offset += len(left)
+
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        return cls._concat(parts, base_score, 'sum', booster.feature_names or ())
+
+    @classmethod
+    def _from_sklearn(cls, model):
+        estimators = getattr(model, 'estimators_', [model])
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        parts, offset = [], 0
+        for estimator in np.ravel(estimators):
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            leaf = left == -1
+            node = np.arange(tree.node_count)
+            children = np.where(leaf[:, None], node[:, None], np.column_stack([left, right])) + offset
+            go_left = getattr(tree, 'missing_go_to_left', np.ones(tree.node_count, dtype=bool)).astype(bool)
+            missing = np.where(go_left, children[:, 0], children[:, 1])
+            parts.append((np.where(leaf, 0, tree.feature), np.where(leaf, 0, _float32_below(tree.threshold)),
+                          children, missing, tree.value[:, 0, 0], _depth(left, right)))
+            offset += tree.node_count
+
+        return cls._concat(parts, 0.0, 'mean', getattr(model, 'feature_names_in_', ()))
+
+    @classmethod
+    def _concat(cls, parts, base_score, aggregate, feature_names):
+        feature, threshold, children, missing, value, depths = zip(*parts)
+        roots = np.cumsum([0] + [len(f) for f in feature[:-1]])
+        return cls(np.concatenate(feature), np.concatenate(threshold), np.concatenate(children),
+                   np.concatenate(missing), np.concatenate(value), roots, max(depths),
+                   base_score, aggregate, feature_names)
+
+    def predict(self, X):
+        """Predictions for the rows of X (array or DataFrame with the model's feature columns)."""
+        if hasattr(X, 'columns') and self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        # Flat indexing with take(): much cheaper than 2-D fancy indexing for small inputs
+        X_flat = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.int32) * X.shape[1])[:, None]
+        children = self.children.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        has_missing = np.isnan(X_flat).any()
+        for _ in range(self.depth):
+            x = X_flat.take(self.feature.take(nodes) + row_offsets)
+            step = children.take(2 * nodes + (x >= self.threshold.take(nodes)))
+            nodes = np.where(np.isnan(x), self.missing.take(nodes), step) if has_missing else step
+
+        leaves = self.value.take(nodes)
+        if self.aggregate == 'mean':
+            return leaves.mean(axis=1)
+        return leaves.sum(axis=1) + self.base_score
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, feature=self.feature, threshold=self.threshold, children=self.children,
+                            missing=self.missing, value=self.value, roots=self.roots, depth=self.depth,
+                            base_score=self.base_score, aggregate=self.aggregate,
+                            feature_names=np.asarray(self.feature_names, dtype=str))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['feature'], data['threshold'], data['children'], data['missing'], data['value'],
+                       data['roots'], data['depth'], data['base_score'], str(data['aggregate']),
+                       data['feature_names'].tolist())
+
+
+def _depth(left, right):
+    """Depth of the deepest leaf, counting the root as depth 0."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def compile_model(model):
+    """CompiledForest for `model`, or None when it cannot be compiled (e.g. an unsupported objective)."""
+    try:
+        return CompiledForest.from_model(model)
+    except (TypeError, ValueError):
+        return None
+
+
+def predict_routed(model, compiled, X):
+    """Predictions for the float32 array `X`: by `compiled` (may be None) for small inputs, else by `model`."""
+    if compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+        return compiled.predict(X)
+    return model.predict(X)
+
+
+def _per_call_us(predict, X, repeats):
+    predict(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(X)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main(argv=None):
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Compile a tree model to flat NumPy arrays and check it against the original")
+    parser.add_argument("--model", default="models/xgb_demand_model.joblib", help="joblib/pickle model to compile")
+    parser.add_argument("--output", help=f"compiled file (default: model path with {COMPILED_SUFFIX})")
+    parser.add_argument("--rows", type=int, default=1000, help="random rows used for the agreement and timing check")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    forest = CompiledForest.from_model(model)
+    output = forest.save(args.output or compiled_path(args.model))
+    print(f"✅ {forest.n_trees} trees ({forest.n_nodes} nodes, depth {forest.depth}) compiled to {output}")
+    print(f"   size: {os.path.getsize(output) / 1024:.0f} KiB (was {os.path.getsize(args.model) / 1024:.0f} KiB)")
+
+    rng = np.random.default_rng(0)
+    n_features = len(forest.feature_names) or int(forest.feature.max()) + 1
+    X = rng.gamma(2.0, 10.0, size=(args.rows, n_features)).astype(np.float32)
+    # Plain arrays, as the API passes them; scikit-learn would warn about the missing column names
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    native = model.predict(X)
+    compiled = forest.predict(X)
+    print(f"   max abs difference vs native predict: {np.abs(native - compiled).max():.2e}")
+
+    for rows in (1, 10, COMPILED_MAX_ROWS, 4 * COMPILED_MAX_ROWS):
+        native_us = _per_call_us(model.predict, X[:rows], 200)
+        compiled_us = _per_call_us(forest.predict, X[:rows], 200)
+        print(f"   {rows:>4} rows: native {native_us:9.1f} µs, compiled {compiled_us:9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,82 @@
 # price_elasticity.py
+import argparse
+
 import pandas as pd
-import numpy as np
 
-df = pd.read_csv("data/recommendations/daily_price_recommendation.csv", parse_dates=['event_date'])
+from .data_sources import read_product_categories
+from .elasticity import elasticities, group_elasticities, merge_stats, sufficient_stats
+from .storage import artifact_exists, load_artifact, partition_fingerprints, save_artifact
+
+KEY = 'product_name'
+COLUMNS = ['event_date', 'product_name', 'recommended_price', 'predicted_quantity']
+
+
+def load_stats():
+    """Persisted per-product statistics and {event_date: fingerprint} of the partitions folded into them."""
+    if not artifact_exists('elasticity_stats') or not artifact_exists('elasticity_partitions'):
+        return None, None
+    stats = load_artifact('elasticity_stats').set_index(KEY)
+    folded = load_artifact('elasticity_partitions')
+    return stats, dict(zip(pd.to_datetime(folded['event_date']), folded['fingerprint']))
+
+
+def update(full=False):
+    """Fold recommendation partitions not yet in the stored statistics into them.
 
-try:
-    mapping_df = pd.read_csv("data/product_mapping.csv")
-    df = df.merge(mapping_df, on='stock_code', how='left')
-except FileNotFoundError:
-    df['product_name'] = df['stock_code'].astype(str)
+    Partitions are tracked by fingerprint, so a daily run reads only the new
+    days: O(new rows). A day already folded in that was since rewritten or
+    removed (a backfill) cannot be subtracted back out, so then, like with
+    `full` or a non-partitioned artifact, the statistics are rebuilt from all
+    history.
+    """
+    partitions = partition_fingerprints('daily_price_recommendation')
+    stats, folded = (None, None) if full else load_stats()
+    rebuild = partitions is None or folded is None or any(
+        partitions.get(day) != fingerprint for day, fingerprint in folded.items())
 
-elasticity_results = []
+    if rebuild:
+        stats = None
+        new_rows = load_artifact('daily_price_recommendation', columns=COLUMNS)
+    else:
+        new_days = sorted(set(partitions) - set(folded))
+        if not new_days:
+            return stats, 0
+        new_rows = load_artifact('daily_price_recommendation', columns=COLUMNS,
+                                 start_date=new_days[0], end_date=new_days[-1])
+        new_rows = new_rows[new_rows['event_date'].isin(new_days)]
+    stats = merge_stats(stats, sufficient_stats(new_rows, key=KEY))
+    save_artifact(stats.reset_index(), 'elasticity_stats')
+    partitions = partitions or {}
+    save_artifact(pd.DataFrame({'event_date': list(partitions), 'fingerprint': list(partitions.values())}),
+                  'elasticity_partitions')
+    return stats, len(new_rows)
 
-for product in df['product_name'].unique():
-    product_df = df[df['product_name'] == product]
-    product_df = product_df[product_df['predicted_quantity'] > 0]
-    if len(product_df) < 2:
-        continue
-    X = np.log(product_df['recommended_price'])
-    y = np.log(product_df['predicted_quantity'])
-    coef = np.polyfit(X, y, 1)[0]  # slope = elasticity
-    elasticity_results.append({'product_name': product, 'price_elasticity': coef})
 
-elasticity_df = pd.DataFrame(elasticity_results)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update per-product and per-category price elasticities")
+    parser.add_argument("--full", action="store_true", help="rebuild statistics from the full history")
+    args = parser.parse_args(argv)
+
+    stats, new_rows = update(full=args.full)
+    print(f"Folded {new_rows} new rows into elasticity statistics")
+    if stats.empty:
+        print("No products have enough data to calculate price elasticity.")
+        return
+
+    categories = read_product_categories()
+    elasticity_df = elasticities(stats)
+    elasticity_df.insert(0, 'category_name', categories.reindex(elasticity_df.index).to_numpy())
+    elasticity_df = elasticity_df.dropna(subset=['price_elasticity']).reset_index()
+    save_artifact(elasticity_df, 'price_elasticity')
+
+    category_df = group_elasticities(stats, categories).rename_axis('category_name').reset_index()
+    save_artifact(category_df, 'category_elasticity')
 
-if not elasticity_df.empty:
     print("Price Elasticity per Product:")
     print(elasticity_df.sort_values(by='price_elasticity'))
-else:
-    print("No products have enough data to calculate price elasticity.")
+    print("Price Elasticity per Category:")
+    print(category_df.sort_values(by='price_elasticity'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# src/pricing_engine.py
+import numpy as np
+import pandas as pd
+
+PRICE_FEATURE = 'avg_price'
+
+# Upper bound on (rows x candidates) scored per model.predict call, keeps the
+# candidate grid from blowing up memory on very large catalogs.
+MAX_GRID_ROWS = 5_000_000
+
+
+def candidate_multipliers(min_change=-0.20, max_change=0.20, steps=21):
+    """Price multipliers spread evenly from (1 + min_change) to (1 + max_change)."""
+    if steps < 1:
+        raise ValueError("steps must be >= 1")
+    if min_change > max_change:
+        raise ValueError("min_change must be <= max_change")
+    return 1.0 + np.linspace(min_change, max_change, steps)
+
+
+def candidate_prices(base_prices, multipliers):
+    """(rows x candidates) grid of prices: every base price times every multiplier."""
+    base = np.asarray(base_prices, dtype=float)
+    return base[:, None] * np.asarray(multipliers, dtype=float)[None, :]
+
+
+def predict_candidate_demand(model, X, prices, price_feature=PRICE_FEATURE, max_grid_rows=MAX_GRID_ROWS):
+    """Predict demand for every (row, candidate price) pair.
+
+    Each row of `X` is repeated once per candidate with `price_feature` replaced
+    by the candidate price, and the whole block is scored in one `model.predict`
+    call. Returns an array shaped like `prices`.
+    """
+    columns = list(X.columns)
+    price_idx = columns.index(price_feature)
+    base = X.to_numpy(dtype=np.float32)
+    prices = np.asarray(prices, dtype=float)
+    n_rows, n_candidates = prices.shape
+    if n_rows != len(base):
+        raise ValueError(f"prices has {n_rows} rows but X has {len(base)}")
+
+    quantities = np.empty((n_rows, n_candidates), dtype=float)
+    rows_per_call = max(1, max_grid_rows // max(n_candidates, 1))
+    for start in range(0, n_rows, rows_per_call):
+        stop = min(start + rows_per_call, n_rows)
+        grid = np.repeat(base[start:stop], n_candidates, axis=0)
+        grid[:, price_idx] = prices[start:stop].ravel()
+        preds = model.predict(pd.DataFrame(grid, columns=columns))
+        quantities[start:stop] = np.asarray(preds, dtype=float).reshape(stop - start, n_candidates)
+    return quantities
+
+
+def best_candidates(prices, quantities):
+    """Index of the revenue-maximizing candidate per row (NaN revenue never wins)."""
+    revenue = prices * quantities
+    revenue = np.where(np.isnan(revenue), -np.inf, revenue)
+    return np.argmax(revenue, axis=1)
+
+
+def recommend_prices(model, X, multipliers, price_feature=PRICE_FEATURE, max_grid_rows=MAX_GRID_ROWS):
+    """Pick the revenue-maximizing candidate price for every row of `X`.
+
+    Returns a DataFrame aligned with `X` holding the recommended price, the
+    demand predicted at that price and the resulting expected revenue.
+    """
+    prices = candidate_prices(X[price_feature], multipliers)
+    quantities = predict_candidate_demand(model, X, prices, price_feature, max_grid_rows)
+    best = best_candidates(prices, quantities)
+    rows = np.arange(len(best))
+    best_price = prices[rows, best]
+    best_qty = quantities[rows, best]
+    return pd.DataFrame({
+        'recommended_price': best_price,
+        'predicted_quantity': best_qty,
+        'expected_revenue': best_price * best_qty,
+    }, index=X.index)
@@ -0,0 +1,362 @@
+# src/storage.py
+import os
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pandas as pd
+
+# "parquet" writes columnar datasets; "csv" keeps the legacy text files
+ARTIFACT_FORMAT = os.environ.get("ARTIFACT_FORMAT", "parquet")
+
+
+@dataclass(frozen=True)
+class Artifact:
+    base_path: str                      # path without extension
+    date_col: Optional[str] = None      # partition column (hive-style, one directory per day)
+    categorical: List[str] = field(default_factory=list)  # dictionary-encoded string columns
+
+    @property
+    def parquet_path(self):
+        return self.base_path + ".parquet"
+
+    @property
+    def csv_path(self):
+        return self.base_path + ".csv"
+
+
+ARTIFACTS = {
+    'cleaned_retail': Artifact("data/processed/cleaned_retail", 'order_date',
+                               ['category_name', 'product_name', 'payment_method', 'city', 'gender']),
+    'daily_product_sales': Artifact("data/processed/daily_product_sales", 'event_date', ['product_name']),
+    'daily_features': Artifact("data/processed/daily_features", 'event_date', ['product_name']),
+    'train_data': Artifact("data/train_data"),
+    'test_data': Artifact("data/test_data"),
+    'daily_price_recommendation': Artifact("data/recommendations/daily_price_recommendation", 'event_date', ['product_name']),
+    'top_products': Artifact("data/recommendations/top_products"),
+    'optimal_prices': Artifact("data/recommendations/optimal_prices", None, ['product_name']),
+    'constrained_prices': Artifact("data/recommendations/constrained_prices", None, ['product_name', 'category_name']),
+    'category_price_targets': Artifact("data/recommendations/category_price_targets"),
+    'elasticity_stats': Artifact("data/recommendations/elasticity_stats"),
+    'price_elasticity': Artifact("data/recommendations/price_elasticity", None, ['product_name', 'category_name']),
+    'category_elasticity': Artifact("data/recommendations/category_elasticity"),
+    'elasticity_partitions': Artifact("data/recommendations/elasticity_partitions"),
+    'backtest_daily': Artifact("data/backtest/backtest_daily"),
+    'backtest_summary': Artifact("data/backtest/backtest_summary"),
+    'line_chart_data': Artifact("data/recommendations/line_chart_data", 'event_date', ['product_name']),
+    'dot_chart_data': Artifact("data/recommendations/dot_chart_data", 'event_date', ['product_name']),
+    'pie_chart_data': Artifact("data/recommendations/pie_chart_data"),
+    'bar_chart_data': Artifact("data/recommendations/bar_chart_data"),
+    'scatter_chart_data': Artifact("data/recommendations/scatter_chart_data", None, ['product_name']),
+}
+
+
+def artifact_path(name):
+    """Path currently backing `name`: the Parquet dataset if present, else the CSV."""
+    artifact = ARTIFACTS[name]
+    return artifact.parquet_path if os.path.exists(artifact.parquet_path) else artifact.csv_path
+
+
+def artifact_exists(name):
+    artifact = ARTIFACTS[name]
+    return os.path.exists(artifact.parquet_path) or os.path.exists(artifact.csv_path)
+
+
+def _with_int32_dictionaries(schema):
+    """`schema` with every dictionary column on int32 indices over strings.
+
+    pyarrow sizes dictionary indices per table (int8 up to 127 values), but a
+    dataset takes its schema from one fragment, so days or chunks written
+    with different widths could not be read back together.
+    """
+    import pyarrow as pa
+
+    return pa.schema([field.with_type(pa.dictionary(pa.int32(), pa.string()))
+                      if pa.types.is_dictionary(field.type) else field for field in schema],
+                     metadata=schema.metadata)
+
+
+def _to_table(df, artifact):
+    import pyarrow as pa
+
+    df = df.copy()
+    for col in artifact.categorical:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.cast(_with_int32_dictionaries(table.schema))
+    if artifact.date_col in table.column_names:
+        idx = table.column_names.index(artifact.date_col)
+        table = table.set_column(idx, artifact.date_col, table[artifact.date_col].cast(pa.date32()))
+    return table
+
+
+def _partitioning(artifact):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([(artifact.date_col, pa.date32())]), flavor='hive')
+
+
+def _write_parquet(table, artifact, path, existing='error'):
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    if artifact.date_col is None:
+        pq.write_table(table, path)
+        return
+    ds.write_dataset(table, path, format='parquet', partitioning=_partitioning(artifact),
+                     basename_template='part-{i}.parquet', existing_data_behavior=existing)
+
+
+def save_artifact(df, name, mode='overwrite'):
+    """Write `df` as artifact `name`.
+
+    Parquet artifacts with a date column become datasets partitioned by day.
+    mode='overwrite' replaces the whole artifact atomically (written aside,
+    then renamed in); mode='partitions' only replaces the days present in
+    `df` and leaves every other partition untouched.
+    """
+    artifact = ARTIFACTS[name]
+    if ARTIFACT_FORMAT == 'csv':
+        if mode == 'partitions' and os.path.exists(artifact.csv_path):
+            existing = pd.read_csv(artifact.csv_path, parse_dates=[artifact.date_col])
+            existing = existing[~existing[artifact.date_col].isin(pd.to_datetime(df[artifact.date_col]).unique())]
+            df = pd.concat([existing, df], ignore_index=True)
+        os.makedirs(os.path.dirname(artifact.csv_path), exist_ok=True)
+        df.to_csv(artifact.csv_path, index=False)
+        return artifact.csv_path
+
+    os.makedirs(os.path.dirname(artifact.parquet_path), exist_ok=True)
+    table = _to_table(df, artifact)
+    if mode == 'partitions':
+        if artifact.date_col is None:
+            raise ValueError(f"Artifact {name!r} is not partitioned")
+        _write_parquet(table, artifact, artifact.parquet_path, existing='delete_matching')
+        return artifact.parquet_path
+    if mode != 'overwrite':
+        raise ValueError(f"Unknown save mode: {mode!r}")
+
+    tmp_path = _tmp_path(artifact.parquet_path)
+    _write_parquet(table, artifact, tmp_path)
+    _swap_in(tmp_path, artifact.parquet_path)
+    return artifact.parquet_path
+
+
+def partition_path(name, date):
+    """Directory of `date`'s partition in the Parquet dataset of artifact `name`."""
+    artifact = ARTIFACTS[name]
+    return os.path.join(artifact.parquet_path, f"{artifact.date_col}={pd.Timestamp(date):%Y-%m-%d}")
+
+
+def partition_fingerprints(name):
+    """{date: fingerprint} of the day partitions of artifact `name`, None unless it is a partitioned dataset.
+
+    Fingerprints come from file names, sizes and modification times only,
+    so they are cheap to take and change whenever a partition is rewritten.
+    """
+    artifact = ARTIFACTS[name]
+    if artifact.date_col is None or not os.path.isdir(artifact.parquet_path):
+        return None
+    prefix = f"{artifact.date_col}="
+    fingerprints = {}
+    for partition in os.scandir(artifact.parquet_path):
+        if partition.is_dir() and partition.name.startswith(prefix):
+            files = sorted((entry.name, entry.stat()) for entry in os.scandir(partition.path))
+            fingerprints[pd.Timestamp(partition.name[len(prefix):])] = ";".join(
+                f"{file_name}:{stat.st_size}:{stat.st_mtime_ns}" for file_name, stat in files)
+    return fingerprints
+
+
+def delete_partition(name, date):
+    """Drop `date`'s rows from the date-partitioned artifact `name` (nothing to do if it has none)."""
+    artifact = ARTIFACTS[name]
+    if artifact.date_col is None:
+        raise ValueError(f"Artifact {name!r} is not partitioned")
+    if ARTIFACT_FORMAT == 'csv':
+        if os.path.exists(artifact.csv_path):
+            existing = pd.read_csv(artifact.csv_path, parse_dates=[artifact.date_col])
+            keep = existing[artifact.date_col] != pd.Timestamp(date)
+            if not keep.all():
+                existing[keep].to_csv(artifact.csv_path, index=False)
+        return
+    _remove(partition_path(name, date))
+
+
+def _tmp_path(path):
+    return f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _swap_in(tmp_path, path):
+    """Replace `path` (file or dataset directory) with `tmp_path` in two renames."""
+    old_path = tmp_path + ".old"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    _remove(old_path)
+
+
+class ArtifactWriter:
+    """Write an artifact chunk by chunk, for outputs too large to hold as one frame.
+
+    Chunks go to a temporary file / dataset that replaces the artifact only
+    on a clean `close()`; on error the old artifact stays untouched.
+    Partitioned artifacts get one file per chunk and day, so chunks may
+    share days.
+    """
+
+    def __init__(self, name):
+        self.artifact = ARTIFACTS[name]
+        self.format = ARTIFACT_FORMAT
+        self.path = self.artifact.csv_path if self.format == 'csv' else self.artifact.parquet_path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.tmp_path = _tmp_path(self.path)
+        self.chunks = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.tmp_path, mode='a', header=self.chunks == 0, index=False)
+        else:
+            self._write_parquet_chunk(_to_table(df, self.artifact))
+        self.chunks += 1
+
+    def _write_parquet_chunk(self, table):
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        if self._schema is None:
+            self._schema = table.schema
+        # Dictionary indices are already int32 (see _to_table); this keeps the rest of the
+        # schema, e.g. the type of a column that is all null in a later chunk, the same throughout
+        table = table.cast(self._schema)
+        if self.artifact.date_col is None:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            self._writer.write_table(table)
+            return
+        ds.write_dataset(table, self.tmp_path, format='parquet', partitioning=_partitioning(self.artifact),
+                         basename_template=f"part-{self.chunks}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self.chunks == 0:
+            raise ValueError("No chunks were written")
+        _swap_in(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        _remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _date_filter(artifact, start_date, end_date):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    column = ds.field(artifact.date_col) if artifact.date_col else None
+    terms = []
+    if start_date is not None:
+        terms.append(column >= pa.scalar(pd.Timestamp(start_date).date(), pa.date32()))
+    if end_date is not None:
+        terms.append(column <= pa.scalar(pd.Timestamp(end_date).date(), pa.date32()))
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else terms[0] & terms[1]
+
+
+def _dataset(artifact):
+    import pyarrow.dataset as ds
+
+    if artifact.date_col is None:
+        dataset = ds.dataset(artifact.parquet_path, format='parquet')
+    else:
+        dataset = ds.dataset(artifact.parquet_path, format='parquet', partitioning=_partitioning(artifact))
+    # Fragments written before dictionary indices were fixed to int32 are widened as they are read
+    return dataset.replace_schema(_with_int32_dictionaries(dataset.schema))
+
+
+def _to_pandas(table, artifact):
+    df = table.to_pandas(date_as_object=False)
+    if artifact.date_col in df.columns:
+        df[artifact.date_col] = df[artifact.date_col].astype('datetime64[ns]')
+    return df
+
+
+def _read_csv(artifact, columns, start_date, end_date, chunksize=None):
+    """CSV fallback with the same column / date-range semantics as the Parquet path."""
+    filtering = artifact.date_col is not None and (start_date is not None or end_date is not None)
+    read_columns = columns
+    if columns is not None and filtering and artifact.date_col not in columns:
+        read_columns = list(columns) + [artifact.date_col]
+    parse_dates = None
+    if artifact.date_col and (read_columns is None or artifact.date_col in read_columns):
+        parse_dates = [artifact.date_col]
+
+    def select(df):
+        if start_date is not None:
+            df = df[df[artifact.date_col] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            df = df[df[artifact.date_col] <= pd.Timestamp(end_date)]
+        return (df[list(columns)] if columns is not None else df).reset_index(drop=True)
+
+    reader = pd.read_csv(artifact.csv_path, usecols=read_columns, parse_dates=parse_dates, chunksize=chunksize)
+    if chunksize is None:
+        return select(reader)
+    return (select(chunk) for chunk in reader)
+
+
+def _check_date_range(name, artifact, start_date, end_date):
+    if (start_date is not None or end_date is not None) and artifact.date_col is None:
+        raise ValueError(f"Artifact {name!r} has no date column to filter on")
+
+
+def iter_artifact(name, columns=None, start_date=None, end_date=None, batch_rows=100_000):
+    """Yield artifact `name` as DataFrames of at most `batch_rows` rows.
+
+    Only `columns` are read, and for date-partitioned Parquet only the
+    partitions inside [start_date, end_date] are opened. Falls back to the
+    CSV file when no Parquet dataset exists.
+    """
+    artifact = ARTIFACTS[name]
+    _check_date_range(name, artifact, start_date, end_date)
+    if not os.path.exists(artifact.parquet_path):
+        yield from _read_csv(artifact, columns, start_date, end_date, chunksize=batch_rows)
+        return
+
+    scanner = _dataset(artifact).scanner(columns=columns, filter=_date_filter(artifact, start_date, end_date),
+                                         batch_size=batch_rows)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _to_pandas(batch, artifact)
+
+
+def load_artifact(name, columns=None, start_date=None, end_date=None):
+    """Artifact `name` as one DataFrame, reading only `columns` and the requested date range."""
+    artifact = ARTIFACTS[name]
+    _check_date_range(name, artifact, start_date, end_date)
+    if not os.path.exists(artifact.parquet_path):
+        return _read_csv(artifact, columns, start_date, end_date)
+    table = _dataset(artifact).to_table(columns=columns, filter=_date_filter(artifact, start_date, end_date))
+    return _to_pandas(table, artifact)
@@ -1,24 +1,29 @@
-import pandas as pd
+import argparse
 
-# Load recommendations with predicted quantities
-df = pd.read_csv("data/recommendations/daily_price_recommendation.csv", parse_dates=['order_date'])
+from .storage import load_artifact
 
-# Load mapping to get product names
-mapping_df = pd.read_csv("data/product_mapping.csv")
+TOP_N = 5
 
-# Merge to add product_name
-df = df.merge(mapping_df, on='product_id', how='left')
 
-# Ensure product_name exists
-if 'product_name' not in df.columns:
-    df['product_name'] = df['product_id'].astype(str)
+def top_products_by_revenue(n=TOP_N):
+    """Products with the highest revenue at their recommended prices."""
+    # Load recommendations with predicted quantities (product_name is already attached)
+    df = load_artifact('daily_price_recommendation', columns=['product_name', 'recommended_price', 'predicted_quantity'])
 
-# Calculate total revenue per product
-df['revenue'] = df['recommended_price'] * df['predicted_quantity']
+    # Calculate total revenue per product
+    df['revenue'] = df['recommended_price'] * df['predicted_quantity']
 
-# Top 5 products by revenue
-top_products = df.groupby('product_name')['revenue'].sum().sort_values(ascending=False).head(5).reset_index()
-top_products.rename(columns={'revenue': 'total_revenue'}, inplace=True)
+    top_products = df.groupby('product_name', observed=True)['revenue'].sum().sort_values(ascending=False).head(n).reset_index()
+    return top_products.rename(columns={'revenue': 'total_revenue'})
 
-print("Top 5 Products by Revenue:")
-print(top_products)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the top products by recommended-price revenue")
+    parser.add_argument("--top", type=int, default=TOP_N, help="number of products to show")
+    args = parser.parse_args(argv)
+    print(f"Top {args.top} Products by Revenue:")
+    print(top_products_by_revenue(args.top))
+
+
+if __name__ == "__main__":
+    main()
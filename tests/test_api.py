@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from src.api import app as api
+from src.api.feature_store import OnlineFeatureStore
+from src.features import RollingFeatureState, to_day_numbers
+
+
+@pytest.fixture
+def client(monkeypatch):
+    history = pd.DataFrame({
+        'stock_code': '85123A',
+        'event_date': pd.date_range('2025-03-01', '2025-03-18', freq='D'),
+        'daily_quantity': 3.0,
+        'avg_price': 409.59,
+    })
+    monkeypatch.setattr(api, 'feature_store', OnlineFeatureStore(RollingFeatureState.from_frame(history)))
+    # Without a `with` block the lifespan (history load, model load) does not run
+    return TestClient(api.app)
+
+
+def test_ingest_rejects_rows_older_than_ingested_history(client):
+    response = client.post("/ingest_sales", json=[
+        {"stock_code": "85123A", "event_date": "2025-02-20", "daily_quantity": 1, "avg_price": 1.0},
+        {"stock_code": "22423", "event_date": "2025-03-19", "daily_quantity": 1, "avg_price": 5.0},
+    ])
+
+    assert response.status_code == 422
+    assert response.json()["rejected"] == [
+        {"stock_code": "85123A", "event_date": "2025-02-20", "last_ingested_date": "2025-03-18"}]
+    assert len(api.feature_store) == 1
+    state = api.feature_store.state
+    assert state.last_price.tolist() == [409.59]
+
+
+def test_ingest_same_day_twice_replaces_it(client):
+    record = {"stock_code": "85123A", "event_date": "2025-03-19", "daily_quantity": 7, "avg_price": 400.0}
+    for _ in range(2):
+        assert client.post("/ingest_sales", json=[record]).status_code == 200
+
+    features = api.feature_store.state.features_at(['85123A'], to_day_numbers(['2025-03-20']))
+    assert features['qty_lag_1'].tolist() == [7.0]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict_price", {"stock_code": "85123A", "event_date": "2025-13-40", "avg_price": 2.5}),
+    ("/predict_price/batch", {"items": [{"stock_code": "85123A", "event_date": "yesterday", "avg_price": 2.5}]}),
+    ("/ingest_sales", [{"stock_code": "85123A", "event_date": "2025-03", "daily_quantity": 1, "avg_price": 2.5}]),
+])
+def test_malformed_event_date_is_rejected(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 422
+    assert response.json()["detail"][-1]["loc"][-1] == "event_date"
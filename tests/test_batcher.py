@@ -0,0 +1,63 @@
+import asyncio
+
+from src.api.batcher import MicroBatcher
+
+
+class Recorder:
+    """predict_batch that doubles its rows and records the batches it was called with."""
+
+    def __init__(self, fail_on=()):
+        self.batches = []
+        self.fail_on = set(fail_on)
+
+    def __call__(self, rows):
+        self.batches.append(list(rows))
+        if self.fail_on & set(rows):
+            raise ValueError(f"bad rows in {rows}")
+        return [row * 2 for row in rows]
+
+
+def submit_all(batcher, rows):
+    async def run():
+        return await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_full_batch_is_flushed_without_waiting():
+    predict = Recorder()
+    # A wait far longer than the test: only reaching max_batch_size can flush
+    batcher = MicroBatcher(predict, max_batch_size=3, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(row) for row in range(6))), timeout=5)
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8, 10]
+    assert predict.batches == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    predict = Recorder()
+    batcher = MicroBatcher(predict, max_batch_size=100, max_wait_ms=20)
+
+    assert submit_all(batcher, [1, 2]) == [2, 4]
+    assert predict.batches == [[1, 2]]
+
+
+def test_failing_predict_reaches_every_caller():
+    predict = Recorder(fail_on={1, 2, 3})
+    batcher = MicroBatcher(predict, max_batch_size=3, max_wait_ms=20)
+
+    results = submit_all(batcher, [1, 2, 3])
+
+    assert all(isinstance(result, ValueError) for result in results)
+    # The batch, then each row on its own
+    assert sorted(map(tuple, predict.batches)) == [(1,), (1, 2, 3), (2,), (3,)]
+
+
+def test_bad_row_fails_only_its_own_caller():
+    batcher = MicroBatcher(Recorder(fail_on={2}), max_batch_size=3, max_wait_ms=20)
+
+    results = submit_all(batcher, [1, 2, 3])
+
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
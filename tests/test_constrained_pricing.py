@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.models.constrained_pricing import solve_category_targets
+
+# Three products on the same three-price grid; products 0 and 1 are category 0, product 2 category 1
+PRICES = np.array([[1.0, 2.0, 3.0]] * 3)
+QUANTITY = np.array([[10.0, 6.0, 3.0]] * 3)
+REVENUE = PRICES * QUANTITY  # 10, 12, 9: the middle price maximizes revenue
+CATEGORIES = np.array([0, 0, 1])
+ALLOWED = np.ones(PRICES.shape, dtype=bool)
+NO_TARGET = np.full(2, np.nan)
+
+
+def solve(objective=REVENUE, min_revenue=NO_TARGET, min_volume=NO_TARGET):
+    return solve_category_targets(objective, REVENUE, QUANTITY, ALLOWED, CATEGORIES,
+                                  np.asarray(min_revenue, dtype=float), np.asarray(min_volume, dtype=float))
+
+
+def test_targets_already_met_leave_multipliers_at_zero():
+    choice, revenue_weight, volume_weight, feasible = solve(min_revenue=[24, 12], min_volume=[12, 6])
+
+    assert choice.tolist() == [1, 1, 1]
+    assert revenue_weight.tolist() == [0, 0]
+    assert volume_weight.tolist() == [0, 0]
+    assert feasible.all()
+
+
+@pytest.mark.parametrize('scale', [1, 1000])
+def test_feasible_volume_target_is_met_at_the_smallest_multiplier(scale):
+    # Dropping to the lowest price adds 4 units for 2 revenue: b * 4 >= 2 * scale.
+    # At scale 1000 the bracket has to double well past its starting value of 1.
+    choice, revenue_weight, volume_weight, feasible = solve(objective=REVENUE * scale, min_volume=[16, np.nan])
+
+    assert volume_weight[0] == pytest.approx(0.5 * scale, rel=1e-6)
+    assert volume_weight[1] == 0
+    assert revenue_weight.tolist() == [0, 0]
+    assert QUANTITY[[0, 1], choice[:2]].sum() >= 16
+    # The category without a target keeps its unconstrained choice
+    assert choice[2] == 1
+    assert feasible.all()
+
+
+def test_revenue_target_moves_a_profit_objective():
+    profit = REVENUE - 1.5 * QUANTITY  # -5, 3, 4.5: the highest price maximizes profit
+    choice, revenue_weight, _, feasible = solve(objective=profit, min_revenue=[np.nan, 12])
+
+    assert choice.tolist() == [2, 2, 1]
+    assert revenue_weight[1] == pytest.approx(0.5, rel=1e-6)
+    assert revenue_weight[0] == 0
+    assert feasible.all()
+
+
+def test_unreachable_target_is_reported_and_best_effort():
+    # At most 20 units can be sold in category 0
+    choice, _, volume_weight, feasible = solve(min_volume=[25, 5])
+
+    assert feasible.tolist() == [False, True]
+    assert volume_weight[0] == np.inf
+    assert volume_weight[1] == 0
+    # Best effort: the category sells as much as it can
+    assert choice.tolist() == [0, 0, 1]
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import data_preprocessing
+from src.benchmarks.generate_data import generate
+from src.storage import load_artifact
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    """A synthetic export with duplicates spread across chunks and rows clean() drops."""
+    monkeypatch.chdir(tmp_path)
+    generate(6000, skus=40, days=20, seed=7, output="data/online_retail.csv")
+    df = pd.read_csv("data/online_retail.csv")
+    rng = np.random.default_rng(7)
+    duplicates = df.sample(500, random_state=7)
+    invalid = df.sample(200, random_state=8).assign(quantity=0)
+    invalid.loc[invalid.index[:100], 'product_id'] = np.nan
+    df = pd.concat([df, duplicates, invalid]).iloc[rng.permutation(len(df) + 700)]
+    df.to_csv("data/online_retail.csv", index=False)
+    return df
+
+
+def test_streaming_matches_in_memory_preprocessing(export):
+    data_preprocessing.preprocess_data()
+    expected_daily = load_artifact('daily_product_sales')
+    expected_rows = len(load_artifact('cleaned_retail'))
+
+    data_preprocessing.preprocess_data_streaming(chunk_rows=700)
+    daily = load_artifact('daily_product_sales')
+
+    assert len(load_artifact('cleaned_retail')) == expected_rows
+    # Bit for bit, including the float sums and averages
+    pd.testing.assert_frame_equal(daily, expected_daily, check_dtype=False, check_categorical=False, check_exact=True)
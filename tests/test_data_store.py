@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dashboard.data_store import IndexedFrame
+
+
+def sales(rows=2000, products=12, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'product_name': rng.choice([f"Product {i:02d}" for i in range(products)], rows),
+        # Several rows per product and day, and days no product sold on
+        'event_date': pd.Timestamp('2024-06-01') + pd.to_timedelta(rng.integers(0, 90, rows) * 2, unit='D'),
+        'revenue': rng.gamma(2.0, 10.0, rows),
+    })
+
+
+def mask_filter(df, products, start_date, end_date):
+    mask = df['product_name'].isin(products) if products else pd.Series(True, index=df.index)
+    if start_date:
+        mask &= df['event_date'] >= pd.Timestamp(start_date)
+    if end_date:
+        mask &= df['event_date'] <= pd.Timestamp(end_date)
+    return df[mask]
+
+
+SELECTIONS = [
+    ([], None, None),
+    (['Product 03'], None, None),
+    (['Product 03', 'Product 04'], '2024-07-01', '2024-07-31'),
+    (['Product 01', 'Product 07', 'Product 11'], '2024-06-15', '2024-06-15'),
+    (['Product 05', 'Unknown'], '2023-01-01', '2030-01-01'),
+    (['Unknown'], None, None),
+    ([], '2024-07-02', '2024-07-02'),   # a day nothing was sold
+    ([], '2024-08-01', '2024-07-01'),   # start after end
+    ([], '2020-01-01', '2020-12-31'),   # before the first row
+    (['Product 00', 'Product 01'], '2024-10-01', None),
+]
+
+
+@pytest.mark.parametrize('products, start_date, end_date', SELECTIONS)
+def test_select_matches_a_boolean_mask(products, start_date, end_date):
+    frame = IndexedFrame(sales())
+
+    expected = mask_filter(frame.df, products, start_date, end_date)
+    pd.testing.assert_frame_equal(frame.select(products, start_date, end_date), expected)
+
+
+def test_random_selections_match_a_boolean_mask():
+    frame = IndexedFrame(sales(seed=1))
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        products = list(rng.choice(frame.products, rng.integers(0, 5), replace=False))
+        start, end = sorted(pd.Timestamp('2024-05-20') + pd.to_timedelta(rng.integers(0, 200, 2), unit='D'))
+        expected = mask_filter(frame.df, products, start, end)
+        pd.testing.assert_frame_equal(frame.select(products, start, end), expected)
+
+
+def test_selections_are_memoized_in_a_bounded_lru():
+    frame = IndexedFrame(sales(), cache_size=2)
+    first = frame.select(['Product 01', 'Product 02'], '2024-06-01', '2024-06-30')
+
+    # Same selection, products in another order and repeated: the cached view
+    assert frame.select(['Product 02', 'Product 01', 'Product 01'], '2024-06-01', '2024-06-30') is first
+    frame.select(['Product 03'])
+    frame.select(['Product 04'])
+    assert frame._select.cache_info().currsize == 2
+    # Evicted as least recently used: recomputed, equal but not the same object
+    again = frame.select(['Product 01', 'Product 02'], '2024-06-01', '2024-06-30')
+    assert again is not first
+    pd.testing.assert_frame_equal(again, first)
+
+    frame.clear_cache()
+    assert frame._select.cache_info().currsize == 0
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import (ROLLING_FEATURES, WINDOWS, OutOfOrderSalesError, RollingFeatureState,
+                          add_rolling_features, to_day_numbers)
+
+
+def history(days, key='A', qty=1.0, price=10.0):
+    dates = pd.date_range('2025-03-01', periods=days, freq='D')
+    return pd.DataFrame({'stock_code': key, 'event_date': dates, 'daily_quantity': qty, 'avg_price': price})
+
+
+def test_update_rejects_rows_older_than_latest_day():
+    state = RollingFeatureState.from_frame(history(18))
+    next_day = to_day_numbers(['2025-03-19'])
+    before = state.features_at(['A'], next_day)
+
+    with pytest.raises(OutOfOrderSalesError) as excinfo:
+        state.update(['B', 'A'], to_day_numbers(['2025-03-18', '2025-02-20']), [5.0, 5.0], [2.0, 1.0])
+
+    assert excinfo.value.keys == ['A']
+    assert excinfo.value.days.tolist() == to_day_numbers(['2025-02-20']).tolist()
+    assert excinfo.value.last_days.tolist() == to_day_numbers(['2025-03-18']).tolist()
+    # Nothing was written, not even the valid row
+    assert len(state) == 1
+    after = state.features_at(['A'], next_day)
+    assert {name: values.tolist() for name, values in after.items()} == \
+           {name: values.tolist() for name, values in before.items()}
+
+
+def test_update_repeated_day_replaces_it():
+    state = RollingFeatureState.from_frame(history(10))
+    day = to_day_numbers(['2025-03-11'])
+    state.update(['A'], day, [4.0], [12.0])
+    state.update(['A'], day, [4.0], [12.0])
+
+    features = state.features_at(['A'], day + 1)
+    assert features['qty_lag_1'].tolist() == [4.0]
+    assert features['qty_7d_ma'].tolist() == [pytest.approx((6 * 1.0 + 4.0) / 7)]
+    assert features['price_lag_1'].tolist() == [12.0]
+
+    # A correction of the same day replaces the quantity and price
+    state.update(['A'], day, [2.0], [11.0])
+    features = state.features_at(['A'], day + 1)
+    assert features['qty_lag_1'].tolist() == [2.0]
+    assert features['price_lag_1'].tolist() == [11.0]
+
+
+def test_rows_of_one_day_within_a_batch_add_up():
+    state = RollingFeatureState()
+    day = to_day_numbers(['2025-03-01'])[0]
+    state.update(['A', 'A'], np.array([day, day]), [1.0, 2.0], [10.0, 10.0])
+    assert state.features_at(['A'], np.array([day + 1]))['qty_lag_1'].tolist() == [3.0]
+
+
+def sales(seed=0, keys=6, days=90):
+    """Random daily sales with gaps: not every key sells every day."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=days, freq='D')
+    df = pd.DataFrame([(key, date) for key in [f'K{i}' for i in range(keys)] for date in dates],
+                      columns=['stock_code', 'event_date'])
+    df = df[(rng.random(len(df)) < 0.6) | (df['event_date'] == dates[0])]
+    df['daily_quantity'] = rng.integers(1, 20, len(df)).astype(float)
+    df['avg_price'] = rng.uniform(1, 10, len(df)).round(2)
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def reference_features(df, default_price):
+    """Row-by-row definition of the rolling features."""
+    rows = []
+    for row in df.itertuples():
+        earlier = df[(df['stock_code'] == row.stock_code) & (df['event_date'] < row.event_date)]
+        days_back = (row.event_date - earlier['event_date']).dt.days
+        first_sale = df.loc[df['stock_code'] == row.stock_code, 'event_date'].min()
+        history = (row.event_date - first_sale).days
+        features = {}
+        for name, window in WINDOWS.items():
+            span = min(history, window)
+            features[name] = earlier.loc[days_back <= window, 'daily_quantity'].sum() / span if span else 0.0
+        features['qty_lag_1'] = earlier.loc[days_back == 1, 'daily_quantity'].sum()
+        latest = earlier.sort_values('event_date')
+        features['price_lag_1'] = latest['avg_price'].iloc[-1] if len(latest) else default_price
+        rows.append(features)
+    return pd.DataFrame(rows, index=df.index)
+
+
+def test_add_rolling_features_matches_row_by_row_definition():
+    df = sales()
+    result = add_rolling_features(df.copy())
+    expected = reference_features(result, df['avg_price'].mean())
+    pd.testing.assert_frame_equal(result[ROLLING_FEATURES], expected[ROLLING_FEATURES], check_exact=False)
+
+
+def test_state_append_matches_batch_features():
+    df = sales(seed=1)
+    batch = add_rolling_features(df.copy())
+    cutoff = pd.Timestamp('2025-02-15')
+
+    state = RollingFeatureState.from_frame(df[df['event_date'] < cutoff])
+    later = df[df['event_date'] >= cutoff]
+    looked_up = state.features_at(later['stock_code'], to_day_numbers(later['event_date']))
+    appended = state.append(later.copy())
+
+    expected = batch[batch['event_date'] >= cutoff].reset_index(drop=True)
+    pd.testing.assert_frame_equal(appended[ROLLING_FEATURES], expected[ROLLING_FEATURES])
+    # Lookups only see days before the cutoff, so they match the batch values of each key's first later row
+    first_later = later.assign(**looked_up).sort_values(['stock_code', 'event_date']).groupby('stock_code').head(1)
+    firsts = expected.groupby('stock_code').head(1)
+    np.testing.assert_array_equal(first_later[ROLLING_FEATURES].to_numpy(), firsts[ROLLING_FEATURES].to_numpy())
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from src import data_preprocessing, incremental, storage
+from src.benchmarks.generate_data import generate
+from src.features import FEATURES, add_rolling_features, add_time_features
+from src.storage import load_artifact
+
+DAYS = pd.date_range('2024-03-27', '2024-03-30', freq='D')
+
+
+@pytest.fixture(autouse=True)
+def history(tmp_path, monkeypatch):
+    """cleaned_retail and daily_product_sales for 12 days of synthetic sales, ending 2024-03-30."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, 'ARTIFACT_FORMAT', 'parquet')
+    generate(3000, skus=20, days=12, seed=3, output="data/online_retail.csv")
+    data_preprocessing.preprocess_data()
+
+
+def run_days(days, stages=('daily_sales', 'features')):
+    return [incremental.run(stage, day, source='files') for day in days for stage in stages]
+
+
+def test_day_by_day_features_match_the_full_history():
+    expected = add_time_features(add_rolling_features(load_artifact('daily_product_sales')))
+
+    assert all(run_days(DAYS[-2:]))
+
+    for day in DAYS[-2:]:
+        features = load_artifact('daily_features', start_date=day, end_date=day)
+        want = expected[expected['event_date'] == day]
+        assert len(features) == len(want) > 0
+        pd.testing.assert_frame_equal(
+            features.sort_values('stock_code')[FEATURES].reset_index(drop=True),
+            want.sort_values('stock_code')[FEATURES].reset_index(drop=True),
+            check_dtype=False)
+
+
+def test_rerun_with_unchanged_input_is_skipped():
+    run_days(DAYS[-2:])
+    written = load_artifact('daily_features')
+
+    assert run_days(DAYS[-2:-1]) == [False, False]
+    assert incremental.run('features', DAYS[-2], force=True)
+    pd.testing.assert_frame_equal(load_artifact('daily_features'), written, check_categorical=False)
+
+
+def test_feature_snapshots_are_pruned_relative_to_the_processed_day(monkeypatch):
+    monkeypatch.setattr(incremental, 'KEEP_FEATURE_STATES', 1)
+    run_days(DAYS, stages=('features',))
+    assert incremental._state_dates() == list(DAYS[-2:])
+
+    # Backfilling an older day keeps the newer snapshots
+    incremental.run('features', DAYS[0], force=True)
+    assert incremental._state_dates() == [DAYS[0]] + list(DAYS[-2:])
@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.api.prediction_cache import PredictionCache, SqlitePredictionStore
+
+
+def rows(n, seed=0):
+    return np.random.default_rng(seed).gamma(2.0, 10.0, size=(n, 8)).astype(np.float32)
+
+
+def test_cached_predictions_equal_the_stored_ones():
+    cache = PredictionCache(max_entries=100, ttl=60)
+    X = rows(10)
+    predictions = X.sum(axis=1).astype(float)
+
+    values, missing = cache.lookup("v1", X)
+    assert missing.all()
+    cache.store("v1", X[missing], predictions[missing])
+
+    values, missing = cache.lookup("v1", np.vstack([X[::-1], rows(2, seed=1)]))
+    assert missing.tolist() == [False] * 10 + [True] * 2
+    np.testing.assert_array_equal(values[:10], predictions[::-1])
+
+
+def test_negative_zero_shares_the_key_of_zero():
+    cache = PredictionCache()
+    cache.store("v1", np.zeros((1, 8), dtype=np.float32), [3.0])
+    values, missing = cache.lookup("v1", -np.zeros((1, 8), dtype=np.float32))
+    assert not missing.any() and values.tolist() == [3.0]
+
+
+def test_new_model_version_drops_entries():
+    cache = PredictionCache()
+    X = rows(3)
+    cache.store("v1", X, [1.0, 2.0, 3.0])
+    assert cache.lookup("v2", X)[1].all()
+    # Results computed by the old model arriving late are not kept either
+    cache.store("v1", X, [1.0, 2.0, 3.0])
+    assert cache.lookup("v2", X)[1].all()
+
+
+def test_entries_expire_and_least_recently_used_go_first(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.api.prediction_cache.time.time", lambda: clock[0])
+    cache = PredictionCache(max_entries=2, ttl=10)
+    X = rows(3)
+    cache.store("v1", X[:2], [1.0, 2.0])
+    cache.lookup("v1", X[:1])
+    cache.store("v1", X[2:], [3.0])
+    assert cache.lookup("v1", X)[1].tolist() == [False, True, False]
+
+    clock[0] += 11
+    assert cache.lookup("v1", X)[1].all()
+
+
+def test_shared_store_serves_other_caches(tmp_path):
+    shared = SqlitePredictionStore(str(tmp_path / "predictions.db"), max_entries=100)
+    X = rows(4)
+    PredictionCache(shared=shared).store("v1", X, [1.0, 2.0, 3.0, 4.0])
+
+    other_worker = PredictionCache(shared=SqlitePredictionStore(shared.path, max_entries=100))
+    values, missing = other_worker.lookup("v1", X)
+    assert not missing.any() and values.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert other_worker.lookup("v2", X)[1].all()
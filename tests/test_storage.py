@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from src import storage
+from src.storage import load_artifact, save_artifact
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, 'ARTIFACT_FORMAT', 'parquet')
+
+
+def day_of_sales(date, products):
+    return pd.DataFrame({
+        'event_date': pd.Timestamp(date),
+        'stock_code': [f"S{i}" for i in range(products)],
+        'product_name': [f"Product {i}" for i in range(products)],
+        'daily_quantity': range(products),
+    })
+
+
+def test_partitions_with_different_category_counts_load_together():
+    # A quiet first day (int8-sized dictionary) followed by one with more than 127 products
+    save_artifact(day_of_sales('2024-06-01', 10), 'daily_product_sales', mode='partitions')
+    save_artifact(day_of_sales('2024-06-02', 300), 'daily_product_sales', mode='partitions')
+
+    df = load_artifact('daily_product_sales')
+
+    assert len(df) == 310
+    assert df['product_name'].astype(str).tolist() == \
+        [f"Product {i}" for i in range(10)] + [f"Product {i}" for i in range(300)]
+    assert len(load_artifact('daily_product_sales', start_date='2024-06-02')) == 300
+
+
+@pytest.mark.parametrize('name', ['cleaned_retail', 'optimal_prices'])
+def test_writer_chunks_may_grow_their_categories(name):
+    # The first chunk's dictionary fits int8 indices; the later ones do not
+    chunks = [pd.DataFrame({'order_date': pd.Timestamp('2024-06-01') + pd.Timedelta(days=i % 2),
+                            'product_name': [f"Product {j}" for j in range(products)]})
+              for i, products in enumerate([10, 200, 300])]
+
+    with storage.ArtifactWriter(name) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    df = load_artifact(name, columns=['product_name'])
+    assert sorted(df['product_name'].astype(str)) == sorted(pd.concat(chunks)['product_name'])
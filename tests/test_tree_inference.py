@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.models.tree_inference import COMPILED_MAX_ROWS, CompiledForest, compile_model, predict_routed
+
+
+def training_data(seed=0, rows=400):
+    rng = np.random.default_rng(seed)
+    X = rng.gamma(2.0, 10.0, size=(rows, 5)).round(1).astype(np.float32)
+    y = X[:, 0] * 0.5 - X[:, 1] + rng.normal(0, 1, rows)
+    return X, y
+
+
+def probe_rows(X, missing=True, seed=1):
+    """Training rows (which sit exactly on split values), shuffled columns and rows with missing values."""
+    rng = np.random.default_rng(seed)
+    shuffled = X[rng.integers(0, len(X), 50)][:, ::-1].copy()
+    if not missing:
+        return np.vstack([X, shuffled])
+    with_nan = X[:50].copy()
+    with_nan[rng.random(with_nan.shape) < 0.3] = np.nan
+    return np.vstack([X, shuffled, with_nan])
+
+
+def test_xgboost_forest_matches_native_predict(tmp_path):
+    xgboost = pytest.importorskip("xgboost")
+    X, y = training_data()
+    model = xgboost.XGBRegressor(n_estimators=30, max_depth=4, learning_rate=0.3)
+    model.fit(X, y)
+    X_probe = probe_rows(X)
+
+    forest = CompiledForest.from_model(model)
+    np.testing.assert_allclose(forest.predict(X_probe), model.predict(X_probe), rtol=1e-5, atol=1e-4)
+
+    loaded = CompiledForest.load(forest.save(str(tmp_path / "model.trees.npz")))
+    np.testing.assert_array_equal(loaded.predict(X_probe), forest.predict(X_probe))
+
+
+def test_sklearn_forest_matches_native_predict():
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    X, y = training_data(seed=2)
+    model = ensemble.RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    X_probe = probe_rows(X, missing=False)
+
+    np.testing.assert_allclose(CompiledForest.from_model(model).predict(X_probe), model.predict(X_probe), rtol=1e-12)
+
+
+def test_compile_model_returns_none_for_unsupported_models():
+    assert compile_model(object()) is None
+
+
+class Constant:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+def test_predict_routed_sends_small_inputs_to_the_compiled_forest():
+    native, compiled = Constant(1.0), Constant(2.0)
+    small = np.zeros((COMPILED_MAX_ROWS, 5), dtype=np.float32)
+    large = np.zeros((COMPILED_MAX_ROWS + 1, 5), dtype=np.float32)
+
+    assert (predict_routed(native, compiled, small) == 2.0).all()
+    assert (predict_routed(native, compiled, large) == 1.0).all()
+    assert (predict_routed(native, None, small) == 1.0).all()